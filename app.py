@@ -1,43 +1,192 @@
 # app.py
 import os
-import io
+import uuid
 import pandas as pd
 import streamlit as st
 from datetime import datetime
 
-from helpers.data_processing import auto_clean_data
-from helpers.charts import plot_chart, remove_chart
-from helpers.excel_report import generate_excel_report
+from helpers.data_processing import auto_clean_with_report
+from helpers.ingest import read_dataframe
+from helpers.excel_ingest import list_sheets, sheet_header
+from helpers.dataset_store import DatasetStore, content_hash
+from helpers.dataset_registry import get_dataset_registry
+from helpers.session_data import SessionData
+from helpers.out_of_core import use_out_of_core, load_chunked, open_chunked, clean_chunked
+from helpers.aggregation import engine_for
+from helpers.progressive import needs_estimate, estimate_pivot, sample_for, CONFIDENCE
+from helpers.catalog import catalog_for
+from helpers.charts import plot_chart, remove_chart, add_chart_ref, gc_charts
+from helpers.chart_store import get_chart_store
+from helpers.excel_report import generate_excel_report, export_parquet, export_csv_zip, DATA_ROW_LIMIT
 from helpers.i18n import load_language, trans
-from helpers.ai_insight import ai_auto_analysis, ai_answer_question, generate_report_from_chart
-from helpers.paths import get_chart_dir
+from helpers.ai_insight import ai_auto_analysis, ai_answer_question, generate_insights
+from helpers.paths import get_chart_dir, get_cache_dir, get_setting
+from helpers.jobs import get_job_manager
+from helpers.tracing import Tracer, activate, span, traced
 # ============== UI CONFIG ==============
 st.set_page_config(page_title="📊 Data AI Dashboard", layout="wide")
 
 # ============== SESSION DEFAULTS ==============
 if "lang" not in st.session_state: st.session_state.lang = "en"
-if "data" not in st.session_state: st.session_state.data = None
-if "cleaned_data" not in st.session_state: st.session_state.cleaned_data = None
+if "session_data" not in st.session_state: st.session_state.session_data = SessionData()  # raw / cleaned / pivots
 if "is_cleaned" not in st.session_state: st.session_state.is_cleaned = False
 if "manual_reports" not in st.session_state: st.session_state.manual_reports = []
 if "ai_reports" not in st.session_state: st.session_state.ai_reports = []
+if "manual_pending" not in st.session_state: st.session_state.manual_pending = None  # provisional chart awaiting its exact pivot
 if "_file_id" not in st.session_state: st.session_state._file_id = None
+if "_session_id" not in st.session_state: st.session_state._session_id = uuid.uuid4().hex
+if "jobs" not in st.session_state: st.session_state.jobs = {}          # slot -> job id
+if "job_outcome" not in st.session_state: st.session_state.job_outcome = {}  # slot -> finished job
+if "export_path" not in st.session_state: st.session_state.export_path = None
+if "perf_panel" not in st.session_state:
+    st.session_state.perf_panel = str(get_setting("TRACE", "off")).lower() in ("1", "on", "true")
+
+session_data = st.session_state.session_data
+
+# ============== TRACING ==============
+def _session_tracer() -> Tracer:
+    if "tracer" not in st.session_state:
+        st.session_state.tracer = Tracer(session=st.session_state._session_id,
+                                         log_path=get_setting("TRACE_LOG", "./.cache/trace.jsonl"))
+    return st.session_state.tracer
+
+# spans are recorded only while the Performance panel is on (no-ops otherwise)
+activate(_session_tracer() if st.session_state.perf_panel else None)
 
 # ============== CACHED HELPERS ==============
-@st.cache_data(show_spinner=False)
-def _auto_clean_cached(df: pd.DataFrame) -> pd.DataFrame:
-    return auto_clean_data(df)
+@st.cache_resource(show_spinner=False)
+def _dataset_store() -> DatasetStore:
+    return DatasetStore(get_cache_dir(), max_bytes=int(get_setting("CACHE_MAX_MB", 2048)) << 20)
+
+# Frames are shared across sessions through the dataset registry (one copy per distinct upload),
+# backed by the on-disk store; each returns a Lease the session data holds on to.
+# Uploads above OUT_OF_CORE_MB stay on disk as memory-mapped ChunkedFrames (cleaned / aggregated in chunks).
+# Workbooks are cached per parsed sheet instead (`workbook`: {"key": file hash, "sheets", "usecols"}).
+@traced("upload.load_raw")
+def _load_raw(key: str, data_bytes: bytes, ext: str, on_progress=None, workbook=None):
+    def load() -> pd.DataFrame:
+        store = _dataset_store()
+        if use_out_of_core(len(data_bytes), ext):
+            return load_chunked(store, key, data_bytes, ext, on_progress=on_progress)
+        if workbook is not None:
+            return read_dataframe(data_bytes, ext, on_progress=on_progress, store=store, **workbook)
+        df = store.get(key, "raw")
+        if df is None:
+            df = read_dataframe(data_bytes, ext, on_progress=on_progress)
+            store.put(key, "raw", df)
+        return df
+    return get_dataset_registry().acquire(key, "raw", load)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _workbook_sheets(file_id: str, _data_bytes: bytes) -> list:
+    return list_sheets(_data_bytes)
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _sheet_columns(file_id: str, sheet: str, _data_bytes: bytes) -> list:
+    return sheet_header(_data_bytes, sheet)
+
+@traced("upload.load_clean")
+def _load_clean(key: str, raw, out_of_core: bool = False):
+    """
+    Returns (lease on the cleaned frame, report); report is None when served from a cache.
+    raw() (which may reload a spilled frame) is only called when the frame has to be cleaned.
+    """
+    report = None
+
+    def load() -> pd.DataFrame:
+        nonlocal report
+        store = _dataset_store()
+        if out_of_core:
+            cleaned = open_chunked(store, key, "clean")
+            if cleaned is None:
+                cleaned, report = clean_chunked(store, key, raw())
+            return cleaned
+        cleaned = store.get(key, "clean")
+        if cleaned is None:
+            cleaned, report = auto_clean_with_report(raw())
+            store.put(key, "clean", cleaned)
+        return cleaned
+    return get_dataset_registry().acquire(key, "clean", load), report
 
-@st.cache_data(show_spinner=False)
 def _aggregate_cached(df: pd.DataFrame, category_col: str, numeric_col: str, agg_func: str) -> pd.DataFrame:
-    return getattr(df.groupby(category_col)[numeric_col], agg_func)().reset_index()
-
-@st.cache_data(show_spinner=False)
-def _read_df_from_bytes(data_bytes: bytes, ext: str) -> pd.DataFrame:
-    if ext == "csv":  return pd.read_csv(io.BytesIO(data_bytes))
-    if ext in ("xlsx", "xls"): return pd.read_excel(io.BytesIO(data_bytes))
-    if ext == "json": return pd.read_json(io.BytesIO(data_bytes))
-    raise ValueError("Unsupported file type")
+    # group codes and results are cached per frame by the shared aggregation engine
+    return engine_for(df).pivot(category_col, numeric_col, agg_func)
+
+# Progressive manual charts: on large frames a sample estimate is charted first and the exact
+# pivot is computed by a background job (both cached per frame / columns / aggregation).
+def _exact_pivot(df: pd.DataFrame, category_col: str, numeric_col: str, agg_func: str, progress) -> pd.DataFrame:
+    progress("aggregate", 0.0)
+    return _aggregate_cached(df, category_col, numeric_col, agg_func)
+
+# ============== BACKGROUND JOBS ==============
+def _start_job(slot: str, kind: str, fn, *args, **kwargs):
+    """Run fn in the shared job queue; this session tracks it under `slot`."""
+    st.session_state.jobs[slot] = get_job_manager().submit(kind, fn, *args, owner=st.session_state._session_id, **kwargs)
+
+def _cancel_jobs():
+    for job_id in st.session_state.jobs.values():
+        get_job_manager().cancel(job_id)
+    st.session_state.jobs = {}
+
+@st.fragment(run_every=1.0)
+def _job_panel(slot: str):
+    """Polls the job in `slot`; once finished, stores the outcome and reruns the whole app."""
+    manager = get_job_manager()
+    job_id = st.session_state.jobs.get(slot)
+    info = manager.status(job_id)
+    if info is None:
+        st.session_state.jobs.pop(slot, None)
+        return
+    if info["status"] in ("queued", "running"):
+        if info["status"] == "queued":
+            label = trans(locale, "job_queued", "Queued...")
+        else:
+            stage = info["stage"] or ""
+            label = f"{trans(locale, f'stage_{stage}', stage)} · {info['elapsed']:.0f}s"
+        st.progress(info["fraction"], text=label)
+        if st.button(trans(locale, "job_cancel", "Cancel"), key=f"cancel_{slot}"):
+            manager.cancel(job_id)
+        return
+    st.session_state.jobs.pop(slot, None)
+    st.session_state.job_outcome[slot] = manager.collect(job_id)
+    st.rerun()
+
+@st.fragment(run_every=2.0)
+def _perf_panel():
+    """Span summary + most recent spans of this session (refreshes while jobs run)."""
+    tracer = _session_tracer()
+    st.markdown(f"**{trans(locale, 'perf_title', 'Performance')}**")
+    summary = tracer.summary()
+    if not summary:
+        st.caption(trans(locale, "perf_empty", "No spans recorded yet."))
+    else:
+        st.dataframe(pd.DataFrame(summary)[["name", "calls", "total_ms", "mean_ms", "max_ms", "rows",
+                                            "cache_hits", "cache_misses", "max_rss_delta_mb"]], hide_index=True)
+        st.caption(trans(locale, "perf_recent", "Recent spans"))
+        recent = pd.DataFrame(tracer.records()[-30:][::-1])
+        st.dataframe(recent[["name", "ms", "rss_delta_mb", "rows", "cache_hits", "cache_misses", "parent"]],
+                     hide_index=True)
+    st.caption(trans(locale, "session_mem_fmt", "Session data: {memory_mb} MB in memory, {spilled_mb} MB spilled "
+                     "({spilled_frames} frames) · budget {budget_mb} MB").format(**session_data.stats()))
+    st.caption(trans(locale, "registry_fmt", "Shared datasets: {datasets} ({memory_mb} MB, {refs} leases, "
+                     "{idle} idle)").format(**get_dataset_registry().stats()))
+    st.caption(trans(locale, "chart_store_fmt", "Chart images in memory: {items} ({memory_mb} MB)").format(
+        **get_chart_store().stats()))
+    if tracer.log_path:
+        st.caption(trans(locale, "perf_log_fmt", "Trace log: {path}").format(path=tracer.log_path))
+    if st.button(trans(locale, "perf_clear", "Clear"), key="perf_clear"):
+        tracer.clear()
+
+def _job_outcome(slot: str):
+    """The finished job of `slot` (once), after reporting cancellation / errors."""
+    job = st.session_state.job_outcome.pop(slot, None)
+    if job is None:
+        return None
+    if job.status == "cancelled":
+        st.info(trans(locale, "job_cancelled", "Cancelled."))
+    elif job.status == "error":
+        st.error(trans(locale, "job_failed_fmt", "Job failed: {error}").format(error=job.error))
+    return job if job.status == "done" else None
 
 # ============== I18N ==============
 lang = st.session_state.lang
@@ -56,6 +205,7 @@ with st.sidebar:
         default_label = "Tiếng Việt" if st.session_state.lang == "vi" else "English"
         st.selectbox(trans(locale, "language_label", "Language"), labels,
                      index=labels.index(default_label), key="lang_choice", on_change=_set_lang)
+        st.toggle(trans(locale, "perf_toggle", "Performance panel"), key="perf_panel")
 
     # Upload
     with upload_tab:
@@ -65,6 +215,9 @@ with st.sidebar:
             key="data_uploader"
         )
 
+    if st.session_state.perf_panel:
+        _perf_panel()
+
 # Reload locale if language changed in sidebar
 lang = st.session_state.lang
 locale = load_language(lang)
@@ -74,15 +227,72 @@ st.title(trans(locale, "page_title", "📊 Data AI Dashboard"))
 
 # ============== HELPERS ==============
 def warn_if_not_clean():
-    if st.session_state.data is not None and not st.session_state.is_cleaned:
+    if session_data.loaded and not st.session_state.is_cleaned:
         st.warning(trans(locale, "warn_not_clean",
             "⚠️ Your data hasn't been auto-cleaned yet. Results may be less reliable. "
             "Go to the Upload tab and click “Auto clean data”."
         ))
 
+def add_manual_report(agg_data: pd.DataFrame, category_col: str, numeric_col: str, agg_func: str, chart_type: str):
+    st.dataframe(agg_data if len(agg_data) > 500 else agg_data.style.background_gradient(cmap="viridis"))
+
+    chart_path, _ = plot_chart(chart_folder, chart_type, agg_data, category_col, numeric_col)
+    insight = generate_insights([{"pivot": agg_data, "category": category_col, "numeric": numeric_col,
+                                  "agg": agg_func, "chart_type": chart_type}], lang, max_words=100)[0] if chart_path else ""
+
+    report_id = uuid.uuid4().hex
+    add_chart_ref(chart_path, report_id)
+    st.session_state.manual_reports.append({
+        "report_id": report_id,
+        "pivot_table": session_data.track(agg_data),
+        "chart_path": chart_path,
+        "sheet_name": f"{category_col}_{numeric_col}",
+        "insight": insight,
+        "source": "MANUAL",
+    })
+    st.toast(trans(locale, "analysis_ready", "Analysis ready. Open the Report page for full details."), icon="✅")
+
+def drop_manual_pending():
+    """Forget the provisional chart (its exact pivot was delivered, cancelled or superseded)."""
+    pending = st.session_state.manual_pending
+    if pending is not None and pending["chart_path"]:
+        remove_chart(pending["chart_path"], ref=pending["ref"])
+    st.session_state.manual_pending = None
+
 def no_data_msg():
     st.info(trans(locale, "no_data_msg", "No data yet. Please upload a file in the Upload tab."))
 
+REPORTS_PAGE_SIZE = 10
+
+def report_list(reports: list, kind: str, caption_default: str, remove_default: str):
+    """
+    One page of report cards: chart thumbnail from the in-memory chart store (full size on demand),
+    insight and remove button. Only the current page touches any image.
+    """
+    pages = max(1, -(-len(reports) // REPORTS_PAGE_SIZE))
+    page_key = f"reports_page_{kind}"
+    page = 1
+    if pages > 1:
+        st.session_state[page_key] = min(st.session_state.get(page_key, 1), pages)
+        page = st.number_input(trans(locale, "reports_page_fmt", "Page (of {n})").format(n=pages),
+                               min_value=1, max_value=pages, step=1, key=page_key)
+    store = get_chart_store()
+    start = (page - 1) * REPORTS_PAGE_SIZE
+    for idx in range(start, min(start + REPORTS_PAGE_SIZE, len(reports))):
+        report = reports[idx]
+        chart_path = report.get("chart_path"); insight = report.get("insight", "")
+        full_key = f"full_{kind}_{report.get('report_id', idx)}"
+        image = store.get(chart_path) if st.session_state.get(full_key) else store.thumbnail(chart_path)
+        if image is not None:
+            st.image(image, caption=trans(locale, f"{kind}_chart_caption_fmt", caption_default).format(i=idx+1))
+        st.markdown(f"**{trans(locale, 'insight', 'Insight')}:** {insight}")
+        c1, c2 = st.columns([1, 3])
+        c1.toggle(trans(locale, "full_size", "Full size"), key=full_key)
+        if c2.button(trans(locale, f"remove_{kind}_chart_fmt", remove_default).format(i=idx+1), key=f"remove_{kind}_{idx}"):
+            if chart_path: remove_chart(chart_path, ref=report.get("report_id"))
+            session_data.release(report.get("pivot_table"))
+            reports.pop(idx); st.rerun()
+
 # ============== MAIN TABS ==============
 tabs = st.tabs([
     trans(locale, "tab_upload", "Upload"),
@@ -91,56 +301,106 @@ tabs = st.tabs([
     trans(locale, "tab_reports", "Reports"),
 ])
 
-chart_folder = "./charts"; os.makedirs(chart_folder, exist_ok=True)
+chart_folder = get_chart_dir()
+gc_charts(chart_folder)  # throttled; drops charts no report references anymore
 
 # ===== TAB 1: Upload & Clean =====
-with tabs[0]:
+with tabs[0], span("tab.upload"):
     st.subheader(trans(locale, "tab_upload", "Upload"))
     if uploaded_file is not None:
         try:
             data_bytes = uploaded_file.getvalue()
             ext = uploaded_file.name.split(".")[-1].lower()
-            file_id = (uploaded_file.name, len(data_bytes))
+            file_id = content_hash(data_bytes)
         except Exception as e:
             st.error(f"Cannot read file: {e}"); st.stop()
 
+        workbook = None
+        if ext == "xlsx":
+            try:
+                sheet_info = {s["name"]: s for s in _workbook_sheets(file_id, data_bytes)}
+            except Exception as e:
+                st.error(f"Cannot read file: {e}"); st.stop()
+            default_sheets = [n for n, s in sheet_info.items() if not s["hidden"]][:1] or list(sheet_info)[:1]
+            with st.expander(trans(locale, "xlsx_workbook_fmt", "Workbook: {n} sheets").format(n=len(sheet_info)),
+                             expanded=len(sheet_info) > 1):
+                sheets = st.multiselect(
+                    trans(locale, "xlsx_sheets", "Sheets (several are stacked with a Sheet column)"), list(sheet_info),
+                    default=default_sheets, key=f"xlsx_sheets_{file_id}",
+                    format_func=lambda n: n if sheet_info[n]["rows"] is None else
+                        f"{n} ({max(sheet_info[n]['rows'] - 1, 0):,} × {sheet_info[n]['columns']})")
+                columns = list(dict.fromkeys(c for n in sheets for c in _sheet_columns(file_id, n, data_bytes)))
+                usecols = st.multiselect(trans(locale, "xlsx_columns", "Columns (empty = all)"), columns,
+                                         key=f"xlsx_columns_{file_id}")
+            if not sheets:
+                st.info(trans(locale, "xlsx_pick_sheet", "Pick at least one sheet.")); st.stop()
+            workbook = {"key": file_id, "sheets": sheets, "usecols": usecols or None}
+            if sheets != default_sheets or usecols:  # each selection is its own dataset
+                file_id = content_hash("\x00".join([file_id, *sheets, "\x01", *sorted(usecols)]).encode("utf-8"))
+
         if st.session_state._file_id != file_id:
+            bar = st.progress(0.0, text=trans(locale, "parsing_file", "Parsing file..."))
             try:
-                df = _read_df_from_bytes(data_bytes, ext)
+                lease = _load_raw(file_id, data_bytes, ext, on_progress=bar.progress, workbook=workbook)
             except Exception as e:
                 st.error(f"Cannot parse file: {e}"); st.stop()
+            finally:
+                bar.empty()
 
+            _cancel_jobs()
             st.session_state._file_id = file_id
-            st.session_state.data = df
-            st.session_state.cleaned_data = df.copy()
+            session_data.set_raw(lease.frame, lease)  # cleaned shares the raw frame until cleaning; old pivots are released
             st.session_state.is_cleaned = False
+            for r in st.session_state.manual_reports + st.session_state.ai_reports:
+                if r.get("chart_path"): remove_chart(r["chart_path"], ref=r.get("report_id"))
             st.session_state.manual_reports = []
             st.session_state.ai_reports = []
+            drop_manual_pending()
             st.success(trans(locale, "file_loaded", "File loaded."))
 
-    if st.session_state.data is None:
+    if not session_data.loaded:
         no_data_msg()
     else:
+        out_of_core = not isinstance(session_data.cleaned, pd.DataFrame)
+        if out_of_core:
+            st.info(trans(locale, "out_of_core_note", "Large file ({rows:,} rows): kept on disk and "
+                          "cleaned / aggregated in chunks. Exports include report sheets only.").format(
+                          rows=len(session_data.cleaned)))
         with st.expander(trans(locale, "data_preview", "Data preview"), expanded=False):
-            st.dataframe(st.session_state.data.head(50))
+            st.dataframe(session_data.raw_head(50))
+        with st.expander(trans(locale, "column_summary", "Column summary"), expanded=False):
+            meta = catalog_for(session_data.cleaned).columns.values()
+            st.dataframe(pd.DataFrame([
+                {"column": m["name"], "dtype": m["dtype"], "role": m["role"], "nulls": m["nulls"],
+                 "distinct (≈)": m["distinct"],
+                 "median / top": (f"{m['quantiles'][0.5]:g}" if m["quantiles"][0.5] is not None else "")
+                                 if m["kind"] == "numeric" else ", ".join(str(v) for v, _ in m.get("top", [])[:3])}
+                for m in meta]), hide_index=True)
 
         if st.button(trans(locale, "auto_clean", "Auto clean data")):
             with st.spinner(trans(locale, "loading", "Loading...")):
-                st.session_state.cleaned_data = _auto_clean_cached(st.session_state.data)
+                lease, report = _load_clean(st.session_state._file_id, lambda: session_data.raw, out_of_core)
+                session_data.set_cleaned(lease.frame, lease)
                 st.session_state.is_cleaned = True
                 st.success(trans(locale, "data_cleaned", "Data cleaned successfully!"))
-                st.dataframe(st.session_state.cleaned_data.head(50), height=400)
+                if report:
+                    st.caption(trans(locale, "clean_report_fmt",
+                        "Memory {before:.1f} MB → {after:.1f} MB · {dropped} duplicate rows removed").format(
+                        before=report["bytes_before"] / 2**20, after=report["bytes_after"] / 2**20,
+                        dropped=report["rows_before"] - report["rows_after"]))
+                st.dataframe(session_data.cleaned.head(50), height=400)
 
 # ===== TAB 2: Manual Analysis =====
-with tabs[1]:
+with tabs[1], span("tab.manual"):
     st.subheader(trans(locale, "tab_manual", "Manual Analysis"))
 
-    data = st.session_state.cleaned_data
+    data = session_data.cleaned
     if data is None: no_data_msg(); st.stop()
     warn_if_not_clean()
 
-    cat_cols = data.select_dtypes(include=["object", "string", "category"]).columns.tolist()
-    num_cols = data.select_dtypes(include=["number"]).columns.tolist()
+    catalog = catalog_for(data)  # built once per frame, shared with the AI helpers
+    cat_cols = catalog.category_columns
+    num_cols = catalog.numeric_columns
     if not cat_cols or not num_cols:
         st.info(trans(locale, "no_cols_msg", "Need at least one categorical and one numeric column.")); st.stop()
 
@@ -168,36 +428,62 @@ with tabs[1]:
 
         submitted = st.form_submit_button(trans(locale, "plot_graph", "Plot chart"))
 
-    if submitted:
+    job = _job_outcome("manual_exact")
+    if job is not None and st.session_state.manual_pending is not None:
         with st.spinner(trans(locale, "loading", "Loading...")):
-            agg_data = _aggregate_cached(data, category_col, numeric_col, agg_func)
-            st.dataframe(agg_data if len(agg_data) > 500 else agg_data.style.background_gradient(cmap="viridis"))
-
-            chart_path, chart_name = plot_chart(chart_folder, chart_choice["value"], agg_data, category_col, numeric_col)
-            insight = generate_report_from_chart(chart_folder, chart_name, lang=lang) if chart_path else ""
-
-            st.session_state.manual_reports.append({
-                "pivot_table": agg_data,
-                "chart_path": chart_path,
-                "sheet_name": f"{category_col}_{numeric_col}",
-                "insight": insight,
-                "source": "MANUAL",
-            })
-        st.toast(trans(locale, "analysis_ready", "Analysis ready. Open the Report page for full details."), icon="✅")
+            add_manual_report(job.result, *st.session_state.manual_pending["params"])
+    if "manual_exact" not in st.session_state.jobs:
+        drop_manual_pending()
+
+    if submitted:
+        if "manual_exact" in st.session_state.jobs:
+            get_job_manager().cancel(st.session_state.jobs.pop("manual_exact"))
+        drop_manual_pending()
+        params = (category_col, numeric_col, agg_func, chart_choice["value"])
+        if needs_estimate(data, category_col, numeric_col, agg_func):
+            # provisional chart from the row sample; the exact pivot follows from the job queue
+            estimate = estimate_pivot(data, category_col, numeric_col, agg_func)
+            chart_path, _ = plot_chart(chart_folder, chart_choice["value"], estimate[[category_col, numeric_col]],
+                                       category_col, numeric_col)
+            ref = uuid.uuid4().hex
+            add_chart_ref(chart_path, ref)
+            st.session_state.manual_pending = {"params": params, "estimate": estimate, "chart_path": chart_path, "ref": ref}
+            _start_job("manual_exact", "exact_pivot", _exact_pivot, data, category_col, numeric_col, agg_func)
+        else:
+            with st.spinner(trans(locale, "loading", "Loading...")):
+                add_manual_report(_aggregate_cached(data, category_col, numeric_col, agg_func), *params)
+
+    pending = st.session_state.manual_pending
+    if pending is not None:
+        sample = sample_for(data)
+        st.caption(trans(locale, "estimate_note_fmt", "Estimate from a {rows:,}-row sample ({share:.1%} of the data), "
+                         "{level:.0%} confidence intervals. The exact chart replaces it when ready.").format(
+                         rows=sample.n, share=sample.n / max(sample.population, 1), level=CONFIDENCE))
+        st.dataframe(pending["estimate"], hide_index=True)
+        image = get_chart_store().get(pending["chart_path"])
+        if image:
+            st.image(image, caption=trans(locale, "estimate_chart_caption", "Provisional chart"))
+        _job_panel("manual_exact")
 
 # ===== TAB 3: AI Analysis =====
-with tabs[2]:
+with tabs[2], span("tab.ai"):
     st.subheader(trans(locale, "tab_ai", "AI Analysis"))
 
-    data = st.session_state.cleaned_data
+    data = session_data.cleaned
     if data is None: no_data_msg(); st.stop()
     warn_if_not_clean()
 
-    if st.button(trans(locale, "run_ai_auto", "Run AI Auto Analysis"), key="btn_ai_auto"):
-        with st.spinner(trans(locale, "loading", "Loading...")):
-            reports = ai_auto_analysis(data, lang=lang)
-            st.session_state.ai_reports.extend(reports)
+    job = _job_outcome("ai_auto")
+    if job is not None:
+        for r in job.result:
+            r["pivot_table"] = session_data.track(r["pivot_table"])
+        st.session_state.ai_reports.extend(job.result)
         st.toast(trans(locale, "analysis_ready", "Analysis ready. Open the Report page for full details."), icon="✅")
+    if "ai_auto" in st.session_state.jobs:
+        _job_panel("ai_auto")
+    elif st.button(trans(locale, "run_ai_auto", "Run AI Auto Analysis"), key="btn_ai_auto"):
+        _start_job("ai_auto", "ai_auto_analysis", ai_auto_analysis, data, lang=lang)
+        st.rerun()
 
     with st.form("ai_ask_form", clear_on_submit=False):
         user_question = st.text_input(trans(locale, "ask_ai", "Ask AI about your data"), key="ai_question")
@@ -209,10 +495,10 @@ with tabs[2]:
             st.markdown(f"**{trans(locale, 'ai_answer', 'AI Answer')}:** {answer}")
 
 # ===== TAB 4: Reports =====
-with tabs[3]:
+with tabs[3], span("tab.reports"):
     st.subheader(trans(locale, "tab_reports", "Reports"))
 
-    data = st.session_state.cleaned_data
+    data = session_data.cleaned
     if data is None: no_data_msg(); st.stop()
 
     manual_reports = st.session_state.manual_reports
@@ -226,52 +512,67 @@ with tabs[3]:
             if not manual_reports:
                 st.info(trans(locale, "no_manual", "No manual charts."))
             else:
-                for idx, report in enumerate(list(manual_reports)):
-                    chart_path = report.get("chart_path"); insight = report.get("insight", "")
-                    if chart_path and os.path.exists(chart_path):
-                        st.image(chart_path, caption=trans(locale, "manual_chart_caption_fmt", "Manual Chart {i}").format(i=idx+1))
-                    st.markdown(f"**{trans(locale, 'insight', 'Insight')}:** {insight}")
-                    if st.button(trans(locale, "remove_manual_chart_fmt", "🗑 Remove Manual Chart {i}").format(i=idx+1), key=f"remove_manual_{idx}"):
-                        if chart_path: remove_chart(chart_path)
-                        st.session_state.manual_reports.pop(idx); st.rerun()
+                report_list(manual_reports, "manual", "Manual Chart {i}", "🗑 Remove Manual Chart {i}")
 
         # AI
         with st.expander(trans(locale, "ai_reports_section", "🤖 AI Reports"), expanded=True):
             if not ai_reports:
                 st.info(trans(locale, "no_ai", "No AI charts."))
             else:
-                for idx, report in enumerate(list(ai_reports)):
-                    chart_path = report.get("chart_path"); insight = report.get("insight", "")
-                    if chart_path and os.path.exists(chart_path):
-                        st.image(chart_path, caption=trans(locale, "ai_chart_caption_fmt", "AI Chart {i}").format(i=idx+1))
-                    st.markdown(f"**{trans(locale, 'insight', 'Insight')}:** {insight}")
-                    if st.button(trans(locale, "remove_ai_chart_fmt", "🗑 Remove AI Chart {i}").format(i=idx+1), key=f"remove_ai_{idx}"):
-                        if chart_path: remove_chart(chart_path)
-                        st.session_state.ai_reports.pop(idx); st.rerun()
+                report_list(ai_reports, "ai", "AI Chart {i}", "🗑 Remove AI Chart {i}")
 
         # Export
         st.markdown("---")
-        if st.button(trans(locale, "export_all", "📥 Export All Reports"), key="btn_export_all"):
-            with st.spinner(trans(locale, "creating_combined", "⏳ Creating combined Excel report...")):
-                all_reports = []
-                for r in st.session_state.manual_reports:
-                    rr = r.copy(); rr["source"] = rr.get("source", "MANUAL")
-                    rr["sheet_name"] = f"MAN_{rr.get('sheet_name','manual')}"
-                    all_reports.append(rr)
-                for r in st.session_state.ai_reports:
-                    rr = r.copy(); rr["source"] = rr.get("source", "AI")
-                    rr["sheet_name"] = rr.get("sheet_name","ai") if rr.get("sheet_name","").startswith("AI_") else f"AI_{rr.get('sheet_name','ai')}"
-                    all_reports.append(rr)
-
-                report_path = generate_excel_report(st.session_state.cleaned_data, all_reports,
-                                                    f"all_reports_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        export_all_rows = st.checkbox(trans(locale, "export_all_rows", "Include all data rows"), key="chk_export_all_rows")
+        job = _job_outcome("export")
+        if job is not None:
+            st.session_state.export_path = job.result
             st.success(trans(locale, "export_success", "Export success. Please download your file below."))
-            if os.path.exists(report_path):
-                with open(report_path, "rb") as f:
+        if "export" in st.session_state.jobs:
+            _job_panel("export")
+        elif st.button(trans(locale, "export_all", "📥 Export All Reports"), key="btn_export_all"):
+            all_reports = []
+            for r in st.session_state.manual_reports:
+                rr = r.copy(); rr["source"] = rr.get("source", "MANUAL")
+                rr["sheet_name"] = f"MAN_{rr.get('sheet_name','manual')}"
+                all_reports.append(rr)
+            for r in st.session_state.ai_reports:
+                rr = r.copy(); rr["source"] = rr.get("source", "AI")
+                rr["sheet_name"] = rr.get("sheet_name","ai") if rr.get("sheet_name","").startswith("AI_") else f"AI_{rr.get('sheet_name','ai')}"
+                all_reports.append(rr)
+
+            _start_job("export", "excel_export", generate_excel_report, session_data.cleaned, all_reports,
+                       f"all_reports_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+                       data_row_limit=None if export_all_rows else DATA_ROW_LIMIT)
+            st.rerun()
+        report_path = st.session_state.export_path
+        if report_path and os.path.exists(report_path):
+            with open(report_path, "rb") as f:
+                st.download_button(
+                    label=trans(locale, "download_all", "Download All Reports"),
+                    data=f,
+                    file_name=os.path.basename(report_path),
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    key="btn_download_all"
+                )
+
+        # Data-only exports: whole dataset, seconds instead of minutes
+        if isinstance(session_data.cleaned, pd.DataFrame):
+            c1, c2 = st.columns(2)
+            data_path, data_mime = None, None
+            stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            if c1.button(trans(locale, "export_parquet", "📦 Export data (Parquet)"), key="btn_export_parquet"):
+                data_path = export_parquet(session_data.cleaned, f"data_{stamp}")
+                data_mime = "application/vnd.apache.parquet"
+            if c2.button(trans(locale, "export_csv_zip", "🗜 Export data (CSV .zip)"), key="btn_export_csv_zip"):
+                data_path = export_csv_zip(session_data.cleaned, f"data_{stamp}")
+                data_mime = "application/zip"
+            if data_path and os.path.exists(data_path):
+                with open(data_path, "rb") as f:
                     st.download_button(
-                        label=trans(locale, "download_all", "Download All Reports"),
+                        label=trans(locale, "download_data", "Download data"),
                         data=f,
-                        file_name=os.path.basename(report_path),
-                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                        key="btn_download_all"
+                        file_name=os.path.basename(data_path),
+                        mime=data_mime,
+                        key="btn_download_data"
                     )
@@ -0,0 +1,119 @@
+# benchmarks/_util.py
+import json
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+def _proc_status_mb(field: str) -> Optional[float]:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (MB); -1 when unavailable."""
+    # VmHWM is reset on exec; ru_maxrss may carry the parent's peak over.
+    peak = _proc_status_mb("VmHWM")
+    if peak is not None:
+        return peak
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+        except Exception:
+            return -1.0
+
+def rss_mb() -> float:
+    """Current resident set size (MB); -1 when unavailable."""
+    rss = _proc_status_mb("VmRSS")
+    if rss is not None:
+        return rss
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except Exception:
+        return -1.0
+
+def reset_peak_rss() -> bool:
+    """Restart the peak (VmHWM) from the current RSS; Linux only, False elsewhere."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+class StageRecorder:
+    """
+    Wall time, CPU time and peak RSS per named stage:
+
+        rec = StageRecorder()
+        with rec.stage("clean"):
+            ...
+        rec.stages  # {"clean": {"wall_s": .., "cpu_s": .., "peak_rss_mb": .., "rss_delta_mb": ..}}
+
+    CPU time is this process only (pool workers are not included). Without a resettable
+    peak (non-Linux) peak_rss_mb is the process-wide peak so far.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, Any]] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        reset_peak_rss()
+        rss0 = rss_mb()
+        w0, c0 = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.stages[name] = {
+                "wall_s": round(time.perf_counter() - w0, 4),
+                "cpu_s": round(time.process_time() - c0, 4),
+                "peak_rss_mb": round(peak_rss_mb(), 1),
+                "rss_delta_mb": round(rss_mb() - rss0, 1),
+            }
+
+def sales_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Small sales-like table with strings, ints, floats and a few nulls."""
+    rng = np.random.default_rng(seed)
+    cities = np.array(["Hanoi", "Ho Chi Minh", "Da Nang", "Hai Phong", "Can Tho", " Hue "])
+    products = np.array([f"P{i:04d}" for i in range(500)])
+    price = rng.gamma(2.0, 50.0, rows).round(2)
+    price[rng.random(rows) < 0.01] = np.nan
+    return pd.DataFrame({
+        "OrderID": np.arange(rows),
+        "Date": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, rows), unit="D"),
+        "City": rng.choice(cities, rows),
+        "Product": rng.choice(products, rows),
+        "CustomerID": rng.integers(0, rows // 10 + 1, rows),
+        "Qty": rng.integers(1, 20, rows),
+        "UnitPrice": price,
+    })
+
+def run_child(module: str, args: List[str], env: Optional[Dict[str, str]] = None) -> Dict:
+    """Run `python -m module --child ...` so each measurement gets a clean process (and RSS)."""
+    out = subprocess.run([sys.executable, "-m", module, "--child", *args],
+                         check=True, capture_output=True, text=True,
+                         cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         env={**os.environ, **(env or {})})
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    res = fn(*args, **kwargs)
+    return res, time.perf_counter() - t0
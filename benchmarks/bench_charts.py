@@ -0,0 +1,43 @@
+# benchmarks/bench_charts.py
+"""
+Sequential plot_chart vs the process-pool chart service, for 9 and 50 bar charts.
+
+    python -m benchmarks.bench_charts --groups 40
+"""
+import argparse
+import json
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from benchmarks._util import timed
+
+def _jobs(n: int, groups: int):
+    rng = np.random.default_rng(0)
+    jobs = []
+    for i in range(n):
+        pivot = pd.DataFrame({"City": [f"C{g}" for g in range(groups)], f"M{i}": rng.random(groups) * 1000})
+        jobs.append(("Bar Chart", pivot, "City", f"M{i}"))
+    return jobs
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--groups", type=int, default=20)
+    args = ap.parse_args()
+
+    from helpers.charts import render_chart
+    from helpers.chart_service import render_charts, shutdown_pool
+
+    render_charts(tempfile.mkdtemp(), _jobs(2, 2))  # start the workers outside the measurement
+    for n in (9, 50):
+        jobs = _jobs(n, args.groups)
+        with tempfile.TemporaryDirectory() as a, tempfile.TemporaryDirectory() as b:
+            _, seq = timed(lambda: [render_chart(a, *j) for j in jobs])
+            res, par = timed(render_charts, b, jobs)
+        print(json.dumps({"charts": n, "sequential_s": round(seq, 2), "pool_s": round(par, 2),
+                          "errors": sum(1 for r in res if r["error"])}))
+    shutdown_pool()
+
+if __name__ == "__main__":
+    main()
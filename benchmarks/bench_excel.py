@@ -0,0 +1,54 @@
+# benchmarks/bench_excel.py
+"""
+Export throughput and peak RSS: legacy df.to_excel vs the streaming writer, Parquet and CSV-zip.
+
+    python -m benchmarks.bench_excel --rows 200000
+"""
+import argparse
+import json
+import os
+import tempfile
+
+from benchmarks._util import peak_rss_mb, run_child, sales_frame, timed
+
+def _legacy(df, folder):
+    import pandas as pd
+    path = os.path.join(folder, "legacy.xlsx")
+    with pd.ExcelWriter(path, engine="xlsxwriter") as writer:
+        df.head(len(df)).to_excel(writer, sheet_name="DATA", index=False)
+    return path
+
+def _child(method: str, rows: str) -> None:
+    import helpers.excel_report as er
+    df = sales_frame(int(rows))
+    base = peak_rss_mb()
+    with tempfile.TemporaryDirectory() as tmp:
+        er.EXPORT_DIR = tmp
+        run = {
+            "legacy": lambda: _legacy(df, tmp),
+            "streaming": lambda: er.generate_excel_report(df, [], "bench", data_row_limit=None),
+            "parquet": lambda: er.export_parquet(df, "bench"),
+            "csv_zip": lambda: er.export_csv_zip(df, "bench"),
+        }[method]
+        path, secs = timed(run)
+        size = os.path.getsize(path)
+    print(json.dumps({
+        "method": method, "rows": len(df), "seconds": round(secs, 3),
+        "rows_per_s": int(len(df) / secs) if secs else None,
+        "peak_rss_mb": round(peak_rss_mb(), 1), "baseline_rss_mb": round(base, 1),
+        "file_mb": round(size / 2**20, 1),
+    }))
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=200_000)
+    ap.add_argument("--child", nargs=2, metavar=("METHOD", "ROWS"))
+    args = ap.parse_args()
+    if args.child:
+        return _child(*args.child)
+
+    for method in ("legacy", "streaming", "parquet", "csv_zip"):
+        print(json.dumps(run_child("benchmarks.bench_excel", [method, str(args.rows)])))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# benchmarks/bench_ingest.py
+"""
+Parse time and peak RSS: legacy pd.read_csv(BytesIO) vs helpers.ingest (Arrow, chunked).
+
+    python -m benchmarks.bench_ingest --rows 2000000
+"""
+import argparse
+import io
+import json
+import os
+import tempfile
+
+from benchmarks._util import peak_rss_mb, run_child, sales_frame, timed
+
+def _legacy(data: bytes):
+    import pandas as pd
+    return pd.read_csv(io.BytesIO(data))
+
+def _arrow(data: bytes):
+    from helpers.ingest import read_dataframe
+    return read_dataframe(data, "csv")
+
+def _child(method: str, path: str) -> None:
+    with open(path, "rb") as f:
+        data = f.read()
+    base = peak_rss_mb()
+    df, secs = timed(_legacy if method == "legacy" else _arrow, data)
+    print(json.dumps({
+        "method": method, "rows": len(df), "seconds": round(secs, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1), "baseline_rss_mb": round(base, 1),
+        "frame_mb": round(df.memory_usage(deep=True).sum() / 2**20, 1),
+    }))
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--child", nargs=2, metavar=("METHOD", "PATH"))
+    args = ap.parse_args()
+    if args.child:
+        return _child(*args.child)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sales.csv")
+        sales_frame(args.rows).to_csv(path, index=False)
+        print(f"file: {os.path.getsize(path) / 2**20:.1f} MB, rows: {args.rows:,}")
+        for method in ("legacy", "arrow"):
+            print(json.dumps(run_child("benchmarks.bench_ingest", [method, path])))
+
+if __name__ == "__main__":
+    main()
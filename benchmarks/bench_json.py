@@ -0,0 +1,98 @@
+# benchmarks/bench_json.py
+"""
+JSON ingestion throughput and peak RSS on event-log-like records (nested objects, lists), as NDJSON and
+as one array: legacy pd.read_json vs the streaming reader (helpers.ingest.read_dataframe) vs streaming
+into the dataset cache (out of core, no frame built). One process per method.
+
+    python -m benchmarks.bench_json --mb 1024
+    python -m benchmarks.bench_json --mb 256 --layout ndjson --methods stream out_of_core
+"""
+import argparse
+import io
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from benchmarks._util import peak_rss_mb, run_child, timed
+
+LAYOUTS = ("ndjson", "array")
+METHODS = ("legacy", "stream", "out_of_core")
+CHUNK_RECORDS = 50_000
+
+def _records(n: int, rng: np.random.Generator):
+    events = np.array(["view", "click", "add_to_cart", "purchase", "refund"])
+    cities = np.array(["Hanoi", "Ho Chi Minh", "Da Nang", "Hai Phong", "Can Tho", "Hue"])
+    ts = 1_704_067_200 + rng.integers(0, 365 * 86400, n)
+    for i, (ev, city, t, uid, amount, qty) in enumerate(zip(
+            rng.choice(events, n), rng.choice(cities, n), ts, rng.integers(0, 100_000, n),
+            rng.gamma(2.0, 50.0, n).round(2), rng.integers(1, 20, n))):
+        yield {"event": ev, "ts": int(t), "user": {"id": int(uid), "geo": {"city": city, "country": "VN"}},
+               "order": {"amount": float(amount), "qty": int(qty)}, "tags": ["promo"] if i % 7 == 0 else [],
+               "note": None if i % 3 else f"note {i}"}
+
+def write_events(path: str, target_mb: float, layout: str, seed: int = 0) -> int:
+    """Write records until the file reaches `target_mb`; returns the record count."""
+    rng = np.random.default_rng(seed)
+    target, count = target_mb * 2**20, 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[\n" if layout == "array" else "")
+        while f.tell() < target:
+            lines = [json.dumps(r, separators=(",", ":")) for r in _records(CHUNK_RECORDS, rng)]
+            if layout == "array":
+                f.write((",\n" if count else "") + ",\n".join(lines))
+            else:
+                f.write("\n".join(lines) + "\n")
+            count += len(lines)
+        f.write("\n]\n" if layout == "array" else "")
+    return count
+
+def _child(method: str, layout: str, path: str) -> None:
+    import pandas as pd
+    from helpers.dataset_store import DatasetStore
+    from helpers.ingest import read_dataframe
+    from helpers.out_of_core import load_chunked
+
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        data = f.read()
+    base = peak_rss_mb()
+    if method == "legacy":
+        df, secs = timed(pd.read_json, io.BytesIO(data), lines=layout == "ndjson")
+    elif method == "stream":
+        df, secs = timed(read_dataframe, data, "json")
+    else:
+        store = DatasetStore(os.path.join(os.path.dirname(path), "cache"), max_bytes=1 << 40)
+        df, secs = timed(load_chunked, store, os.path.basename(path), data, "json")
+    print(json.dumps({
+        "method": method, "layout": layout, "rows": len(df), "columns": len(df.columns),
+        "seconds": round(secs, 3), "mb_per_s": round(size / 2**20 / secs, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1), "baseline_rss_mb": round(base, 1),
+    }))
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--mb", type=float, default=1024, help="input size per layout")
+    ap.add_argument("--layout", choices=LAYOUTS, nargs="+", default=list(LAYOUTS))
+    ap.add_argument("--methods", choices=METHODS, nargs="+", default=list(METHODS))
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--child", nargs=3, metavar=("METHOD", "LAYOUT", "PATH"))
+    args = ap.parse_args()
+    if args.child:
+        return _child(*args.child)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for layout in args.layout:
+            path = os.path.join(tmp, f"events.{layout}.json")
+            rows = write_events(path, args.mb, layout, args.seed)
+            print(f"{layout}: {os.path.getsize(path) / 2**20:.0f} MB, {rows:,} records, {os.cpu_count()} CPUs")
+            for method in args.methods:
+                try:
+                    print(json.dumps(run_child("benchmarks.bench_json", [method, layout, path])))
+                except Exception as e:  # e.g. the legacy reader running out of memory
+                    print(json.dumps({"method": method, "layout": layout, "error": f"{type(e).__name__}: {e}"}))
+            os.remove(path)
+
+if __name__ == "__main__":
+    main()
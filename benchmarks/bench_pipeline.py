@@ -0,0 +1,142 @@
+# benchmarks/bench_pipeline.py
+"""
+End-to-end pipeline per dataset size: read -> clean -> catalog -> aggregate -> chart ->
+AI auto analysis (offline fake model) -> Excel export. Wall time, CPU time and peak RSS per stage.
+
+    python -m benchmarks.bench_pipeline --rows 10000 100000 1000000 --format csv --out bench.json
+    python -m benchmarks.bench_pipeline --rows 10000 100000 --baseline bench.json --tolerance 0.25
+
+Each (rows, format) runs in a fresh process. With --baseline, stages slower (or bigger) than
+baseline * (1 + tolerance) are listed and the exit status is 1.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from benchmarks._util import StageRecorder, run_child
+from benchmarks.datagen import FORMATS, XLSX_MAX_ROWS, write_dataset
+
+MIN_DELTA_S = 0.05     # ignore wall-time differences below this (timer noise on tiny stages)
+MIN_DELTA_MB = 16.0    # ... and peak RSS differences below this
+
+def _child(fmt: str, path: str) -> None:
+    from helpers import excel_report
+    from helpers.ai_insight import ai_auto_analysis
+    from helpers.aggregation import engine_for
+    from helpers.catalog import catalog_for
+    from helpers.chart_service import shutdown_pool
+    from helpers.charts import plot_chart
+    from helpers.data_processing import auto_clean_with_report
+    from helpers.ingest import read_dataframe
+
+    with open(path, "rb") as f:
+        data = f.read()
+    folder = os.path.dirname(path)
+    excel_report.EXPORT_DIR = folder
+    rec = StageRecorder()
+
+    with rec.stage("read"):
+        raw = read_dataframe(data, fmt)
+    del data
+    with rec.stage("clean"):
+        df, _ = auto_clean_with_report(raw)
+    del raw
+    with rec.stage("catalog"):
+        catalog_for(df)
+    with rec.stage("aggregate_cold"):
+        pivot = engine_for(df).pivot("City", "Revenue", "sum")
+    with rec.stage("aggregate_warm"):
+        engine = engine_for(df)
+        for metric in ("Revenue", "Qty", "UnitPrice"):
+            engine.pivot("City", metric, "mean")
+    with rec.stage("chart"):
+        plot_chart(folder, "Bar Chart", pivot, "City", "Revenue")
+    with rec.stage("ai_auto"):
+        reports = ai_auto_analysis(df, "en", use_cache=False)
+    with rec.stage("excel"):
+        excel_report.generate_excel_report(df, reports, "bench")
+    shutdown_pool()
+
+    print(json.dumps({"rows_clean": int(len(df)), "stages": rec.stages,
+                      "total_wall_s": round(sum(s["wall_s"] for s in rec.stages.values()), 3)}))
+
+def _run(rows: int, fmt: str, seed: int, llm_latency: float) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_dataset(os.path.join(tmp, f"sales.{fmt}"), rows, fmt, seed=seed)
+        size = os.path.getsize(path)
+        env = {"LLM_BACKEND": "fake", "LLM_FAKE_LATENCY": str(llm_latency), "LLM_CACHE": "off",
+               "CHART_DIR": tmp, "CACHE_DIR": os.path.join(tmp, "cache")}
+        res = run_child("benchmarks.bench_pipeline", [fmt, path], env=env)
+    return {"rows": rows, "format": fmt, "file_mb": round(size / 2**20, 2), **res}
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[Dict[str, Any]]:
+    """Stages whose wall time or peak RSS grew beyond baseline * (1 + tolerance)."""
+    base = {(r["rows"], r["format"]): r for r in baseline.get("runs", [])}
+    regressions = []
+    for run in results["runs"]:
+        ref = base.get((run["rows"], run["format"]))
+        if ref is None:
+            continue
+        for name, cur in run["stages"].items():
+            old = ref["stages"].get(name)
+            if old is None:
+                continue
+            for key, floor in (("wall_s", MIN_DELTA_S), ("peak_rss_mb", MIN_DELTA_MB)):
+                if cur[key] > old[key] * (1 + tolerance) and cur[key] - old[key] > floor:
+                    regressions.append({"rows": run["rows"], "format": run["format"], "stage": name,
+                                        "metric": key, "baseline": old[key], "current": cur[key],
+                                        "ratio": round(cur[key] / old[key], 2) if old[key] else None})
+    return regressions
+
+def _print_table(results: Dict[str, Any]) -> None:
+    for run in results["runs"]:
+        print(f"\n{run['format']} {run['rows']:,} rows ({run['file_mb']} MB)")
+        print(f"  {'stage':<16}{'wall s':>10}{'cpu s':>10}{'peak MB':>10}")
+        for name, s in run["stages"].items():
+            print(f"  {name:<16}{s['wall_s']:>10.3f}{s['cpu_s']:>10.3f}{s['peak_rss_mb']:>10.1f}")
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    ap.add_argument("--format", choices=FORMATS, nargs="+", default=["csv"])
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--llm-latency", type=float, default=0.2, help="seconds per fake Gemini call")
+    ap.add_argument("--out", help="write results JSON here (use it later as --baseline)")
+    ap.add_argument("--baseline", help="results JSON to compare against")
+    ap.add_argument("--tolerance", type=float, default=0.25)
+    ap.add_argument("--child", nargs=2, metavar=("FORMAT", "PATH"))
+    args = ap.parse_args()
+    if args.child:
+        return _child(*args.child)
+
+    results = {
+        "meta": {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": sys.version.split()[0],
+                 "platform": platform.platform(), "cpus": os.cpu_count(), "seed": args.seed,
+                 "llm_latency": args.llm_latency},
+        "runs": [],
+    }
+    for fmt in args.format:
+        for rows in args.rows:
+            if fmt == "xlsx" and rows > XLSX_MAX_ROWS:
+                print(f"skip xlsx {rows:,} rows (one sheet holds {XLSX_MAX_ROWS:,})", file=sys.stderr)
+                continue
+            results["runs"].append(_run(rows, fmt, args.seed, args.llm_latency))
+    _print_table(results)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        print(json.dumps({"regressions": regressions}, indent=2))
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# benchmarks/bench_progressive.py
+"""
+Time to first chart of a manual chart on a large frame: exact cold pivot + render vs the progressive
+path (row-sample estimate + render), plus how long the exact refinement takes and how good the
+estimate was (relative error, share of exact values inside the confidence interval, groups missing
+from the sample).
+
+    python -m benchmarks.bench_progressive --rows 1000000 5000000 --sample-rows 100000 --out progressive.json
+    python -m benchmarks.bench_progressive --rows 5000000 --out-of-core
+
+In memory the exact pivot of a categorical column is fast and rendering dominates; the estimate pays
+off on object keys and on out-of-core frames, where the exact pivot is a pass over the file.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks._util import sales_frame, timed
+
+CASES = [("City", "UnitPrice", "sum"), ("City", "Qty", "mean"), ("Product", "UnitPrice", "sum"),
+         ("Product", "Qty", "count")]
+
+def _fresh_frames(rows: int, seed: int, out_of_core: bool, folder: str):
+    """Returns a factory of equal frames that share no cached group-by state (new frame objects)."""
+    from helpers.data_processing import auto_clean_with_report
+
+    if not out_of_core:
+        df, _ = auto_clean_with_report(sales_frame(rows, seed=seed))
+        return df.copy
+    from benchmarks.datagen import write_dataset
+    from helpers.dataset_store import DatasetStore
+    from helpers.out_of_core import clean_chunked, load_chunked, open_chunked
+
+    store = DatasetStore(os.path.join(folder, "cache"), max_bytes=1 << 40)
+    with open(write_dataset(os.path.join(folder, "sales.csv"), rows, "csv", seed=seed), "rb") as f:
+        clean_chunked(store, "bench", load_chunked(store, "bench", f.read(), "csv"))
+    return lambda: open_chunked(store, "bench", "clean")
+
+def _run(rows: int, sample_rows: int, seed: int, out_of_core: bool) -> dict:
+    from helpers.aggregation import engine_for
+    from helpers.charts import render_chart
+    from helpers.progressive import CI_HIGH, CI_LOW, RowSample
+
+    cases = []
+    with tempfile.TemporaryDirectory() as folder:
+        fresh_frame = _fresh_frames(rows, seed, out_of_core, folder)
+        render_chart(folder, "Bar Chart", fresh_frame().head(5), "City", "Qty")  # import / font cache outside the measurement
+        for category, numeric, agg in CASES:
+            cold = fresh_frame()
+            t0 = time.perf_counter()
+            pivot, refine_s = timed(engine_for(cold).pivot, category, numeric, agg)
+            render_chart(folder, "Bar Chart", pivot, category, numeric)
+            exact_s = time.perf_counter() - t0
+
+            fresh = fresh_frame()
+            t0 = time.perf_counter()
+            estimate = RowSample(fresh, sample_rows).estimate(category, numeric, agg)
+            render_chart(folder, "Bar Chart", estimate[[category, numeric]], category, numeric)
+            first_s = time.perf_counter() - t0
+
+            merged = pivot.merge(estimate, on=category, how="left", suffixes=("", "_est"))
+            exact, est = merged[numeric].to_numpy(float), merged[f"{numeric}_est"].to_numpy(float)
+            found = ~np.isnan(est)
+            inside = (exact >= merged[CI_LOW].to_numpy(float)) & (exact <= merged[CI_HIGH].to_numpy(float))
+            cases.append({"category": category, "numeric": numeric, "agg": agg, "groups": len(pivot),
+                          "exact_first_chart_s": round(exact_s, 3), "progressive_first_chart_s": round(first_s, 3),
+                          "exact_refine_s": round(refine_s, 3),
+                          "speedup": round(exact_s / first_s, 1) if first_s else None,
+                          "max_rel_error": round(float(np.max(np.abs(est[found] - exact[found]) / np.abs(exact[found]))), 4),
+                          "ci_coverage": round(float(inside[found].mean()), 3),
+                          "missing_groups": int((~found).sum())})
+    return {"rows": rows, "sample_rows": sample_rows, "out_of_core": out_of_core, "cpus": os.cpu_count(),
+            "cases": cases}
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[1_000_000])
+    ap.add_argument("--sample-rows", type=int, default=100_000)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out-of-core", action="store_true", help="memory-mapped ChunkedFrame instead of a DataFrame")
+    ap.add_argument("--out", help="write results JSON here")
+    args = ap.parse_args()
+
+    results = [_run(rows, args.sample_rows, args.seed, args.out_of_core) for rows in args.rows]
+    for res in results:
+        for case in res["cases"]:
+            print(json.dumps({"rows": res["rows"], "out_of_core": res["out_of_core"], **case}))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# benchmarks/bench_startup.py
+"""
+Cold start of the Streamlit worker: import cost of app.py's imports (`python -X importtime`)
+and the first / second script run of app.py in a fresh process (AppTest, no data loaded).
+
+    python -m benchmarks.bench_startup --repeat 3 --out startup.json
+    python -m benchmarks.bench_startup --baseline startup.json --tolerance 0.25
+
+Heavy optional subsystems (Gemini client, PIL, matplotlib / seaborn, xlsxwriter) should stay
+unloaded until first use; `loaded_after_first_run` lists the ones a plain page view pulled in.
+"""
+import argparse
+import ast
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from benchmarks._util import run_child
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("google.generativeai", "PIL.Image", "matplotlib.pyplot", "seaborn", "xlsxwriter", "dotenv")
+MIN_DELTA_S = 0.05
+
+def app_imports(path: str = os.path.join(ROOT, "app.py")) -> str:
+    """The top-level import statements of app.py as one source snippet."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    return "\n".join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Rows of `-X importtime` output: {"module", "self_ms", "cumulative_ms", "depth"}."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|")
+        rows.append({"module": name.strip(), "self_ms": int(self_us) / 1000, "cumulative_ms": int(cum_us) / 1000,
+                     "depth": (len(name) - len(name.lstrip()) - 1) // 2})
+    return rows
+
+def _importtime(env: Dict[str, str], top: int) -> Dict[str, Any]:
+    code = app_imports()
+    t0 = time.perf_counter()
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, check=True,
+                         capture_output=True, text=True, env={**os.environ, **env})
+    wall = time.perf_counter() - t0
+    rows = parse_importtime(out.stderr)
+    roots = [r for r in rows if r["depth"] == 0]
+    return {"wall_s": round(wall, 3),
+            "import_ms": round(sum(r["cumulative_ms"] for r in roots), 1),
+            "modules": len(rows),
+            "top": [[r["module"], round(r["cumulative_ms"], 1)]
+                    for r in sorted(roots, key=lambda r: -r["cumulative_ms"])[:top]]}
+
+def _child() -> None:
+    t0 = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    t1 = time.perf_counter()
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=120)
+    at.run()
+    t2 = time.perf_counter()
+    at.run()
+    t3 = time.perf_counter()
+    print(json.dumps({
+        "streamlit_import_s": round(t1 - t0, 3), "first_run_s": round(t2 - t1, 3), "rerun_s": round(t3 - t2, 3),
+        "exceptions": [str(e.value)[:200] for e in at.exception],
+        "loaded_after_first_run": [m for m in HEAVY_MODULES if m in sys.modules],
+    }))
+
+def _median_runs(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    out = dict(runs[-1])
+    for key, val in runs[-1].items():
+        if isinstance(val, (int, float)):
+            out[key] = round(statistics.median(r[key] for r in runs), 3)
+    return out
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[Dict[str, Any]]:
+    """Timings that grew beyond baseline * (1 + tolerance)."""
+    regressions = []
+    for section, keys in (("importtime", ("import_ms",)), ("app", ("first_run_s", "rerun_s"))):
+        for key in keys:
+            old, cur = baseline.get(section, {}).get(key), results[section][key]
+            if old is None:
+                continue
+            floor = MIN_DELTA_S * (1000 if key.endswith("_ms") else 1)
+            if cur > old * (1 + tolerance) and cur - old > floor:
+                regressions.append({"metric": f"{section}.{key}", "baseline": old, "current": cur,
+                                    "ratio": round(cur / old, 2) if old else None})
+    return regressions
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--top", type=int, default=12, help="heaviest top-level imports to list")
+    ap.add_argument("--out")
+    ap.add_argument("--baseline")
+    ap.add_argument("--tolerance", type=float, default=0.25)
+    ap.add_argument("--child", action="store_true")
+    args = ap.parse_args()
+    if args.child:
+        return _child()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {"CHART_DIR": os.path.join(tmp, "charts"), "CACHE_DIR": os.path.join(tmp, "cache"),
+               "LLM_CACHE_DIR": os.path.join(tmp, "llm"), "TRACE_LOG": os.path.join(tmp, "trace.jsonl")}
+        imports = [_importtime(env, args.top) for _ in range(args.repeat)]
+        apps = [run_child("benchmarks.bench_startup", [], env=env) for _ in range(args.repeat)]
+    results = {
+        "meta": {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": sys.version.split()[0],
+                 "platform": platform.platform(), "repeat": args.repeat},
+        "importtime": _median_runs(imports),
+        "app": _median_runs(apps),
+    }
+
+    imp, app = results["importtime"], results["app"]
+    print(f"app.py imports: {imp['import_ms']:.0f} ms ({imp['modules']} modules, process {imp['wall_s']:.2f} s)")
+    for name, ms in imp["top"]:
+        print(f"  {name:<32}{ms:>10.1f} ms")
+    print(f"first script run: {app['first_run_s']:.2f} s, rerun: {app['rerun_s']:.2f} s")
+    print(f"loaded by a plain page view: {', '.join(app['loaded_after_first_run']) or '-'}")
+    if app["exceptions"]:
+        print(f"app exceptions: {app['exceptions']}", file=sys.stderr)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        print(json.dumps({"regressions": regressions}, indent=2))
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# benchmarks/bench_workbook.py
+"""
+Multi-sheet workbook ingestion: legacy pd.read_excel (first sheet only, then every sheet) vs
+helpers.excel_ingest on all sheets, in-process and with worker processes, and a reload from
+the dataset cache. Parse time and peak RSS, one process per method.
+
+    python -m benchmarks.bench_workbook --sheets 20 --rows 50000 --workers 4
+"""
+import argparse
+import io
+import json
+import os
+import tempfile
+
+from benchmarks._util import peak_rss_mb, run_child, timed
+from benchmarks.datagen import iter_sales
+
+METHODS = ("legacy_first", "legacy_all", "sequential", "parallel", "cached")
+
+def _write_workbook(path: str, sheets: int, rows: int) -> None:
+    import pandas as pd
+    with pd.ExcelWriter(path, engine="xlsxwriter", engine_kwargs={"options": {"constant_memory": True}}) as w:
+        for i in range(sheets):
+            df = pd.concat(iter_sales(rows, seed=i), ignore_index=True)
+            df.to_excel(w, sheet_name=f"Sheet {i + 1}", index=False)
+
+def _child(method: str, path: str, workers: int) -> None:
+    import pandas as pd
+    from helpers.dataset_store import DatasetStore
+    from helpers.excel_ingest import excel_engine, list_sheets, read_sheets, shutdown_pool
+
+    with open(path, "rb") as f:
+        data = f.read()
+    store = DatasetStore(os.path.join(os.path.dirname(path), "cache"), max_bytes=1 << 40)
+    names = [s["name"] for s in list_sheets(data)]
+    base = peak_rss_mb()
+    if method == "legacy_first":
+        frames, secs = timed(lambda: {"first": pd.read_excel(io.BytesIO(data))})
+    elif method == "legacy_all":
+        frames, secs = timed(pd.read_excel, io.BytesIO(data), sheet_name=None)
+    else:
+        kwargs = {"store": store, "key": "bench"} if method in ("parallel", "cached") else {}
+        frames, secs = timed(read_sheets, data, names, workers=1 if method == "sequential" else workers, **kwargs)
+    shutdown_pool()
+    print(json.dumps({
+        "method": method, "engine": excel_engine(), "sheets": len(frames),
+        "rows": sum(len(df) for df in frames.values()), "seconds": round(secs, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1), "baseline_rss_mb": round(base, 1),
+    }))
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sheets", type=int, default=20)
+    ap.add_argument("--rows", type=int, default=20_000, help="rows per sheet")
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--child", nargs=3, metavar=("METHOD", "PATH", "WORKERS"))
+    args = ap.parse_args()
+    if args.child:
+        return _child(args.child[0], args.child[1], int(args.child[2]))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "book.xlsx")
+        _write_workbook(path, args.sheets, args.rows)
+        print(f"file: {os.path.getsize(path) / 2**20:.1f} MB, {args.sheets} sheets x {args.rows:,} rows, "
+              f"{os.cpu_count()} CPUs")
+        for method in METHODS:  # "parallel" fills the cache that "cached" reads
+            print(json.dumps(run_child("benchmarks.bench_workbook", [method, path, str(args.workers)],
+                                       env={"EXCEL_WORKERS": str(args.workers)})))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# benchmarks/datagen.py
+"""
+Seeded sales-like datasets for benchmarks (same arguments -> same bytes).
+
+    python -m benchmarks.datagen --rows 1000000 --format csv --out /tmp/sales.csv
+    python -m benchmarks.datagen --rows 100000 --format xlsx --products 5000 --null-rate 0.02
+
+Columns: OrderID, OrderDate, City, Region, Category, Product, CustomerID, Channel,
+PaymentMethod, Qty, UnitPrice, Discount, Revenue. Popularity of products / customers is Zipf-like,
+`null_rate` blanks a share of the nullable columns and `dup_rate` repeats earlier rows verbatim.
+"""
+import argparse
+import os
+from typing import Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+FORMATS = ("csv", "xlsx", "json")
+CHUNK_ROWS = 500_000
+XLSX_MAX_ROWS = 1_048_575  # Excel sheet limit minus the header
+
+_CITIES = ("Hanoi", "Ho Chi Minh", "Da Nang", "Hai Phong", "Can Tho", "Hue", "Nha Trang", "Vung Tau",
+           "Bien Hoa", "Buon Ma Thuot", "Quy Nhon", "Vinh", "Thai Nguyen", "Nam Dinh", "Ha Long")
+_REGIONS = ("North", "South", "Central")
+_CATEGORIES = ("Electronics", "Furniture", "Office Supplies", "Clothing", "Grocery", "Beauty", "Toys", "Sports")
+_CHANNELS = ("Online", "Store", "Marketplace", "Phone")
+_PAYMENTS = ("Cash", "Card", "Bank Transfer", "E-wallet", "COD")
+_NULLABLE = ("City", "Category", "CustomerID", "Channel", "UnitPrice", "Discount")
+
+def _zipf_choice(rng: np.random.Generator, n: int, size: int, a: float = 1.1) -> np.ndarray:
+    """Indices in [0, n) with a long-tailed popularity (rank-based Zipf weights)."""
+    w = 1.0 / np.arange(1, n + 1) ** a
+    return rng.choice(n, size=size, p=w / w.sum())
+
+def _labels(names, n: int, prefix: str) -> np.ndarray:
+    names = list(names)[:n]
+    return np.array(names + [f"{prefix} {i}" for i in range(len(names), n)], dtype=object)
+
+def iter_sales(rows: int, seed: int = 0, cities: int = 15, products: int = 2_000, customers: int = 100_000,
+               null_rate: float = 0.01, dup_rate: float = 0.005,
+               chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Yield the dataset in chunks of `chunk_rows` (each chunk seeded from (seed, chunk index))."""
+    city_names = _labels(_CITIES, cities, "City")
+    city_region = np.array([_REGIONS[i % len(_REGIONS)] for i in range(cities)], dtype=object)
+    product_names = np.array([f"P{i:05d}" for i in range(products)], dtype=object)
+    product_cat = np.random.default_rng(seed).integers(0, len(_CATEGORIES), products)
+    product_price = np.random.default_rng(seed + 1).gamma(2.0, 40.0, products).round(2) + 1.0
+    hours = 730 * 24
+    date_labels = (pd.Timestamp("2023-01-01") + pd.to_timedelta(np.arange(hours), unit="h")).strftime("%Y-%m-%d %H:%M")
+    date_labels = np.asarray(date_labels, dtype=object)
+
+    for part, start in enumerate(range(0, rows, chunk_rows)):
+        n = min(chunk_rows, rows - start)
+        rng = np.random.default_rng([seed, part])
+        city = _zipf_choice(rng, cities, n, 0.8)
+        prod = _zipf_choice(rng, products, n)
+        qty = rng.integers(1, 20, n)
+        price = product_price[prod] * rng.uniform(0.9, 1.1, n).round(2)
+        discount = rng.choice([0.0, 0.0, 0.0, 0.05, 0.1, 0.2], n)
+        df = pd.DataFrame({
+            "OrderID": np.arange(start, start + n, dtype=np.int64) + 100_000,
+            "OrderDate": date_labels[rng.integers(0, hours, n)],
+            "City": city_names[city],
+            "Region": city_region[city],
+            "Category": np.array(_CATEGORIES, dtype=object)[product_cat[prod]],
+            "Product": product_names[prod],
+            "CustomerID": (_zipf_choice(rng, customers, n, 0.6) + 1).astype("float64"),
+            "Channel": np.array(_CHANNELS, dtype=object)[rng.integers(0, len(_CHANNELS), n)],
+            "PaymentMethod": np.array(_PAYMENTS, dtype=object)[rng.integers(0, len(_PAYMENTS), n)],
+            "Qty": qty,
+            "UnitPrice": price.round(2),
+            "Discount": discount,
+            "Revenue": (qty * price * (1 - discount)).round(2),
+        })
+        if null_rate > 0:
+            for col in _NULLABLE:
+                mask = rng.random(n) < null_rate
+                df.loc[mask, col] = np.nan if df[col].dtype.kind == "f" else None
+        if dup_rate > 0 and n > 1:
+            dst = np.flatnonzero(rng.random(n) < dup_rate)
+            dst = dst[dst > 0]
+            src = (rng.random(len(dst)) * dst).astype(np.intp)  # some earlier row of the chunk
+            rows_idx = np.arange(n)
+            rows_idx[dst] = src
+            df = df.take(rows_idx).reset_index(drop=True)
+        yield df
+
+def sales_dataset(rows: int, seed: int = 0, **kwargs) -> pd.DataFrame:
+    """The whole dataset in memory (see iter_sales for the knobs)."""
+    return pd.concat(iter_sales(rows, seed, **kwargs), ignore_index=True)
+
+def write_dataset(path: str, rows: int, fmt: Optional[str] = None, seed: int = 0, **kwargs) -> str:
+    """
+    Write the dataset to `path` chunk by chunk: CSV, XLSX (capped at one sheet) or JSON
+    (NDJSON, one record per line). Returns the path.
+    """
+    fmt = (fmt or os.path.splitext(path)[1].lstrip(".")).lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format: {fmt}")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if fmt == "xlsx":
+        if rows > XLSX_MAX_ROWS:
+            raise ValueError(f"xlsx holds at most {XLSX_MAX_ROWS:,} rows per sheet")
+        df = sales_dataset(rows, seed, **kwargs)
+        df.to_excel(path, index=False, engine="xlsxwriter",
+                    engine_kwargs={"options": {"constant_memory": True}})
+        return path
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        for i, chunk in enumerate(iter_sales(rows, seed, **kwargs)):
+            if fmt == "csv":
+                chunk.to_csv(f, index=False, header=i == 0)
+            else:
+                chunk.to_json(f, orient="records", lines=True, force_ascii=False)
+    return path
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=100_000)
+    ap.add_argument("--format", choices=FORMATS, default="csv")
+    ap.add_argument("--out")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--cities", type=int, default=15)
+    ap.add_argument("--products", type=int, default=2_000)
+    ap.add_argument("--customers", type=int, default=100_000)
+    ap.add_argument("--null-rate", type=float, default=0.01)
+    ap.add_argument("--dup-rate", type=float, default=0.005)
+    args = ap.parse_args()
+    out = args.out or f"sales_{args.rows}.{args.format}"
+    write_dataset(out, args.rows, args.format, seed=args.seed, cities=args.cities, products=args.products,
+                  customers=args.customers, null_rate=args.null_rate, dup_rate=args.dup_rate)
+    print(f"{out}: {os.path.getsize(out) / 2**20:.1f} MB, {args.rows:,} rows")
+
+if __name__ == "__main__":
+    main()
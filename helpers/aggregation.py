@@ -0,0 +1,211 @@
+# helpers/aggregation.py
+import threading
+import weakref
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .frame_cache import frame_cached
+from .tracing import note_cache, traced
+
+AGG_FUNCS = ("sum", "mean", "count", "min", "max")
+
+class GroupIndex:
+    """
+    One factorization of a category column:
+      codes   -> group id per row (-1 = dropped NaN)
+      uniques -> group keys, sorted like DataFrame.groupby
+      sizes   -> rows per group
+      order / starts -> rows sorted by group and the first row of each group (for min/max reduceat)
+    """
+
+    def __init__(self, keys: pd.Series, dropna: bool = True):
+        codes, uniques = pd.factorize(keys, sort=True, use_na_sentinel=dropna)
+        self.codes = np.asarray(codes, dtype=np.intp)
+        self.uniques = uniques
+        self.ngroups = len(uniques)
+        self.valid = None if dropna is False or not (self.codes < 0).any() else self.codes >= 0
+        kept = self.codes if self.valid is None else self.codes[self.valid]
+        self.sizes = np.bincount(kept, minlength=self.ngroups)
+        self._order = None
+
+    @property
+    def order(self) -> np.ndarray:
+        """Row positions sorted by group (computed lazily, only min/max need it)."""
+        if self._order is None:
+            dropped = 0 if self.valid is None else int((~self.valid).sum())
+            self._order = np.argsort(self.codes, kind="stable")[dropped:]
+        return self._order
+
+    @property
+    def starts(self) -> np.ndarray:
+        return np.concatenate(([0], np.cumsum(self.sizes)[:-1])).astype(np.intp)
+
+    def bincount(self, weights: np.ndarray) -> np.ndarray:
+        if self.valid is None:
+            return np.bincount(self.codes, weights=weights, minlength=self.ngroups)
+        return np.bincount(self.codes[self.valid], weights=weights[self.valid], minlength=self.ngroups)
+
+def _values(s: pd.Series) -> Tuple[np.ndarray, bool]:
+    """(values, is_exact_int). Nullable / Arrow numerics become float64 with NaN."""
+    if isinstance(s.dtype, np.dtype):
+        if s.dtype.kind in "iu":
+            return s.to_numpy(), True
+        if s.dtype.kind == "b":
+            return s.to_numpy().astype(np.int64), True
+        if s.dtype.kind == "f":
+            return s.to_numpy(), False
+    return s.to_numpy(dtype="float64", na_value=np.nan), False
+
+class AggregationEngine:
+    """
+    Per-dataset aggregation: each category column is factorized once and its
+    GroupIndex reused; sum/mean/count come from np.bincount on the cached codes,
+    min/max from np.*.reduceat over the group-sorted rows (all numeric columns at once).
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        # weak: engines live in frame_cache, which must not keep the frame alive
+        self._df = weakref.ref(df)
+        self._indexes: Dict[Tuple[str, bool], GroupIndex] = {}
+        self._results: Dict[Tuple, pd.DataFrame] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def df(self) -> pd.DataFrame:
+        df = self._df()
+        if df is None:
+            raise ReferenceError("DataFrame of this AggregationEngine was released.")
+        return df
+
+    def group_index(self, category: str, dropna: bool = True) -> GroupIndex:
+        key = (category, dropna)
+        with self._lock:
+            gi = self._indexes.get(key)
+        if gi is None:
+            gi = GroupIndex(self.df[category], dropna=dropna)
+            with self._lock:
+                self._indexes.setdefault(key, gi)
+        return gi
+
+    def _reduce(self, gi: GroupIndex, cols: Sequence[str], aggs: Iterable[str]) -> Dict[Tuple[str, str], np.ndarray]:
+        out: Dict[Tuple[str, str], np.ndarray] = {}
+        if not cols:
+            return out
+        aggs = list(aggs)
+        ints, floats = [], []
+        for c in cols:
+            vals, exact = _values(self.df[c])
+            (ints if exact else floats).append((c, vals))
+
+        need_sort = bool({"min", "max"} & set(aggs))
+        starts = gi.starts if need_sort else None
+
+        if ints:
+            mat = np.column_stack([v.astype(np.int64, copy=False) for _, v in ints])
+            srt = mat[gi.order] if need_sort else None
+            mins = np.minimum.reduceat(srt, starts, axis=0) if "min" in aggs else None
+            maxs = np.maximum.reduceat(srt, starts, axis=0) if "max" in aggs else None
+            for j, (c, v) in enumerate(ints):
+                col = mat[:, j]
+                dtype = self.df[c].dtype
+                if {"sum", "mean"} & set(aggs):
+                    # float64 bincount is exact while |total| < 2**53; otherwise sum in int64
+                    if len(col) and np.abs(col).max() * float(len(col)) < 2.0 ** 53:
+                        total = np.rint(gi.bincount(col.astype(np.float64))).astype(np.int64)
+                    else:
+                        total = np.add.reduceat(col[gi.order], gi.starts)
+                for a in aggs:
+                    if a == "sum": out[(c, a)] = total
+                    elif a == "mean": out[(c, a)] = total / gi.sizes
+                    elif a == "count": out[(c, a)] = gi.sizes.astype(np.int64)
+                    elif a == "min": out[(c, a)] = mins[:, j].astype(dtype, copy=False)
+                    elif a == "max": out[(c, a)] = maxs[:, j].astype(dtype, copy=False)
+
+        if floats:
+            mat = np.column_stack([v.astype(np.float64, copy=False) for _, v in floats])
+            srt = mat[gi.order] if need_sort else None
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mins = np.fmin.reduceat(srt, starts, axis=0) if "min" in aggs else None
+                maxs = np.fmax.reduceat(srt, starts, axis=0) if "max" in aggs else None
+                for j, (c, _) in enumerate(floats):
+                    col = mat[:, j]
+                    nan = np.isnan(col)
+                    has_nan = nan.any()
+                    if {"count", "mean"} & set(aggs):
+                        counts = (gi.sizes - gi.bincount(nan.astype(np.float64)).astype(np.int64)) if has_nan \
+                                 else gi.sizes.astype(np.int64)
+                    if {"sum", "mean"} & set(aggs):
+                        sums = gi.bincount(np.where(nan, 0.0, col) if has_nan else col)
+                    for a in aggs:
+                        if a == "sum": out[(c, a)] = sums
+                        elif a == "mean": out[(c, a)] = sums / counts
+                        elif a == "count": out[(c, a)] = counts
+                        elif a == "min": out[(c, a)] = mins[:, j]
+                        elif a == "max": out[(c, a)] = maxs[:, j]
+        return out
+
+    def aggregate(self, category: str, numeric_cols: Sequence[str], aggs: Sequence[str] = ("sum",),
+                  dropna: bool = True) -> pd.DataFrame:
+        """
+        Wide result: one row per group, column `<numeric>` for a single agg,
+        `<numeric>_<agg>` when several aggs are requested.
+        """
+        bad = [a for a in aggs if a not in AGG_FUNCS]
+        if bad:
+            raise ValueError(f"Unsupported aggregation: {bad}")
+        gi = self.group_index(category, dropna)
+        data = {category: gi.uniques}
+        if gi.ngroups:
+            res = self._reduce(gi, list(numeric_cols), aggs)
+            for c in numeric_cols:
+                for a in aggs:
+                    data[c if len(aggs) == 1 else f"{c}_{a}"] = res[(c, a)]
+        else:
+            for c in numeric_cols:
+                for a in aggs:
+                    data[c if len(aggs) == 1 else f"{c}_{a}"] = np.empty(0)
+        return pd.DataFrame(data)
+
+    def cached(self, category: str, numeric: str, agg: str = "sum", dropna: bool = True) -> bool:
+        """True when pivot() is served without factorizing `category` (result or group index cached)."""
+        with self._lock:
+            return (category, numeric, agg, dropna) in self._results or (category, dropna) in self._indexes
+
+    @traced("aggregate.pivot")
+    def pivot(self, category: str, numeric: str, agg: str = "sum", dropna: bool = True) -> pd.DataFrame:
+        """Two-column [category, numeric] frame, same shape as groupby(...)[numeric].agg().reset_index()."""
+        key = (category, numeric, agg, dropna)
+        with self._lock:
+            hit = self._results.get(key)
+        note_cache(hit is not None)
+        if hit is None:
+            hit = self.aggregate(category, [numeric], [agg], dropna)
+            with self._lock:
+                self._results[key] = hit
+        return hit.copy()
+
+    @traced("aggregate.pivots")
+    def pivots(self, category: str, numeric_cols: Sequence[str], agg: str = "sum",
+               dropna: bool = True) -> List[pd.DataFrame]:
+        """Many metrics against one category: one factorization, one reduceat pass."""
+        wide = self.aggregate(category, numeric_cols, [agg], dropna)
+        out = []
+        for c in numeric_cols:
+            p = wide[[category, c]].copy()
+            with self._lock:
+                self._results.setdefault((category, c, agg, dropna), p)
+            out.append(p.copy())
+        return out
+
+    def size(self, category: str, dropna: bool = True) -> pd.DataFrame:
+        """Row count per group as [category, 'count']."""
+        gi = self.group_index(category, dropna)
+        return pd.DataFrame({category: gi.uniques, "count": gi.sizes.astype(np.int64)})
+
+def engine_for(df: pd.DataFrame) -> AggregationEngine:
+    """The shared AggregationEngine of this DataFrame object (out-of-core frames bring their own)."""
+    if not isinstance(df, pd.DataFrame):
+        return df.engine()  # helpers.out_of_core.ChunkedFrame
+    return frame_cached(df, "aggregation", AggregationEngine)
@@ -1,57 +1,311 @@
 # helpers/ai_insight.py
 import os
-import re
 import json
+import time
+import random
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from functools import lru_cache
-from typing import Optional, Dict, Any
+from types import SimpleNamespace
+from typing import Optional, Dict, Any, List, Sequence, Callable
 
 import pandas as pd
-from PIL import Image
-import google.generativeai as genai
-from .paths import get_chart_dir
+from .paths import get_chart_dir, get_setting, get_llm_cache_dir
+from .llm_cache import ResponseCache
+from .tracing import note_cache, span, traced
 
-from dotenv import load_dotenv
-from .charts import plot_chart
+from .chart_service import render_charts
+from .charts import add_chart_ref
+from .aggregation import engine_for
+from .catalog import catalog_for
+from .query_engine import plan_question, execute_plan, describe_plan, metric_name, to_markdown
 
 # ===== Setup =====
-load_dotenv()
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+@lru_cache(maxsize=1)
+def _genai():
+    """google.generativeai, imported and configured (GEMINI_API_KEY) on the first Gemini model built."""
+    with span("load.genai"):
+        import google.generativeai as genai
+        genai.configure(api_key=get_setting("GEMINI_API_KEY"))
+    return genai
 
 # ===== Model helpers =====
-@lru_cache(maxsize=2)
-def _build_model(lang: str):
-    """
-    Build a Gemini model with a simple language lock (EN/VI).
-    """
+MODEL_NAME = "gemini-2.0-flash"
+TEMPERATURE = 0.4
+
+def _gemini_backend(lang: str):
+    """Gemini model with a simple language lock (EN/VI)."""
     sys = "Always respond in English only." if lang == "en" else "Luôn trả lời hoàn toàn bằng tiếng Việt."
-    return genai.GenerativeModel(
-        "gemini-2.0-flash",
+    return _genai().GenerativeModel(
+        MODEL_NAME,
         system_instruction=sys,
-        generation_config={"temperature": 0.4}
+        generation_config={"temperature": TEMPERATURE}
     )
 
+def _fake_backend(lang: str):
+    """Offline FakeModel (LLM_FAKE_LATENCY seconds per call)."""
+    return FakeModel(latency=float(get_setting("LLM_FAKE_LATENCY", 0.05)))
+
+# LLM_BACKEND name -> factory(lang); a model only needs generate_content(parts, request_options=None) -> .text
+LLM_BACKENDS: Dict[str, Callable[[str], Any]] = {"gemini": _gemini_backend, "fake": _fake_backend}
+
+def register_backend(name: str, factory: Callable[[str], Any]) -> None:
+    """Add / replace an LLM backend (select it with LLM_BACKEND=<name>)."""
+    LLM_BACKENDS[name.lower()] = factory
+    _model_for.cache_clear()
+
+def _backend_name() -> str:
+    return str(get_setting("LLM_BACKEND", "gemini")).lower()
+
+def _model_id() -> str:
+    """Model identity for response-cache keys (a fake backend never answers for Gemini)."""
+    backend = _backend_name()
+    return MODEL_NAME if backend == "gemini" else f"{backend}:{MODEL_NAME}"
+
+@lru_cache(maxsize=8)
+def _model_for(backend: str, lang: str):
+    factory = LLM_BACKENDS.get(backend)
+    if factory is None:
+        raise ValueError(f"Unknown LLM_BACKEND: {backend}")
+    return factory(lang)
+
+def _build_model(lang: str):
+    """The model of the configured backend (LLM_BACKEND, default gemini) for this language."""
+    return _model_for(_backend_name(), lang)
+
 def _lang_clause(lang: str) -> str:
     return "Respond in English only." if lang == "en" else "Trả lời hoàn toàn bằng tiếng Việt."
 
+# ===== Concurrent, rate-limited dispatch =====
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = float(rate)
+        self.capacity = max(1, int(capacity))
+        self._tokens = float(self.capacity)
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+                self._stamp = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+def _is_retryable(e: Exception) -> bool:
+    """429 (quota) and 503 (overloaded) are worth retrying; anything else is final."""
+    code = getattr(e, "code", None)
+    code = getattr(code, "value", code)
+    return code in (429, 503) or type(e).__name__ in ("ResourceExhausted", "ServiceUnavailable")
+
+class LLMDispatcher:
+    """
+    Runs generate_content calls on a bounded thread pool:
+      - at most `max_concurrency` requests in flight
+      - token bucket of `rate_per_sec` (burst `burst`) shared by every caller
+      - per-call `timeout` (seconds), retry with exponential backoff + jitter on 429/503
+      - map() returns results in request order
+    """
+
+    def __init__(self, max_concurrency: int = 4, rate_per_sec: float = 2.0, burst: int = 4,
+                 timeout: float = 60.0, max_retries: int = 3, backoff: float = 1.0):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._bucket = TokenBucket(rate_per_sec, burst)
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="llm")
+
+    def _call(self, model, parts) -> str:
+        for attempt in range(self.max_retries + 1):
+            self._bucket.acquire()
+            try:
+                resp = model.generate_content(parts, request_options={"timeout": self.timeout})
+                return (getattr(resp, "text", "") or "").replace("*", "").strip()
+            except Exception as e:
+                if attempt >= self.max_retries or not _is_retryable(e):
+                    raise
+                time.sleep(self.backoff * (2 ** attempt) * (0.5 + random.random()))
+        return ""
+
+    def _deadline(self) -> float:
+        # every attempt may use its full timeout plus the longest backoff before it
+        return (self.max_retries + 1) * self.timeout + self.backoff * (2 ** (self.max_retries + 1))
+
+    def map(self, model, requests: Sequence[list]) -> List[Dict[str, Any]]:
+        """Dispatch many prompts; returns [{"text", "error"}] in the same order."""
+        futures = [self._pool.submit(self._call, model, parts) for parts in requests]
+        out = []
+        for fut in futures:
+            try:
+                out.append({"text": fut.result(timeout=self._deadline()), "error": None})
+            except FutureTimeout:
+                fut.cancel()
+                out.append({"text": "", "error": "timeout"})
+            except Exception as e:
+                out.append({"text": "", "error": str(e)})
+        return out
+
+    def generate(self, model, parts) -> str:
+        """Single call with the same limits; raises on failure."""
+        return self._pool.submit(self._call, model, parts).result(timeout=self._deadline())
+
+_DISPATCHER: Optional[LLMDispatcher] = None
+_DISPATCHER_LOCK = threading.Lock()
+
+def get_dispatcher() -> LLMDispatcher:
+    """Process-wide dispatcher so the rate limit covers every session. Tunable via secrets/env."""
+    global _DISPATCHER
+    with _DISPATCHER_LOCK:
+        if _DISPATCHER is None:
+            _DISPATCHER = LLMDispatcher(
+                max_concurrency=int(get_setting("GEMINI_MAX_CONCURRENCY", 4)),
+                rate_per_sec=float(get_setting("GEMINI_RATE_PER_SEC", 2)),
+                burst=int(get_setting("GEMINI_BURST", 4)),
+                timeout=float(get_setting("GEMINI_TIMEOUT", 60)),
+            )
+        return _DISPATCHER
+
+# ===== Response cache =====
+_CACHE: Optional[ResponseCache] = None
+
+def get_response_cache() -> ResponseCache:
+    """Process-wide response cache; LLM_CACHE=off disables it, LLM_CACHE_TTL / LLM_CACHE_MAX_MB tune it."""
+    global _CACHE
+    with _DISPATCHER_LOCK:
+        if _CACHE is None:
+            _CACHE = ResponseCache(
+                get_llm_cache_dir(),
+                ttl=float(get_setting("LLM_CACHE_TTL", 7 * 24 * 3600)),
+                max_bytes=int(get_setting("LLM_CACHE_MAX_MB", 64)) << 20,
+                enabled=str(get_setting("LLM_CACHE", "on")).lower() not in ("0", "off", "false"),
+            )
+        return _CACHE
+
+@traced("llm.ask")
+def _ask(model, parts: list, lang: str, use_cache: bool = True) -> str:
+    """One cached, rate-limited model call; raises on failure (errors are never cached)."""
+    cache = get_response_cache()
+    key = cache.make_key(parts, _model_id(), TEMPERATURE, lang) if use_cache and cache.enabled else None
+    if key:
+        hit = cache.get(key)
+        note_cache(hit is not None)
+        if hit is not None:
+            return hit
+    text = get_dispatcher().generate(model, parts)
+    if key:
+        cache.put(key, text)
+    return text
+
+@traced("llm.batch")
+def _ask_many(model, requests: Sequence[list], lang: str, use_cache: bool = True,
+              validate: Optional[Callable[[int, str], bool]] = None) -> List[Dict[str, Any]]:
+    """
+    Cached variant of LLMDispatcher.map: only cache misses go to the model, order is kept.
+    With `validate(index, text)`, only answers it accepts are cached.
+    """
+    cache = get_response_cache()
+    use = use_cache and cache.enabled
+    keys = [cache.make_key(parts, _model_id(), TEMPERATURE, lang) if use else None for parts in requests]
+    out: List[Optional[Dict[str, Any]]] = [None] * len(requests)
+    todo = []
+    for i, key in enumerate(keys):
+        hit = cache.get(key) if key else None
+        if key:
+            note_cache(hit is not None)
+        if hit is not None:
+            out[i] = {"text": hit, "error": None}
+        else:
+            todo.append(i)
+    for i, res in zip(todo, get_dispatcher().map(model, [requests[i] for i in todo])):
+        out[i] = res
+        if keys[i] and not res["error"] and (validate is None or validate(i, res["text"])):
+            cache.put(keys[i], res["text"])
+    return out
+
+class FakeRateLimit(Exception):
+    code = 429
+
+class FakeModel:
+    """
+    Offline stand-in for genai.GenerativeModel (tests / benchmarks):
+    sleeps `latency` seconds (plus up to `jitter` more, drawn per call), fails the first `rate_limited` calls with a 429,
+    echoes the first text part so callers can check ordering, and tracks peak concurrency.
+    Batched insight prompts get a JSON array back, minus the chart ids in `drop_ids`.
+    """
+
+    def __init__(self, latency: float = 0.05, rate_limited: int = 0, drop_ids: Sequence[Any] = (),
+                 jitter: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limited = rate_limited
+        self.drop_ids = set(drop_ids)
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, parts, request_options=None, **kwargs):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            limited = self.calls <= self.rate_limited
+        try:
+            delay = self.latency + random.uniform(0, self.jitter)
+            timeout = (request_options or {}).get("timeout")
+            if timeout is not None and delay > timeout:
+                time.sleep(timeout)
+                raise TimeoutError("deadline exceeded")
+            time.sleep(delay)
+            if limited:
+                raise FakeRateLimit("429 Resource has been exhausted")
+            texts = [p if isinstance(p, str) else p.get("text", "") for p in parts if isinstance(p, (str, dict))]
+            charts = _batch_charts(texts)
+            if charts is not None:
+                return SimpleNamespace(text=json.dumps(
+                    [{"id": c["id"], "insight": f"fake: {c['title']}"} for c in charts if c["id"] not in self.drop_ids],
+                    ensure_ascii=False))
+            first = texts[0] if texts else ""
+            return SimpleNamespace(text=f"fake: {first[:80]}")
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+def _batch_charts(texts: Sequence[str]) -> Optional[List[Dict[str, Any]]]:
+    """The chart list of a batched insight prompt, None for any other prompt."""
+    for t in texts:
+        if t.startswith('{"charts"'):
+            try:
+                return json.loads(t)["charts"]
+            except (ValueError, KeyError):
+                return None
+    return None
+
 # ===== Small dataset profile for chat fallback =====
 def _build_profile(df: pd.DataFrame, max_uniques: int = 12, sample_rows: int = 30) -> Dict[str, Any]:
     """
-    Very light profile: shapes, per-column dtype, a few stats for numeric,
-    sample values for categorical, and a handful of rows.
+    Very light profile from the dataset catalog: shapes, per-column dtype/role, a few
+    stats for numeric, top values for categorical, and a handful of rows.
     """
+    catalog = catalog_for(df)
     prof: Dict[str, Any] = {"rows": int(len(df)), "cols_count": int(df.shape[1]), "columns": []}
-    for c in df.columns:
-        s = df[c]
-        item = {"name": str(c), "dtype": str(s.dtype)}
-        if pd.api.types.is_numeric_dtype(s):
-            ss = pd.to_numeric(s, errors="coerce")
-            item["summary"] = {
-                "min": float(ss.min(skipna=True)) if len(ss) else None,
-                "max": float(ss.max(skipna=True)) if len(ss) else None,
-                "mean": float(ss.mean(skipna=True)) if len(ss) else None,
-            }
+    for c, meta in catalog.columns.items():
+        item = {"name": str(c), "dtype": meta["dtype"], "role": meta["role"],
+                "nulls": meta["nulls"], "distinct_approx": meta["distinct"]}
+        if meta["kind"] == "numeric":
+            q = meta["quantiles"]
+            item["summary"] = {"min": meta["min"], "max": meta["max"], "mean": meta["mean"],
+                               "p25": q[0.25], "median": q[0.5], "p75": q[0.75]}
         else:
-            item["sample_values"] = list(s.dropna().astype(str).head(max_uniques).unique())
+            item["sample_values"] = [str(v) for v, _ in meta.get("top", [])[:max_uniques]]
         prof["columns"].append(item)
 
     try:
@@ -60,148 +314,173 @@ def _build_profile(df: pd.DataFrame, max_uniques: int = 12, sample_rows: int = 3
         prof["sample_rows"] = []
     return prof
 
-# ===== Chart → short insight =====
-def _resolve_chart_path(folder_path: str, chart_path_or_name: str) -> Optional[str]:
-    candidates = []
-    if isinstance(chart_path_or_name, str):
-        if os.path.exists(chart_path_or_name):
-            candidates.append(chart_path_or_name)
-        candidates.append(os.path.join(folder_path, chart_path_or_name))
-    for p in candidates:
-        if isinstance(p, str) and os.path.exists(p):
-            return p
-    return None
+# ===== Batched chart insights =====
+INSIGHT_TABLE_ROWS = 8  # rows of a pivot sent per chart (top + bottom half each beyond that)
+INSIGHT_MAX_WORDS = 30  # per chart in batches; a single Manual-tab chart gets a longer report
 
-def generate_report_from_chart(folder_path: str, chart_path_or_name: str, lang: str = "en"):
+def _round(v: Any) -> Any:
+    try:
+        f = float(v)
+    except (TypeError, ValueError):
+        return str(v)
+    return None if f != f else (int(f) if f.is_integer() else round(f, 2))
+
+def _chart_payload(chart_id: int, chart: Dict[str, Any], max_rows: int = INSIGHT_TABLE_ROWS) -> Dict[str, Any]:
     """
-    Read the chart image and ask Gemini for a ≤100-word insight.
+    Compact JSON table of one chart: title, group count, total and the rows sorted by value
+    (top and bottom rows only for long pivots). A few hundred bytes instead of an image.
     """
-    file_path = _resolve_chart_path(folder_path, chart_path_or_name)
-    if not file_path:
-        return "Chart file not found." if lang == "en" else "Không tìm thấy file biểu đồ."
-    try:
-        img = Image.open(file_path)
-    except Exception as e:
-        return f"Cannot open chart: {e}" if lang == "en" else f"Không mở được biểu đồ: {e}"
+    category, numeric = chart["category"], chart["numeric"]
+    agg = chart.get("agg", "sum")
+    pivot = chart["pivot"]
+    values = pd.to_numeric(pivot[numeric], errors="coerce")
+    ordered = pivot.assign(_v=values).sort_values("_v", ascending=False, na_position="last")
+    rows = [[str(k), _round(v)] for k, v in zip(ordered[category], ordered["_v"])]
+    out = {"id": chart_id, "chart": chart.get("chart_type", "Bar Chart"),
+           "title": f"{agg} of {numeric} by {category}", "groups": len(rows),
+           "total": _round(values.sum()) if agg in ("sum", "count") else None}
+    if len(rows) > max_rows:
+        half = max_rows // 2
+        out["top"], out["bottom"] = rows[:half], rows[-half:]
+    else:
+        out["rows"] = rows
+    return out
+
+def _batch_prompt(payloads: Sequence[Dict[str, Any]], lang: str, max_words: int = INSIGHT_MAX_WORDS) -> list:
+    base = ("Each item below is a chart given as a compact table. For EACH chart write ONE short, actionable "
+            f"insight (<={max_words} words) using only its numbers. Reply with ONLY a JSON array: "
+            '[{"id": <chart id>, "insight": "..."}], one object per chart, same ids.')
+    return [{"text": base}, {"text": json.dumps({"charts": list(payloads)}, ensure_ascii=False)},
+            {"text": f"{_lang_clause(lang)} Keep the JSON keys in English."}]
 
-    base = "Generate a concise report (max 100 words) from this chart:" if lang == "en" \
-           else "Tạo báo cáo ngắn (tối đa 100 từ) từ biểu đồ này:"
+def _single_prompt(payload: Dict[str, Any], lang: str, max_words: int = INSIGHT_MAX_WORDS) -> list:
+    base = (f"Give ONE short, actionable insight (<={max_words} words) from this chart table. Do not invent numbers."
+            if lang == "en" else
+            f"Đưa ra MỘT nhận định ngắn gọn (<={max_words} chữ) từ bảng của biểu đồ này. Không bịa số.")
+    return [{"text": base}, {"text": json.dumps(payload, ensure_ascii=False)}, {"text": _lang_clause(lang)}]
+
+def _parse_batch(text: str, ids: Sequence[int]) -> Dict[int, str]:
+    """Insights by chart id from a batched answer; unknown ids, empty or malformed items are left out."""
+    start, end = text.find("["), text.rfind("]")
+    if start < 0 or end <= start:
+        return {}
     try:
-        model = _build_model(lang)
-        resp = model.generate_content([f"{base} {_lang_clause(lang)}", img])
-        text = (getattr(resp, "text", "") or "").replace("*", "").strip()
-        return text if text else ("No insight generated." if lang == "en" else "Không tạo được insight.")
-    except Exception as e:
-        return f"AI error: {e}" if lang == "en" else f"Lỗi AI: {e}"
+        items = json.loads(text[start:end + 1])
+    except ValueError:
+        return {}
+    wanted, out = set(ids), {}
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict):
+            continue
+        cid, insight = item.get("id"), item.get("insight")
+        if isinstance(cid, str) and cid.isdigit():
+            cid = int(cid)
+        if cid in wanted and isinstance(insight, str) and insight.strip():
+            out.setdefault(cid, insight.strip())
+    return out
+
+@traced("ai.insights")
+def generate_insights(charts: Sequence[Dict[str, Any]], lang: str = "en", use_cache: bool = True,
+                      batch_size: Optional[int] = None, max_words: int = INSIGHT_MAX_WORDS) -> List[str]:
+    """
+    One insight of at most `max_words` words per chart ({"pivot", "category", "numeric"[, "agg",
+    "chart_type"]}), in order. Charts go to the model as compact tables, `batch_size` (INSIGHT_BATCH_SIZE,
+    default 5) per request, answered as a JSON array; charts missing from a valid answer are retried one
+    request each. Failed charts get "".
+    """
+    if not charts:
+        return []
+    size = max(1, int(batch_size or get_setting("INSIGHT_BATCH_SIZE", 5)))
+    model = _build_model(lang)
+    payloads = [_chart_payload(i, c) for i, c in enumerate(charts)]
+    batches = [payloads[i:i + size] for i in range(0, len(payloads), size)]
+    requests = [_batch_prompt(b, lang, max_words) for b in batches]
+    ids = [[p["id"] for p in b] for b in batches]
+
+    insights = [""] * len(charts)
+    results = _ask_many(model, requests, lang, use_cache,
+                        validate=lambda i, text: len(_parse_batch(text, ids[i])) == len(ids[i]))
+    for want, res in zip(ids, results):
+        for cid, text in _parse_batch(res["text"], want).items():
+            insights[cid] = text
+
+    missing = [i for i, text in enumerate(insights) if not text]
+    if missing:
+        retries = [_single_prompt(payloads[i], lang, max_words) for i in missing]
+        for i, res in zip(missing, _ask_many(model, retries, lang, use_cache)):
+            insights[i] = res["text"]
+    return insights
 
 # ===== Simple Auto Analysis (used by 'Run AI Auto Analysis') =====
-def ai_auto_analysis(data: pd.DataFrame, lang: str = "en"):
+@traced("ai.auto_analysis")
+def ai_auto_analysis(data: pd.DataFrame, lang: str = "en", use_cache: bool = True,
+                     progress: Optional[Callable[..., None]] = None):
     """
     Create up to 3×3 (categorical × numeric) bar charts and ask Gemini
-    for a one-line actionable insight derived from each chart image.
+    for a one-line actionable insight per chart, from its pivot table (batched, see generate_insights).
+    `progress(stage, fraction)` is called between stages (aggregate / render / insights);
+    an exception it raises (e.g. JobCancelled) stops the analysis.
     """
+    progress = progress or (lambda stage=None, fraction=None: None)
     reports = []
     folder_path = get_chart_dir()
     os.makedirs(folder_path, exist_ok=True)
-    model = _build_model(lang)
 
-    numeric_cols = data.select_dtypes(include=["number"]).columns.tolist()
-    category_cols = data.select_dtypes(include=["object", "string", "category"]).columns.tolist()
+    # measures / categorical columns first, id-like columns last
+    catalog = catalog_for(data)
+    numeric_cols = catalog.measure_columns
+    category_cols = catalog.group_columns
     if not category_cols:
+        if not isinstance(data, pd.DataFrame):
+            return reports  # out-of-core frames have no row index to group by
         data = data.reset_index()
         category_cols = ["index"]
 
-    for category in category_cols[:3]:
-        for numeric in numeric_cols[:3]:
-            try:
-                pivot = data.groupby(category, dropna=False)[numeric].sum().reset_index()
-            except Exception:
-                continue
-
-            chart_path, chart_name = plot_chart(folder_path, "Bar Chart", pivot, category, numeric)
-            insight = ""
-            if chart_path and isinstance(chart_name, str) and chart_name.lower().endswith(('.png', '.jpg', '.jpeg')):
-                try:
-                    img = Image.open(os.path.join(folder_path, chart_name))
-                    base = (f"Analyze this bar chart of '{numeric}' by '{category}' and give ONE short, actionable insight (<=30 words)."
-                            if lang == "en"
-                            else f"Phân tích biểu đồ '{numeric}' theo '{category}' và đưa ra MỘT nhận định ngắn gọn (<=30 chữ).")
-                    resp = model.generate_content([f"{base} {_lang_clause(lang)}", img])
-                    insight = (getattr(resp, "text", "") or "").replace("*", "").strip()
-                except Exception:
-                    insight = ""
-
-            reports.append({
-                "pivot_table": pivot,
-                "chart_path": chart_path,
-                "sheet_name": f"{category}_{numeric}",
-                "insight": insight,
-                "source": "AI"
-            })
+    engine = engine_for(data)
+    grid = []  # (category, numeric, pivot)
+    for i, category in enumerate(category_cols[:3]):
+        progress("aggregate", i / 3)
+        try:
+            # one factorization of `category` serves every metric
+            pivots = engine.pivots(category, numeric_cols[:3], "sum", dropna=False)
+        except Exception:
+            continue
+        grid.extend((category, numeric, pivot) for numeric, pivot in zip(numeric_cols[:3], pivots))
+
+    # all charts of the grid are rendered concurrently in the chart worker pool
+    progress("render", 0.0)
+    charts = render_charts(folder_path, [("Bar Chart", pivot, category, numeric) for category, numeric, pivot in grid])
+
+    # insights for every rendered chart from its pivot table: one or two batched requests
+    progress("insights", 0.0)
+    asked = [i for i, chart in enumerate(charts) if chart["chart_path"]]
+    insights = [""] * len(grid)
+    texts = generate_insights([{"pivot": grid[i][2], "category": grid[i][0], "numeric": grid[i][1]} for i in asked],
+                              lang, use_cache)
+    for i, text in zip(asked, texts):
+        insights[i] = text
+
+    for (category, numeric, pivot), chart, insight in zip(grid, charts, insights):
+        report_id = uuid.uuid4().hex
+        add_chart_ref(chart["chart_path"], report_id)
+        reports.append({
+            "report_id": report_id,
+            "pivot_table": pivot,
+            "chart_path": chart["chart_path"],
+            "sheet_name": f"{category}_{numeric}",
+            "insight": insight,
+            "source": "AI"
+        })
     return reports
 
 # ===== Lightweight “smart” chat (no chart, no report add) =====
-def _pick_col_by_hint(all_cols, hint: str):
-    """Exact -> case-insensitive -> substring match."""
-    if not hint:
-        return None
-    h = hint.strip().lower()
-    for c in all_cols:
-        if c.lower() == h:
-            return c
-    for c in all_cols:
-        if h in c.lower():
-            return c
-    return None
-
-def _detect_parts(question: str, df: pd.DataFrame):
-    """
-    Tiny parser for beginner-friendly execution:
-      - 'by <col>' or 'group by <col>'
-      - 'top K' / 'bottom K'
-      - sum | avg/mean | count | min | max
-      - metric guess from numeric columns or common names
-    """
-    ql = question.strip().lower()
-
-    by_match = re.search(r"(?:group\s+by|by)\s+([a-z0-9 _\-]+)", ql)
-    group_by_hint = by_match.group(1).strip() if by_match else None
-
-    topk = None
-    if m := re.search(r"\btop\s*(\d+)?\b", ql):
-        topk = int(m.group(1)) if m.group(1) else 5
-    bottom = bool(re.search(r"\bbottom\b", ql))
-
-    agg = "sum"
-    if any(k in ql for k in ["average", "avg", "mean"]): agg = "mean"
-    elif "count" in ql: agg = "count"
-    elif "min" in ql: agg = "min"
-    elif "max" in ql: agg = "max"
-    elif any(k in ql for k in ["sum", "total"]): agg = "sum"
-
-    # metric
-    num_cols = df.select_dtypes(include=["number"]).columns.tolist()
-    metric_hint = None
-    for kw in ["amount", "revenue", "sales", "qty", "quantity", "price", "unitprice", "total"]:
-        if kw in ql:
-            metric_hint = kw; break
-    metric = None
-    if metric_hint:
-        for c in num_cols:
-            if metric_hint in c.lower():
-                metric = c; break
-    if not metric and num_cols:
-        metric = num_cols[0]
-
-    group_by = _pick_col_by_hint(df.columns, group_by_hint) if group_by_hint else None
-
-    return {"group_by": group_by, "metric": metric, "agg": agg, "topk": topk, "bottom": bottom}
-
-def ai_answer_question(data: pd.DataFrame, question: str, lang: str = "en"):
+@traced("ai.answer")
+def ai_answer_question(data: pd.DataFrame, question: str, lang: str = "en", use_cache: bool = True):
     """
     Beginner-friendly chat:
-      1) Try a simple aggregate if the question looks like “<agg> <metric> by <group> (top K)”.
-      2) If possible, compute with pandas and ask Gemini to phrase one short insight. Include a small table.
+      1) Parse the question into a QueryPlan (metrics, group-bys, filters, date buckets, top/bottom K);
+         names that do not match exactly (typos, Vietnamese synonyms) go through the column index.
+      2) If that works, compute it locally and ask Gemini to phrase one short insight. Include a small table.
       3) Otherwise, fallback to normal chat using a lightweight dataset profile.
     Returns: (None, reply_text)
     """
@@ -211,43 +490,43 @@ def ai_answer_question(data: pd.DataFrame, question: str, lang: str = "en"):
                "Hãy hỏi về dữ liệu, ví dụ: “Top 5 Qty theo City”, “Giá trung bình theo Product”.")
         return None, msg
 
-    parts = _detect_parts(question, data)
-    group_by, metric, agg, topk, bottom = parts["group_by"], parts["metric"], parts["agg"], parts["topk"], parts["bottom"]
-
-    # Try to execute a simple aggregation
+    # Try to answer locally: question -> typed plan -> vectorized execution (exact numbers)
     try:
-        if group_by and (metric or agg == "count"):
-            df = data.copy()
-            if agg == "count":
-                pivot = df.groupby(group_by, dropna=False).size().reset_index(name="count")
-                value_col = "count"
-            else:
-                if metric not in df.select_dtypes(include=["number"]).columns:
-                    raise ValueError("Metric is not numeric or not found.")
-                pivot = getattr(df.groupby(group_by, dropna=False)[metric], agg)().reset_index()
-                value_col = metric
-
-            pivot = pivot.sort_values(by=value_col, ascending=bottom)
-            pivot = pivot.head(topk if topk else 10)
-
-            md_table = pivot.head(10).to_markdown(index=False)
-
-            model = _build_model(lang)
+        plan = plan_question(question, data, fuzzy=True)
+        if plan is not None:
+            result = execute_plan(data, plan)
+            if result.empty:
+                raise ValueError("Empty result.")
+            md_table = to_markdown(result, 10)
+
             base = "Write ONE concise insight (<=60 words) from the table. Do not invent numbers." \
                    if lang == "en" else \
                    "Viết MỘT insight ngắn (<=60 chữ) từ bảng. Không bịa số."
-            resp = model.generate_content([
-                {"text": base},
-                {"text": f"Question: {question}"},
-                {"text": f"Result (markdown):\n{md_table}"},
-                {"text": _lang_clause(lang)}
-            ])
-            insight = (getattr(resp, "text", "") or "").replace("*", "").strip()
+            try:
+                insight = _ask(_build_model(lang), [
+                    {"text": base},
+                    {"text": f"Question: {question}"},
+                    {"text": f"Computed: {describe_plan(plan)}"},
+                    {"text": f"Result (markdown):\n{md_table}"},
+                    {"text": _lang_clause(lang)}
+                ], lang, use_cache)
+            except Exception:
+                insight = ""  # the computed table is still the answer
             if not insight:
-                row0 = pivot.iloc[0].to_dict()
-                insight = (f"Top {group_by} is {row0[group_by]} with {value_col} = {row0[value_col]}."
-                           if lang == "en" else
-                           f"Nhóm dẫn đầu '{group_by}' là {row0[group_by]} với {value_col} = {row0[value_col]}.")
+                row0 = result.iloc[0].to_dict()
+                value_col = metric_name(plan.metrics[0])
+                if plan.sort_desc is None and (plan.group_by or plan.date_bucket):
+                    key = result.columns[0]
+                    insight = (f"{value_col} over {len(result)} values of {key}."
+                               if lang == "en" else
+                               f"{value_col} theo {len(result)} giá trị của {key}.")
+                elif plan.group_by or plan.date_bucket:
+                    key = result.columns[0]
+                    insight = (f"Top {key} is {row0[key]} with {value_col} = {row0[value_col]}."
+                               if lang == "en" else
+                               f"Nhóm dẫn đầu '{key}' là {row0[key]} với {value_col} = {row0[value_col]}.")
+                else:
+                    insight = f"{value_col} = {row0[value_col]}"
 
             return None, insight + "\n\n" + md_table
     except Exception:
@@ -264,12 +543,11 @@ def ai_answer_question(data: pd.DataFrame, question: str, lang: str = "en"):
            "Nếu cần tổng hợp để ra kết quả, hãy nói rõ cần tính gì và gợi ý bước tiếp. "
            "Trả lời ngắn gọn (<=120 chữ).")
     try:
-        resp = model.generate_content([
+        reply = _ask(model, [
             {"text": sys},
-            {"text": f"Dataset profile JSON:\n{json.dumps(profile)[:4000]}"},
+            {"text": f"Dataset profile JSON:\n{json.dumps(profile, default=str)[:4000]}"},
             {"text": f"User question:\n{question}\n{_lang_clause(lang)}"}
-        ])
-        reply = (getattr(resp, "text", "") or "").replace("*", "").strip()
+        ], lang, use_cache)
         if not reply:
             reply = "I couldn’t generate a response." if lang == "en" else "Chưa tạo được câu trả lời."
         return None, reply
@@ -0,0 +1,283 @@
+# helpers/catalog.py
+import math
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .frame_cache import frame_cached
+from .tracing import traced
+
+CHUNK_ROWS = 1_000_000
+QUANTILES = (0.0, 0.05, 0.25, 0.5, 0.75, 0.95, 1.0)
+ID_MIN_DISTINCT_RATIO = 0.95
+ID_NAME_HINTS = ("id", "_id", "code", "uuid", "key")
+
+# ===== Sketches =====
+class HyperLogLog:
+    """Distinct-count sketch over 64-bit hashes (2**p registers, ~1.04/sqrt(2**p) relative error)."""
+
+    def __init__(self, p: int = 12):
+        self.p = p
+        self.m = 1 << p
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def add_hashes(self, h: np.ndarray) -> None:
+        if not len(h):
+            return
+        h = np.asarray(h, dtype=np.uint64)
+        bits = 64 - self.p
+        idx = (h >> np.uint64(bits)).astype(np.intp)
+        rest = h & np.uint64((1 << bits) - 1)
+        # rank = position of the leftmost 1-bit in the remaining `bits` bits (exact in float64 for bits <= 53)
+        with np.errstate(divide="ignore"):
+            rank = np.where(rest > 0, bits - np.floor(np.log2(rest.astype(np.float64))), bits + 1).astype(np.uint8)
+        np.maximum.at(self.registers, idx, rank)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> int:
+        m = float(self.m)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        est = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if est <= 2.5 * m and zeros:
+            est = m * math.log(m / zeros)  # linear counting for small cardinalities
+        return int(round(est))
+
+class KLLSketch:
+    """
+    Mergeable quantile sketch (KLL-style compactors): level h holds items of weight 2**h;
+    a full level is sorted and every other item (random offset) is promoted.
+    """
+
+    def __init__(self, k: int = 200, seed: int = 0):
+        self.k = k
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self.n = 0
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, h: int) -> int:
+        depth = len(self.levels) - 1 - h
+        return max(2, int(math.ceil(self.k * (2.0 / 3.0) ** depth)))
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self.n += len(values)
+        self.levels[0] = np.concatenate((self.levels[0], values))
+        self._compress()
+
+    def merge(self, other: "KLLSketch") -> None:
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, items in enumerate(other.levels):
+            self.levels[h] = np.concatenate((self.levels[h], items))
+        self.n += other.n
+        self._compress()
+
+    def _compress(self) -> None:
+        h = 0
+        while h < len(self.levels):
+            items = self.levels[h]
+            if len(items) > self._capacity(h):
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                keep = items[-1:] if len(items) % 2 else items[:0]
+                pairs = items[:len(items) - len(keep)]
+                promoted = pairs[int(self._rng.integers(2))::2]
+                self.levels[h] = keep
+                self.levels[h + 1] = np.concatenate((self.levels[h + 1], promoted))
+            h += 1
+
+    def quantiles(self, qs: Sequence[float]) -> List[Optional[float]]:
+        if not self.n:
+            return [None] * len(qs)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(lv), 2.0 ** h) for h, lv in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        items, cum = items[order], np.cumsum(weights[order])
+        pos = np.searchsorted(cum, np.asarray(qs) * cum[-1], side="left")
+        return [float(items[min(i, len(items) - 1)]) for i in pos]
+
+class TopValues:
+    """Misra-Gries heavy hitters (mergeable); counts are lower bounds, exact when < capacity distinct."""
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype="int64")
+
+    def update_counts(self, counts: pd.Series) -> None:
+        merged = self.counts.add(counts, fill_value=0) if len(self.counts) else counts
+        if len(merged) > self.capacity:
+            # keep the top `capacity` and subtract the (capacity+1)-th count from each
+            top = merged.nlargest(self.capacity + 1, keep="first")
+            merged = top.iloc[:self.capacity] - top.iloc[self.capacity]
+            merged = merged[merged > 0]
+        self.counts = merged.astype("int64")
+
+    def merge(self, other: "TopValues") -> None:
+        self.update_counts(other.counts)
+
+    def top(self, n: int = 10) -> List[tuple]:
+        s = self.counts.sort_values(ascending=False, kind="stable").head(n)
+        return list(zip(s.index.tolist(), s.tolist()))
+
+# ===== Column profiling =====
+def _kind(s: pd.Series) -> str:
+    if pd.api.types.is_bool_dtype(s):
+        return "bool"
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return "datetime"
+    if pd.api.types.is_numeric_dtype(s):
+        return "numeric"
+    return "text"
+
+class _ColumnAccumulator:
+    """Streaming state for one column; fed chunk by chunk, all updates vectorized."""
+
+    def __init__(self, name: str, s: pd.Series, top_capacity: int):
+        self.name = name
+        self.dtype = str(s.dtype)
+        self.kind = _kind(s)
+        self.rows = 0
+        self.nulls = 0
+        self.hll = HyperLogLog()
+        self.kll = KLLSketch() if self.kind == "numeric" else None
+        self.top = TopValues(top_capacity) if self.kind != "numeric" else None
+        self.min = self.max = None
+        self.total = 0.0
+        self.count = 0
+
+    def update(self, s: pd.Series) -> None:
+        self.rows += len(s)
+        na = s.isna().to_numpy()
+        self.nulls += int(na.sum())
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            # hash the categories once, gather by code
+            codes = s.cat.codes.to_numpy()
+            cat_hash = pd.util.hash_array(s.cat.categories.to_numpy())
+            self.hll.add_hashes(cat_hash[codes[codes >= 0]])
+        else:
+            self.hll.add_hashes(pd.util.hash_array(s.to_numpy()[~na]))
+
+        if self.kind == "numeric":
+            v = s.to_numpy(dtype="float64", na_value=np.nan)
+            v = v[~np.isnan(v)]
+            if len(v):
+                lo, hi = float(v.min()), float(v.max())
+                self.min = lo if self.min is None else min(self.min, lo)
+                self.max = hi if self.max is None else max(self.max, hi)
+                self.total += float(v.sum())
+                self.count += len(v)
+                self.kll.update(v)
+        else:
+            if self.kind == "datetime":
+                vals = s.dropna()
+                if len(vals):
+                    lo, hi = vals.min(), vals.max()
+                    self.min = lo if self.min is None else min(self.min, lo)
+                    self.max = hi if self.max is None else max(self.max, hi)
+            counts = s.value_counts(sort=False, dropna=True)
+            self.top.update_counts(counts[counts > 0])
+
+    def finish(self) -> Dict[str, Any]:
+        distinct = min(self.hll.estimate(), self.rows - self.nulls)
+        item: Dict[str, Any] = {
+            "name": self.name, "dtype": self.dtype, "kind": self.kind,
+            "rows": self.rows, "nulls": self.nulls, "distinct": distinct,
+        }
+        if self.kind == "numeric":
+            item.update(min=self.min, max=self.max,
+                        mean=self.total / self.count if self.count else None,
+                        quantiles=dict(zip(QUANTILES, self.kll.quantiles(QUANTILES))))
+        else:
+            item["top"] = self.top.top(self.top.capacity)
+            if self.kind == "datetime":
+                item.update(min=self.min, max=self.max)
+        item["role"] = _role(item)
+        return item
+
+def _looks_like_dates(values: Iterable) -> bool:
+    sample = [v for v in values if isinstance(v, str)][:20]
+    if len(sample) < 3:
+        return False
+    parsed = pd.to_datetime(pd.Series(sample), errors="coerce", format="mixed")
+    return bool(parsed.notna().all())
+
+def _role(item: Dict[str, Any]) -> str:
+    """categorical | numeric | datetime | id"""
+    kind, name = item["kind"], item["name"].lower()
+    non_null = max(item["rows"] - item["nulls"], 1)
+    unique_ish = item["distinct"] >= ID_MIN_DISTINCT_RATIO * non_null and non_null > 50
+    if kind == "datetime":
+        return "datetime"
+    if kind == "bool":
+        return "categorical"
+    if kind == "numeric":
+        integral = item["min"] is not None and float(item["min"]).is_integer() and float(item["max"]).is_integer()
+        if integral and (unique_ish or name.endswith(ID_NAME_HINTS)):
+            return "id"
+        return "numeric"
+    if _looks_like_dates(v for v, _ in item.get("top", [])):
+        return "datetime"
+    return "id" if unique_ish else "categorical"
+
+# ===== Catalog =====
+class DatasetCatalog:
+    """Column metadata of one DataFrame: dtype, role, nulls, ~distinct, quantiles / top values."""
+
+    def __init__(self, rows: int, columns: Dict[str, Dict[str, Any]]):
+        self.rows = rows
+        self.columns = columns
+
+    def __getitem__(self, name: str) -> Dict[str, Any]:
+        return self.columns[name]
+
+    def names(self, *roles: str) -> List[str]:
+        return [c for c, item in self.columns.items() if item["role"] in roles]
+
+    @property
+    def numeric_columns(self) -> List[str]:
+        """Same set as select_dtypes('number')."""
+        return [c for c, item in self.columns.items() if item["kind"] == "numeric"]
+
+    @property
+    def category_columns(self) -> List[str]:
+        """Same set as select_dtypes(['object', 'string', 'category'])."""
+        return [c for c, item in self.columns.items() if item["kind"] == "text"]
+
+    @property
+    def group_columns(self) -> List[str]:
+        """Text columns worth grouping by: categorical first, then dates; id-like only if nothing else."""
+        rank = {"categorical": 0, "datetime": 1}
+        text = [c for c in self.category_columns if self.columns[c]["role"] in rank]
+        return sorted(text, key=lambda c: rank[self.columns[c]["role"]]) or self.category_columns
+
+    @property
+    def measure_columns(self) -> List[str]:
+        """Numeric columns that are measures; id-like integers only if nothing else."""
+        return [c for c in self.numeric_columns if self.columns[c]["role"] != "id"] or self.numeric_columns
+
+@traced("catalog.build")
+def build_catalog(df: pd.DataFrame, chunk_rows: int = CHUNK_ROWS, top_capacity: int = 64) -> DatasetCatalog:
+    """
+    One pass over the frame in row chunks; every column statistic is a mergeable sketch.
+    Out-of-core frames (helpers.out_of_core.ChunkedFrame) are read batch by batch.
+    """
+    empty = df.head(0)
+    accs = [_ColumnAccumulator(str(c), empty.iloc[:, i], top_capacity) for i, c in enumerate(df.columns)]
+    chunks = (df.iloc[start:start + chunk_rows] for start in range(0, max(len(df), 1), chunk_rows)) \
+        if isinstance(df, pd.DataFrame) else df.iter_frames()
+    for chunk in chunks:
+        for i, acc in enumerate(accs):
+            acc.update(chunk.iloc[:, i])
+    return DatasetCatalog(int(len(df)), {c: acc.finish() for c, acc in zip(df.columns, accs)})
+
+def catalog_for(df: pd.DataFrame) -> DatasetCatalog:
+    """The cached catalog of this DataFrame object (built on first use)."""
+    return frame_cached(df, "catalog", build_catalog)
@@ -0,0 +1,101 @@
+# helpers/chart_reduce.py
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Max marks drawn per chart type; anything larger is reduced before rendering.
+POINT_BUDGETS = {"Bar Chart": 30, "Pie Chart": 12, "Line Chart": 1000, "Scatter Plot": 5000}
+OTHER_LABEL = "Other"
+
+def lttb_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets over evenly spaced x: keeps first/last points and,
+    per bucket, the point forming the largest triangle with its neighbours.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.arange(n, dtype=np.float64)
+    every = (n - 2) / (n_out - 2)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start = int(np.floor(i * every)) + 1
+        end = min(int(np.floor((i + 1) * every)) + 1, n - 1)
+        nxt_end = min(int(np.floor((i + 2) * every)) + 1, n)
+        avg_x = x[end:nxt_end].mean() if nxt_end > end else x[-1]
+        avg_y = y[end:nxt_end].mean() if nxt_end > end else y[-1]
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area)) if len(area) else start
+        out[i + 1] = a
+    return out
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Keep the min and max of each of n_out/2 equal buckets (preserves spikes)."""
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    buckets = max(1, n_out // 2)
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    keep = []
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        if hi > lo:
+            seg = y[lo:hi]
+            keep.extend((lo + int(np.argmin(seg)), lo + int(np.argmax(seg))))
+    return np.unique(np.asarray(keep, dtype=np.int64))
+
+def _top_n(data: pd.DataFrame, x_col, y_col, budget: int) -> pd.DataFrame:
+    y = pd.to_numeric(data[y_col], errors="coerce").fillna(0)
+    order = np.argsort(-y.to_numpy(), kind="stable")
+    head = data.iloc[order[:budget - 1]]
+    rest = order[budget - 1:]
+    other = pd.DataFrame({x_col: [f"{OTHER_LABEL} ({len(rest)})"], y_col: [y.iloc[rest].sum()]})
+    return pd.concat([head[[x_col, y_col]].astype({x_col: str}), other], ignore_index=True)
+
+def reduce_for_chart(chart_type: str, data: pd.DataFrame, x_col, y_col,
+                     budget: Optional[int] = None, line_method: str = "lttb") -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Bound the number of marks before rendering:
+      - Bar / Pie: top-(N-1) groups by value + one 'Other (k)' bucket (sum of the rest)
+      - Line: LTTB (default) or min-max downsampling in the pivot's order
+      - Scatter: hexbin density when x is numeric, otherwise a seeded uniform sample
+    Returns (data, info) with info = {"method", "rows_in", "rows_out"}.
+    """
+    n = len(data)
+    budget = budget or POINT_BUDGETS.get(chart_type, n)
+    info = {"method": "none", "rows_in": n, "rows_out": n}
+    if n <= budget:
+        return data, info
+
+    if chart_type in ("Bar Chart", "Pie Chart"):
+        out = _top_n(data, x_col, y_col, budget)
+        info.update(method="top_n")
+    elif chart_type == "Line Chart":
+        y = pd.to_numeric(data[y_col], errors="coerce").fillna(0).to_numpy(dtype=np.float64)
+        idx = minmax_indices(y, budget) if line_method == "minmax" else lttb_indices(y, budget)
+        out = data.iloc[idx]
+        info.update(method=line_method)
+    elif chart_type == "Scatter Plot":
+        if pd.to_numeric(data[x_col], errors="coerce").notna().all():
+            out = data  # drawn as hexbin, every point counts
+            info.update(method="hexbin")
+        else:
+            out = data.sample(n=budget, random_state=0).sort_index()
+            info.update(method="sample")
+    else:
+        return data, info
+    info["rows_out"] = len(out)
+    return out, info
+
+def reduction_note(info: Dict[str, Any]) -> str:
+    """Short subtitle describing the reduction, '' when nothing was reduced."""
+    m = info.get("method")
+    if m == "top_n":
+        return f"Top {info['rows_out'] - 1} of {info['rows_in']:,} groups + Other"
+    if m in ("lttb", "minmax", "sample"):
+        return f"{info['rows_out']:,} of {info['rows_in']:,} points ({m})"
+    if m == "hexbin":
+        return f"Density of {info['rows_in']:,} points"
+    return ""
@@ -0,0 +1,80 @@
+# helpers/chart_service.py
+import atexit
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from .charts import _render, chart_style
+from .process_pool import spawn_pool
+from .tracing import traced
+
+# (chart_type, pivot, x_col, y_col)
+ChartJob = Tuple[str, pd.DataFrame, str, str]
+
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_LOCK = threading.Lock()
+
+def _default_workers() -> int:
+    return max(1, min(4, (os.cpu_count() or 2) - 1))
+
+def _get_pool(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """One process pool per server (matplotlib is not thread-safe, so no threads); see spawn_pool."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = spawn_pool(max_workers or _default_workers())
+        return _POOL
+
+def shutdown_pool() -> None:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.shutdown(wait=True, cancel_futures=True)
+            _POOL = None
+
+atexit.register(shutdown_pool)
+
+def _render_job(folder_path: str, job: ChartJob, with_bytes: bool, style: Optional[dict] = None) -> Dict[str, Any]:
+    chart_type, pivot, x_col, y_col = job
+    try:
+        chart_path, chart_name, info = _render(folder_path, chart_type, pivot, x_col, y_col, style=style)
+    except Exception as e:
+        return {"chart_path": None, "chart_name": None, "error": f"{type(e).__name__}: {e}"}
+    res = {"chart_path": chart_path, "chart_name": chart_name, "error": None, "reduction": info}
+    if with_bytes:
+        with open(chart_path, "rb") as f:
+            res["image_bytes"] = f.read()
+    return res
+
+@traced("chart.batch")
+def render_charts(folder_path: str, jobs: Sequence[ChartJob], with_bytes: bool = False,
+                  max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Render a batch of charts concurrently; results come back in job order as
+    {"chart_path", "chart_name", "error", "reduction"[, "image_bytes"]}. Failures are reported
+    in "error" instead of raising or calling st.error.
+    """
+    jobs = list(jobs)
+    style = chart_style()  # read settings here; workers may not see this process's secrets
+    if len(jobs) <= 1:
+        return [_render_job(folder_path, j, with_bytes, style) for j in jobs]
+    try:
+        pool = _get_pool(max_workers)
+        futures = [pool.submit(_render_job, folder_path, j, with_bytes, style) for j in jobs]
+        out = []
+        for fut in futures:
+            try:
+                out.append(fut.result())
+            except BrokenProcessPool:
+                raise
+            except Exception as e:
+                out.append({"chart_path": None, "chart_name": None, "error": f"{type(e).__name__}: {e}"})
+        return out
+    except BrokenProcessPool:
+        # A worker died (OOM, segfault); start fresh next time and render this batch inline.
+        shutdown_pool()
+        return [_render_job(folder_path, j, with_bytes, style) for j in jobs]
@@ -0,0 +1,122 @@
+# helpers/chart_store.py
+import io
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from .paths import get_setting
+from .tracing import note_cache, span
+
+THUMB_WIDTH = 360        # px, Reports tab previews
+MIME_TYPES = {".png": "image/png", ".webp": "image/webp", ".jpg": "image/jpeg", ".jpeg": "image/jpeg"}
+
+def mime_type(path: str) -> str:
+    return MIME_TYPES.get(os.path.splitext(path)[1].lower(), "application/octet-stream")
+
+def _reencode(data: bytes, max_width: Optional[int] = None, fmt: str = "WEBP", **save_kwargs) -> bytes:
+    from PIL import Image  # only derived variants need Pillow
+    with Image.open(io.BytesIO(data)) as img:
+        img = img.convert("RGBA" if fmt == "PNG" else "RGB")
+        if max_width and img.width > max_width:
+            img = img.resize((max_width, round(img.height * max_width / img.width)), Image.LANCZOS)
+        out = io.BytesIO()
+        img.save(out, fmt, **save_kwargs)
+        return out.getvalue()
+
+class ChartStore:
+    """
+    Encoded chart images by file path: a bounded in-memory LRU (`max_bytes`) in front of the chart
+    files on disk, which stay the spill tier. Besides the image itself it keeps lazily derived variants:
+      - thumbnail(path): small WebP for the Reports list
+      - png(path): PNG for consumers without WebP support (Excel)
+    Chart file names are content hashes, so an entry never goes stale; discard() drops a deleted chart.
+    """
+
+    def __init__(self, max_bytes: int = 64 << 20):
+        self.max_bytes = max_bytes
+        self._items: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def _get(self, key: Tuple[str, str]) -> Optional[bytes]:
+        with self._lock:
+            data = self._items.get(key)
+            if data is not None:
+                self._items.move_to_end(key)
+            note_cache(data is not None)
+            return data
+
+    def _put(self, key: Tuple[str, str], data: bytes) -> None:
+        with self._lock:
+            old = self._items.pop(key, None)
+            self._size -= len(old) if old is not None else 0
+            if len(data) > self.max_bytes:
+                return
+            self._items[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, dropped = self._items.popitem(last=False)
+                self._size -= len(dropped)
+
+    def put(self, path: str, data: bytes) -> None:
+        """Keep freshly encoded bytes of the chart at `path` (already written to disk)."""
+        self._put((os.path.abspath(path), "full"), data)
+
+    def get(self, path: Optional[str]) -> Optional[bytes]:
+        """The encoded chart, read from disk on a miss; None when the file is gone."""
+        if not path:
+            return None
+        key = (os.path.abspath(path), "full")
+        data = self._get(key)
+        if data is None:
+            try:
+                with open(key[0], "rb") as f:
+                    data = f.read()
+            except OSError:
+                return None
+            self._put(key, data)
+        return data
+
+    def _variant(self, path: Optional[str], variant: str, **kwargs) -> Optional[bytes]:
+        if not path:
+            return None
+        key = (os.path.abspath(path), variant)
+        data = self._get(key)
+        if data is None:
+            full = self.get(path)
+            if full is None:
+                return None
+            with span("chart.variant", variant=variant):
+                data = _reencode(full, **kwargs)
+            self._put(key, data)
+        return data
+
+    def thumbnail(self, path: Optional[str], width: int = THUMB_WIDTH) -> Optional[bytes]:
+        return self._variant(path, f"thumb{width}", max_width=width, quality=80)
+
+    def png(self, path: Optional[str]) -> Optional[bytes]:
+        if path and mime_type(path) == "image/png":
+            return self.get(path)
+        return self._variant(path, "png", fmt="PNG", optimize=True)
+
+    def discard(self, path: str) -> None:
+        path = os.path.abspath(path)
+        with self._lock:
+            for key in [k for k in self._items if k[0] == path]:
+                self._size -= len(self._items.pop(key))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"items": len(self._items), "memory_mb": round(self._size / 2**20, 2)}
+
+_STORE: Optional[ChartStore] = None
+_STORE_LOCK = threading.Lock()
+
+def get_chart_store() -> ChartStore:
+    """Process-wide chart store; CHART_MEM_MB (default 64) bounds its memory."""
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            _STORE = ChartStore(max_bytes=int(float(get_setting("CHART_MEM_MB", 64)) * 2**20))
+        return _STORE
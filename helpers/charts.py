@@ -1,59 +1,254 @@
 # helpers/charts.py
+import io
 import os
-import matplotlib
-matplotlib.use("Agg", force=True)  # headless backend
+import json
+import time
+import hashlib
+import threading
+import multiprocessing as mp
+from functools import lru_cache
+from types import SimpleNamespace
 
-import matplotlib.pyplot as plt
-import seaborn as sns
 import streamlit as st
 import pandas as pd
-from datetime import datetime
 
-def _unique_suffix() -> str:
-    return datetime.now().strftime("%Y%m%d%H%M%S")
+from .chart_reduce import POINT_BUDGETS, reduce_for_chart, reduction_note
+from .chart_store import get_chart_store
+from .paths import get_setting
+from .tracing import note_cache, span, traced
 
-def plot_chart(folder_path, chart_type, data, x_col, y_col):
+CHART_TYPES = ("Line Chart", "Bar Chart", "Scatter Plot", "Pie Chart")
+
+CHART_FORMATS = ("webp", "png")
+# Encoder options: lossless WebP is ~3x smaller than PNG for flat chart colours.
+_SAVE_KWARGS = {"webp": {"lossless": True}, "png": {"optimize": True}}
+CHART_EXTENSIONS = (".webp", ".png")
+
+def chart_style() -> dict:
     """
-    Simple plotting utility that saves the figure and returns (chart_path, chart_name).
+    Everything besides the data that changes the pixels; part of the content key.
+    CHART_FORMAT (webp | png, default webp) and CHART_DPI (default 100) are settings.
     """
-    data = data.copy()
-    data[x_col] = data[x_col].astype(str)
-    data[y_col] = pd.to_numeric(data[y_col], errors='coerce').fillna(0)
+    fmt = str(get_setting("CHART_FORMAT", "webp")).lower()
+    return {"figsize": (8, 5), "dpi": int(get_setting("CHART_DPI", 100)),
+            "format": fmt if fmt in CHART_FORMATS else "webp", "version": 2}
 
-    os.makedirs(folder_path, exist_ok=True)
-    plt.close('all')
-    fig, ax = plt.subplots(figsize=(8, 5))
+INDEX_NAME = "_index.json"
+_INDEX_LOCK = threading.Lock()
+_LAST_GC = {}
+
+@lru_cache(maxsize=1)
+def _plotting() -> SimpleNamespace:
+    """matplotlib (headless) + seaborn, imported on the first render; pages without charts never load them."""
+    with span("load.plotting"):
+        import matplotlib
+        matplotlib.use("Agg", force=True)  # headless backend
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+        from matplotlib.ticker import MaxNLocator
+    return SimpleNamespace(plt=plt, sns=sns, MaxNLocator=MaxNLocator)
+
+def chart_key(chart_type, data, x_col, y_col, budget=None, style=None) -> str:
+    """Content hash of (chart type, pivot values, columns, style, point budget)."""
+    h = hashlib.sha1()
+    budget = budget or POINT_BUDGETS.get(chart_type)
+    style = style or chart_style()
+    h.update(json.dumps([chart_type, str(x_col), str(y_col), style, budget], default=str).encode())
+    cols = data[[x_col, y_col]]
+    h.update(str(cols.dtypes.tolist()).encode())
+    h.update(pd.util.hash_pandas_object(cols, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+@traced("chart.render")
+def _render(folder_path, chart_type, data, x_col, y_col, budget=None, style=None):
+    """render_chart + the reduction info: (chart_path, chart_name, info)."""
+    if chart_type not in CHART_TYPES:
+        raise ValueError(f"Chart type '{chart_type}' is not supported!")
+    style = style or chart_style()
+
+    # bound the number of bars / slices / points whatever the group count
+    reduced, info = reduce_for_chart(chart_type, data, x_col, y_col, budget)
 
     safe_type = chart_type.replace(' ', '_')
-    chart_name = f"{safe_type}_{x_col}_by_{y_col}_{_unique_suffix()}.png"
+    chart_name = f"{safe_type}_{x_col}_by_{y_col}_{chart_key(chart_type, data, x_col, y_col, budget, style)[:16]}.{style['format']}"
     chart_path = os.path.join(folder_path, chart_name)
+    hit = os.path.exists(chart_path)
+    note_cache(hit)
+    if hit:
+        os.utime(chart_path)  # keep hot charts away from gc
+        return chart_path, chart_name, info
+
+    data = reduced.copy()
+    data[y_col] = pd.to_numeric(data[y_col], errors='coerce').fillna(0)
+    if info["method"] != "hexbin":
+        data[x_col] = data[x_col].astype(str)
+
+    os.makedirs(folder_path, exist_ok=True)
+    mpl = _plotting()
+    plt, sns = mpl.plt, mpl.sns
+    plt.close('all')
+    fig, ax = plt.subplots(figsize=style["figsize"], dpi=style["dpi"])
 
     try:
         if chart_type == "Line Chart":
-            sns.lineplot(data=data, x=x_col, y=y_col, marker='o', ax=ax)
+            if len(data) > 100:
+                ax.plot(data[x_col], data[y_col], linewidth=1)
+                ax.set_xlabel(str(x_col)); ax.set_ylabel(str(y_col))
+            else:
+                sns.lineplot(data=data, x=x_col, y=y_col, marker='o', ax=ax)
         elif chart_type == "Bar Chart":
             sns.barplot(data=data, x=x_col, y=y_col, ax=ax)
         elif chart_type == "Scatter Plot":
-            sns.scatterplot(data=data, x=x_col, y=y_col, ax=ax)
+            if info["method"] == "hexbin":
+                hb = ax.hexbin(pd.to_numeric(data[x_col]), data[y_col], gridsize=60, mincnt=1, cmap="viridis")
+                fig.colorbar(hb, ax=ax, label="count")
+                ax.set_xlabel(str(x_col)); ax.set_ylabel(str(y_col))
+            elif len(data) > 1000:
+                # seaborn's categorical scatter is ~30x slower than plain matplotlib at this size
+                ax.scatter(data[x_col], data[y_col], s=8, alpha=0.6)
+                ax.set_xlabel(str(x_col)); ax.set_ylabel(str(y_col))
+            else:
+                sns.scatterplot(data=data, x=x_col, y=y_col, ax=ax)
         elif chart_type == "Pie Chart":
             pie_data = data.groupby(x_col)[y_col].sum()
             pie_data.plot.pie(autopct='%1.1f%%', startangle=90, ax=ax)
             ax.set_ylabel('')
-        else:
-            st.error(f"❌ Chart type '{chart_type}' is not supported!")
-            return None, None
 
-        fig.tight_layout()
-        fig.savefig(chart_path, bbox_inches='tight')
+        if chart_type != "Pie Chart" and info["method"] != "hexbin" and len(data) > 12:
+            if chart_type != "Bar Chart":
+                # one tick label per category is what makes big line/scatter charts slow to draw
+                ax.xaxis.set_major_locator(mpl.MaxNLocator(nbins=12))
+            plt.setp(ax.get_xticklabels(), rotation=45, ha="right")
+        note = reduction_note(info)
+        if note:
+            ax.set_title(note, fontsize=9, color="#666666")
+
+        # layout + rasterization + encoding, separate from building the artists above
+        with span("chart.encode", format=style["format"]) as sp:
+            fig.tight_layout()
+            buf = io.BytesIO()
+            fig.savefig(buf, bbox_inches='tight', format=style["format"], pil_kwargs=_SAVE_KWARGS[style["format"]])
+            encoded = buf.getvalue()
+            sp.set(bytes=len(encoded))
+            # write-then-rename so a concurrent cache hit never sees a half-written file
+            tmp_path = f"{chart_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(encoded)
+            os.replace(tmp_path, chart_path)
+        if mp.parent_process() is None:  # pool workers would only fill their own copy of the store
+            get_chart_store().put(chart_path, encoded)
+        return chart_path, chart_name, info
+    finally:
         plt.close(fig)
-        return chart_path, chart_name
+
+def render_chart(folder_path, chart_type, data, x_col, y_col, budget=None):
+    """
+    Render and save one chart; returns (chart_path, chart_name) and raises on failure.
+    Content-addressed: an identical chart already on disk is returned without touching matplotlib.
+    Large inputs are reduced first (see chart_reduce), so render time is bounded.
+    Free of Streamlit calls so it can run inside worker processes.
+    """
+    return _render(folder_path, chart_type, data, x_col, y_col, budget)[:2]
+
+def plot_chart(folder_path, chart_type, data, x_col, y_col, budget=None):
+    """
+    Simple plotting utility that saves the figure and returns (chart_path, chart_name).
+    """
+    if chart_type not in CHART_TYPES:
+        st.error(f"❌ Chart type '{chart_type}' is not supported!")
+        return None, None
+    try:
+        return render_chart(folder_path, chart_type, data, x_col, y_col, budget)
     except Exception as e:
         st.error(f"❌ Chart rendering error: {e}")
         return None, None
 
-def remove_chart(file_path):
+# ===== Reference index + garbage collection =====
+def _load_index(folder_path):
     try:
+        with open(os.path.join(folder_path, INDEX_NAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_index(folder_path, index):
+    path = os.path.join(folder_path, INDEX_NAME)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f)
+    os.replace(tmp, path)
+
+def add_chart_ref(chart_path, ref):
+    """Record that report `ref` uses this chart (identical charts are shared between reports)."""
+    if not chart_path:
+        return
+    folder_path, name = os.path.split(os.path.abspath(chart_path))
+    with _INDEX_LOCK:
+        index = _load_index(folder_path)
+        refs = index.setdefault(name, [])
+        if ref not in refs:
+            refs.append(ref)
+            _save_index(folder_path, index)
+
+def release_chart_ref(chart_path, ref) -> int:
+    """Drop one reference; returns how many references remain."""
+    folder_path, name = os.path.split(os.path.abspath(chart_path))
+    with _INDEX_LOCK:
+        index = _load_index(folder_path)
+        refs = [r for r in index.get(name, []) if r != ref]
+        if refs:
+            index[name] = refs
+        else:
+            index.pop(name, None)
+        _save_index(folder_path, index)
+        return len(refs)
+
+def remove_chart(file_path, ref=None):
+    """
+    Remove a chart. With `ref`, only that report's reference is dropped and the
+    file is deleted once no other report uses it.
+    """
+    try:
+        if ref is not None and release_chart_ref(file_path, ref) > 0:
+            return
+        get_chart_store().discard(file_path)
         if os.path.isfile(file_path):
             os.remove(file_path)
     except Exception:
         pass
+
+def gc_charts(folder_path, grace_seconds=3600, max_age_seconds=7 * 24 * 3600, min_interval=600) -> int:
+    """
+    Delete chart files that no report references and that were not used for `grace_seconds`,
+    plus anything untouched for `max_age_seconds` (references of sessions that are long gone).
+    Runs at most once per `min_interval` seconds per folder; returns the number of files removed.
+    """
+    folder_path = os.path.abspath(folder_path)
+    now = time.time()
+    if now - _LAST_GC.get(folder_path, 0) < min_interval:
+        return 0
+    _LAST_GC[folder_path] = now
+
+    removed = 0
+    os.makedirs(folder_path, exist_ok=True)
+    with _INDEX_LOCK:
+        index = _load_index(folder_path)
+        for name in os.listdir(folder_path):
+            if not name.endswith((*CHART_EXTENSIONS, ".tmp")):
+                continue
+            path = os.path.join(folder_path, name)
+            try:
+                age = now - os.path.getmtime(path)
+            except OSError:
+                continue
+            if (not index.get(name) and age > grace_seconds) or age > max_age_seconds:
+                try:
+                    os.remove(path)
+                    get_chart_store().discard(path)
+                    index.pop(name, None)
+                    removed += 1
+                except OSError:
+                    pass
+        index = {k: v for k, v in index.items() if os.path.exists(os.path.join(folder_path, k))}
+        _save_index(folder_path, index)
+    return removed
@@ -0,0 +1,177 @@
+# helpers/column_index.py
+import unicodedata
+import zlib
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .i18n import load_language
+from .query_engine import normalize_question, query_schema
+from .tracing import traced
+
+DIM = 1024
+COLUMN_MIN_SCORE = 0.6   # cosine similarity needed to map a free phrase to a column
+HINT_MIN_SCORE = 0.4     # ... when the phrase is known to name a column ('by <hint>')
+VALUE_MIN_SCORE = 0.6    # ... to read a free phrase as a category value
+
+LOCALES_DIR = str(Path(__file__).resolve().parent.parent / "locales")
+
+@lru_cache(maxsize=1)
+def concept_groups() -> Tuple[Tuple[str, ...], ...]:
+    """
+    Concept groups from the locale labels `term_<concept>` ("revenue, sales, ..." in en.json, "doanh thu, ..."
+    in vi.json): a column whose name contains one term is also indexed under the others, so "doanh thu"
+    finds 'Revenue' and "city" finds 'Thành phố'.
+    """
+    en, vi = load_language("en", LOCALES_DIR), load_language("vi", LOCALES_DIR)
+    groups = []
+    for key in en:
+        if key.startswith("term_"):
+            terms = [t.strip().lower() for label in (en[key], vi[key]) for t in label.split(",")]
+            groups.append(tuple(dict.fromkeys(t for t in terms if t)))
+    return tuple(groups)
+
+# ===== Embeddings =====
+def fold(text: str) -> str:
+    """Normalized text without diacritics ('Thành phố' -> 'thanh pho')."""
+    text = unicodedata.normalize("NFD", normalize_question(text)).replace("đ", "d")
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+def _features(text: str) -> List[str]:
+    t = fold(text)
+    padded, compact = f" {t} ", t.replace(" ", "")
+    grams = [padded[i:i + n] for n in (2, 3) for i in range(len(padded) - n + 1)]
+    grams += ["~" + compact[i:i + 3] for i in range(len(compact) - 2)]  # spacing-insensitive
+    grams += ["#" + w for w in t.split()]
+    grams += ["@" + "".join(sorted(w)) for w in t.split() if len(w) > 2]  # survives transposed letters
+    return grams
+
+def embed(texts: Sequence[str], dim: int = DIM) -> np.ndarray:
+    """
+    Signed feature hashing of character 2/3-grams, words and letter sets into `dim` buckets, L2-normalized
+    (inner product = cosine). Deterministic across processes; no model, no network.
+    """
+    rows, cols, signs = [], [], []
+    for r, text in enumerate(texts):
+        for g in _features(text):
+            h = zlib.crc32(g.encode("utf-8"))
+            rows.append(r)
+            cols.append(h % dim)
+            signs.append(1.0 if (h >> 31) & 1 else -1.0)
+    out = np.zeros((len(texts), dim), dtype=np.float32)
+    np.add.at(out, (np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)), signs)
+    norms = np.linalg.norm(out, axis=1, keepdims=True)
+    np.divide(out, norms, out=out, where=norms > 0)
+    return out
+
+# ===== Index =====
+def _faiss():
+    try:
+        import faiss
+        return faiss
+    except ImportError:
+        return None
+
+class _FlatIndex:
+    """Exact inner-product search: FAISS IndexFlatIP when available, numpy matmul otherwise."""
+
+    def __init__(self, vectors: np.ndarray):
+        self.size = len(vectors)
+        faiss = _faiss()
+        if faiss is not None and self.size:
+            self._index = faiss.IndexFlatIP(vectors.shape[1])
+            self._index.add(np.ascontiguousarray(vectors))
+            self._matrix = None
+        else:
+            self._index, self._matrix = None, vectors
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        k = min(k, self.size)
+        if not k:
+            return np.empty((len(queries), 0), np.float32), np.empty((len(queries), 0), np.int64)
+        if self._index is not None:
+            return self._index.search(np.ascontiguousarray(queries), k)
+        sims = queries @ self._matrix.T
+        idx = np.argsort(-sims, axis=1, kind="stable")[:, :k]
+        return np.take_along_axis(sims, idx, axis=1), idx
+
+def _terms_in(alias: str, group: Sequence[str]) -> bool:
+    padded = f" {fold(alias)} "
+    return any(f" {fold(t)} " in padded for t in group)
+
+class ColumnIndex:
+    """
+    Nearest-neighbour lookup of question phrases against one dataset's columns and values.
+      - column entries: name aliases + EN/VI locale labels of the concepts they contain
+      - value entries: top values of categorical text columns
+    Used by the question planner as its resolver for phrases no exact match claimed.
+    """
+
+    def __init__(self, columns: Sequence[Tuple[str, Any, str]], values: Sequence[Tuple[str, Any, Any]]):
+        self._columns = [(name, kind) for _, name, kind in columns]
+        self._values = [(name, value) for _, name, value in values]
+        self._col_index = _FlatIndex(embed([t for t, _, _ in columns]))
+        self._val_index = _FlatIndex(embed([t for t, _, _ in values]))
+
+    def __len__(self) -> int:
+        return self._col_index.size + self._val_index.size
+
+    def match_columns(self, texts: Sequence[str], numeric: Optional[bool] = None,
+                      min_score: float = COLUMN_MIN_SCORE) -> List[Optional[Tuple[Any, float]]]:
+        """Best (column, score) per text (None below min_score); numeric=True/False restricts the kind."""
+        if not texts:
+            return []
+        scores, idx = self._col_index.search(embed(texts), 8)
+        out = []
+        for row_s, row_i in zip(scores, idx):
+            hit = None
+            for s, i in zip(row_s, row_i):
+                if i < 0 or s < min_score:
+                    break
+                name, kind = self._columns[i]
+                if numeric is None or (kind == "numeric") == numeric:
+                    hit = (name, float(s))
+                    break
+            out.append(hit)
+        return out
+
+    def match_values(self, texts: Sequence[str],
+                     min_score: float = VALUE_MIN_SCORE) -> List[Optional[Tuple[Any, Any, float]]]:
+        """Best (column, value, score) per text (None below min_score)."""
+        if not texts:
+            return []
+        scores, idx = self._val_index.search(embed(texts), 1)
+        return [(*self._values[i[0]], float(s[0])) if len(i) and i[0] >= 0 and s[0] >= min_score else None
+                for s, i in zip(scores, idx)]
+
+    def resolve_column(self, text: str, numeric: Optional[bool] = None,
+                       min_score: float = HINT_MIN_SCORE) -> Optional[Any]:
+        hit = self.match_columns([text], numeric, min_score)[0]
+        return hit[0] if hit else None
+
+@traced("qa.index_build")
+def build_column_index(schema) -> ColumnIndex:
+    columns, values = [], []
+    for col in schema:
+        texts = list(col.aliases)
+        for group in concept_groups():
+            if any(_terms_in(a, group) for a in col.aliases):
+                texts += group
+        columns += [(t, col.name, col.kind) for t in dict.fromkeys(texts)]
+        values += [(norm, col.name, orig) for norm, orig in col.values]
+    return ColumnIndex(columns, values)
+
+@lru_cache(maxsize=16)
+def column_index_for_schema(schema) -> ColumnIndex:
+    """Index of a query_schema(), built once per dataset signature (the 16 most recent are kept)."""
+    return build_column_index(schema)
+
+def column_index_for(df: pd.DataFrame) -> ColumnIndex:
+    """
+    Index for this frame, built once per dataset signature (column names, kinds, top values),
+    so re-uploads and cleaned copies with the same content share it.
+    """
+    return column_index_for_schema(query_schema(df))
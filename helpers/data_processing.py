@@ -1,16 +1,106 @@
 # helpers/data_processing.py
+import time
+from typing import Any, Dict, Tuple
+
+import numpy as np
 import pandas as pd
 
+from .tracing import traced
+
+# A string column becomes `category` when it has at most this many distinct values
+# and they make up no more than CATEGORY_MAX_RATIO of the rows.
+CATEGORY_MAX_UNIQUE = 10_000
+CATEGORY_MAX_RATIO = 0.5
+
+def _clean_text(s: pd.Series) -> pd.Series:
+    """Strip whitespace, keep missing values missing (no literal 'nan')."""
+    return s.astype("string[pyarrow]").str.strip()
+
+def _to_category(s: pd.Series, max_unique: int, max_ratio: float) -> pd.Series:
+    codes, uniques = pd.factorize(s, sort=True)
+    if len(uniques) > max_unique or len(uniques) > max_ratio * max(len(s), 1):
+        return s
+    return pd.Series(pd.Categorical.from_codes(codes, categories=uniques), index=s.index, name=s.name)
+
+def _compact_numeric(s: pd.Series) -> pd.Series:
+    """Lossless downcast: integers (and integral floats) to the smallest int type."""
+    if pd.api.types.is_float_dtype(s) or pd.api.types.is_integer_dtype(s):
+        return pd.to_numeric(s, downcast="integer")
+    return s
+
+def row_fingerprints(df: pd.DataFrame) -> np.ndarray:
+    """64-bit hash per row (values only); equal rows get equal fingerprints, also across chunks."""
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+def clean_chunk(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    The row-local rules of auto_clean for one chunk of a larger dataset: strip strings, fill numeric NaN.
+    Categories, downcasts and duplicate removal need whole columns and are left to the caller
+    (see helpers.out_of_core).
+    """
+    cols = []
+    for _, s in df.items():
+        if pd.api.types.is_object_dtype(s) or pd.api.types.is_string_dtype(s):
+            s = _clean_text(s)
+        elif pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+            s = s.fillna(0)
+        cols.append(s)
+    data = pd.DataFrame(dict(enumerate(cols)), index=df.index, copy=False)
+    data.columns = df.columns
+    return data
+
+@traced("clean")
+def auto_clean_with_report(df: pd.DataFrame,
+                           max_unique: int = CATEGORY_MAX_UNIQUE,
+                           max_ratio: float = CATEGORY_MAX_RATIO) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    One pass over the columns (input is not copied or modified):
+      - strip strings, then low-cardinality strings -> category
+      - fill numeric NaN with 0, then lossless integer downcast
+      - drop duplicate rows via 64-bit row fingerprints
+    Returns (cleaned, report) where report has bytes before/after and seconds per step.
+    """
+    steps = {"strip": 0.0, "categorize": 0.0, "fill": 0.0, "downcast": 0.0, "dedupe": 0.0}
+    bytes_before = int(df.memory_usage(deep=True).sum())
+
+    cols = []
+    for _, s in df.items():
+        if pd.api.types.is_object_dtype(s) or pd.api.types.is_string_dtype(s):
+            t0 = time.perf_counter(); s = _clean_text(s)
+            t1 = time.perf_counter(); s = _to_category(s, max_unique, max_ratio)
+            steps["strip"] += t1 - t0; steps["categorize"] += time.perf_counter() - t1
+        elif pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+            t0 = time.perf_counter(); s = s.fillna(0)
+            t1 = time.perf_counter(); s = _compact_numeric(s)
+            steps["fill"] += t1 - t0; steps["downcast"] += time.perf_counter() - t1
+        cols.append(s)
+
+    data = pd.DataFrame(dict(enumerate(cols)), index=df.index, copy=False)
+    data.columns = df.columns
+
+    t0 = time.perf_counter()
+    if len(data):
+        dup = pd.Series(row_fingerprints(data)).duplicated().to_numpy()
+        if dup.any():
+            data = data.loc[~dup]
+    steps["dedupe"] = time.perf_counter() - t0
+
+    bytes_after = int(data.memory_usage(deep=True).sum())
+    report = {
+        "rows_before": int(len(df)),
+        "rows_after": int(len(data)),
+        "bytes_before": bytes_before,
+        "bytes_after": bytes_after,
+        "bytes_saved": bytes_before - bytes_after,
+        "dtypes": {str(c): str(t) for c, t in data.dtypes.items()},
+        "seconds": {k: round(v, 4) for k, v in steps.items()},
+    }
+    return data, report
+
 def auto_clean_data(df: pd.DataFrame) -> pd.DataFrame:
     """
       - strip strings
       - fill numeric NaN with 0
       - drop duplicates
     """
-    data = df.copy()
-    for col in data.select_dtypes(include=["object", "string"]):
-        data[col] = data[col].astype(str).str.strip()
-    for col in data.select_dtypes(include=["number"]).columns:
-        data[col] = data[col].fillna(0)
-    data.drop_duplicates(inplace=True)
-    return data
+    return auto_clean_with_report(df)[0]
@@ -0,0 +1,159 @@
+# helpers/dataset_registry.py
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+from .paths import get_setting
+from .session_data import frame_bytes
+from .tracing import note_cache, span
+
+Key = Tuple[str, str]  # (content hash, kind) e.g. ("3f2a...", "raw") / ("3f2a...", "clean")
+
+class Lease:
+    """
+    A session's hold on one shared frame. Call release() when done; a lease that is garbage
+    collected (e.g. with the session state) releases itself.
+    """
+
+    def __init__(self, registry: "DatasetRegistry", key: Key, frame: pd.DataFrame):
+        self.key = key
+        self.frame = frame
+        self._registry = registry
+        self._finalizer = weakref.finalize(self, registry._release, key)
+
+    @property
+    def active(self) -> bool:
+        return self._finalizer.alive
+
+    @property
+    def shared(self) -> bool:
+        """True while other leases hold the frame too (releasing this one would free nothing)."""
+        return self.active and self._registry.refs(self.key) > 1
+
+    def release(self) -> None:
+        self._finalizer()  # runs at most once
+
+class _Entry:
+    __slots__ = ("frame", "nbytes", "refs", "idle_since")
+
+    def __init__(self, frame: pd.DataFrame):
+        self.frame = frame
+        self.nbytes = frame_bytes(frame)
+        self.refs = 0
+        self.idle_since: Optional[float] = None
+
+class DatasetRegistry:
+    """
+    Process-wide, reference-counted frames keyed by (content hash, kind), shared by every session:
+    ten analysts on the same upload hold one raw and one cleaned frame, and since the group-by
+    engine, catalog and column index are cached per frame object, those are shared too.
+      - acquire() returns a Lease; concurrent first loads of one key run the loader once
+      - at refcount zero an entry turns idle; idle entries are dropped after `idle_ttl` seconds or,
+        least recently released first, while the registry holds more than `max_bytes`
+    Frames handed out are shared: treat them as immutable.
+    """
+
+    def __init__(self, max_bytes: int = 1 << 30, idle_ttl: float = 300.0):
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        self._entries: Dict[Key, _Entry] = {}
+        self._idle: "OrderedDict[Key, None]" = OrderedDict()
+        self._loading: Dict[Key, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, kind: str, loader: Callable[[], pd.DataFrame]) -> Lease:
+        k = (key, kind)
+        lease = self._lease(k)
+        if lease is not None:
+            return lease
+        with self._lock:
+            load_lock = self._loading.setdefault(k, threading.Lock())
+        with load_lock:
+            lease = self._lease(k)  # another session may have loaded it meanwhile
+            if lease is not None:
+                return lease
+            try:
+                with span("registry.load", kind=kind) as sp:
+                    frame = loader()
+                    sp.set(rows=len(frame))
+                entry = _Entry(frame)
+                with self._lock:
+                    self._entries[k] = entry
+                    entry.refs = 1
+                    self._evict()
+            finally:
+                with self._lock:
+                    self._loading.pop(k, None)
+            return Lease(self, k, frame)
+
+    def _lease(self, k: Key) -> Optional[Lease]:
+        with self._lock:
+            entry = self._entries.get(k)
+            note_cache(entry is not None)
+            if entry is None:
+                return None
+            entry.refs += 1
+            entry.idle_since = None
+            self._idle.pop(k, None)
+            return Lease(self, k, entry.frame)
+
+    def refs(self, k: Key) -> int:
+        """Active leases on one entry (0 when it is not loaded)."""
+        with self._lock:
+            entry = self._entries.get(k)
+            return entry.refs if entry is not None else 0
+
+    def _release(self, k: Key) -> None:
+        with self._lock:
+            entry = self._entries.get(k)
+            if entry is None:
+                return
+            entry.refs -= 1
+            if entry.refs <= 0:
+                entry.refs = 0
+                entry.idle_since = time.monotonic()
+                self._idle[k] = None
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drop idle entries past their TTL, then the oldest idle ones while over max_bytes (lock held)."""
+        now = time.monotonic()
+        total = sum(e.nbytes for e in self._entries.values())
+        for k in list(self._idle):
+            entry = self._entries[k]
+            if now - entry.idle_since < self.idle_ttl and total <= self.max_bytes:
+                break
+            del self._entries[k], self._idle[k]
+            total -= entry.nbytes
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._evict()
+            entries = self._entries.values()
+            return {"datasets": len(self._entries), "idle": len(self._idle),
+                    "refs": sum(e.refs for e in entries),
+                    "memory_mb": round(sum(e.nbytes for e in entries) / 2**20, 1)}
+
+    def clear(self) -> None:
+        """Forget every entry (leases keep their frames; releasing them later is a no-op)."""
+        with self._lock:
+            self._entries.clear()
+            self._idle.clear()
+
+_REGISTRY: Optional[DatasetRegistry] = None
+_REGISTRY_LOCK = threading.Lock()
+
+def get_dataset_registry() -> DatasetRegistry:
+    """Process-wide registry; DATASET_REGISTRY_MB (default 1024) / DATASET_IDLE_TTL (seconds, default 300)."""
+    global _REGISTRY
+    with _REGISTRY_LOCK:
+        if _REGISTRY is None:
+            _REGISTRY = DatasetRegistry(
+                max_bytes=int(float(get_setting("DATASET_REGISTRY_MB", 1024)) * 2**20),
+                idle_ttl=float(get_setting("DATASET_IDLE_TTL", 300)),
+            )
+        return _REGISTRY
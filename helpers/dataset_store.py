@@ -0,0 +1,153 @@
+# helpers/dataset_store.py
+import hashlib
+import io
+import os
+import threading
+from typing import Iterable, Optional
+
+import pandas as pd
+import pyarrow as pa
+
+from .tracing import note_cache
+
+HASH_CHUNK = 1 << 20
+DEFAULT_MAX_BYTES = 2 << 30  # 2 GB on disk
+
+def content_hash(source, chunk_size: int = HASH_CHUNK) -> str:
+    """
+    Streaming BLAKE2b digest of bytes / path / binary file object.
+    Reads in chunks, so large files are never held twice.
+    """
+    h = hashlib.blake2b(digest_size=20)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source)
+        for i in range(0, len(view), chunk_size):
+            h.update(view[i:i + chunk_size])
+        return h.hexdigest()
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            for block in iter(lambda: f.read(chunk_size), b""):
+                h.update(block)
+        return h.hexdigest()
+    if isinstance(source, io.BytesIO):
+        return content_hash(source.getbuffer(), chunk_size)
+    pos = source.tell()
+    source.seek(0)
+    for block in iter(lambda: source.read(chunk_size), b""):
+        h.update(block)
+    source.seek(pos)
+    return h.hexdigest()
+
+def evict_lru(root: str, suffix: str, max_bytes: int) -> None:
+    """Delete the oldest-mtime `*suffix` files in root until their total size fits max_bytes."""
+    entries = []
+    for name in os.listdir(root):
+        if not name.endswith(suffix):
+            continue
+        p = os.path.join(root, name)
+        try:
+            st_ = os.stat(p)
+        except OSError:
+            continue
+        entries.append((st_.st_mtime, st_.st_size, p))
+    total = sum(e[1] for e in entries)
+    for _, size, p in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(p)
+            total -= size
+        except OSError:
+            pass
+
+class DatasetStore:
+    """
+    On-disk columnar cache of DataFrames keyed by (content hash, kind), e.g. kind="raw" / "clean".
+    Files are uncompressed Arrow IPC (Feather v2) so they can be memory-mapped back in.
+    Size-bounded: least recently used files are evicted once `max_bytes` is exceeded.
+    """
+
+    def __init__(self, root: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = os.path.abspath(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, key: str, kind: str) -> str:
+        return os.path.join(self.root, f"{key}.{kind}.arrow")
+
+    def has(self, key: str, kind: str) -> bool:
+        return os.path.exists(self._path(key, kind))
+
+    def get(self, key: str, kind: str) -> Optional[pd.DataFrame]:
+        path = self._path(key, kind)
+        try:
+            with pa.memory_map(path, "r") as source:
+                table = pa.ipc.open_file(source).read_all()
+            os.utime(path)  # mark as recently used
+        except (OSError, pa.ArrowInvalid):
+            note_cache(False)
+            return None
+        note_cache(True)
+        # pandas metadata in the file restores the original dtypes and index
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+
+    def open_table(self, key: str, kind: str) -> Optional[pa.Table]:
+        """The stored table memory-mapped, not converted: batches are paged in as they are read."""
+        path = self._path(key, kind)
+        try:
+            table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+            os.utime(path)
+        except (OSError, pa.ArrowInvalid):
+            note_cache(False)
+            return None
+        note_cache(True)
+        return table
+
+    def put_batches(self, key: str, kind: str, schema: pa.Schema, tables: Iterable[pa.Table]) -> pa.Table:
+        """
+        Stream tables into one file (data larger than memory) and return it memory-mapped.
+        The file appears only once complete; the mapping stays valid even if the file is evicted.
+        """
+        path = self._path(key, kind)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+                for table in tables:
+                    writer.write_table(table)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+        self.evict()
+        return table
+
+    def put(self, key: str, kind: str, df: pd.DataFrame) -> bool:
+        """
+        Persist df; returns False when the frame cannot be represented in Arrow
+        (e.g. mixed-type object columns) so callers just keep it in memory.
+        """
+        path = self._path(key, kind)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=None)
+            with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            os.replace(tmp, path)
+        except (pa.ArrowException, TypeError, ValueError, OSError):
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return False
+        self.evict()
+        return True
+
+    def evict(self) -> None:
+        """Drop least recently used files until the store fits in max_bytes."""
+        with self._lock:
+            evict_lru(self.root, ".arrow", self.max_bytes)
+
+    def clear(self) -> None:
+        for name in os.listdir(self.root):
+            if name.endswith(".arrow"):
+                os.remove(os.path.join(self.root, name))
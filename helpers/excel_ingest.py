@@ -0,0 +1,211 @@
+# helpers/excel_ingest.py
+import atexit
+import hashlib
+import importlib.util
+import io
+import os
+import re
+import tempfile
+import threading
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Sequence
+
+import pandas as pd
+
+from .dataset_store import DatasetStore
+from .ingest import ProgressFn, _as_buffer
+from .paths import get_setting
+from .process_pool import spawn_pool
+from .tracing import span, traced
+
+PARALLEL_MIN_CELLS = 500_000   # smaller workbooks are parsed in-process (spawning workers costs more)
+SHEET_COLUMN = "Sheet"         # added when several sheets are stacked into one frame
+
+_NS_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+_DIMENSION = re.compile(rb'<(?:\w+:)?dimension\s+ref="\$?([A-Z]+)\$?(\d+)(?::\$?([A-Z]+)\$?(\d+))?"')
+
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_LOCK = threading.Lock()
+
+# ===== Sheet listing =====
+def _column_number(letters: str) -> int:
+    n = 0
+    for ch in letters:
+        n = n * 26 + ord(ch) - 64
+    return n
+
+def _sheet_dimension(zf: zipfile.ZipFile, member: str) -> Dict[str, Optional[int]]:
+    """Rows / columns from the <dimension> element at the top of the sheet XML (first 64 KB only)."""
+    try:
+        with zf.open(member) as f:
+            m = _DIMENSION.search(f.read(1 << 16))
+    except KeyError:
+        m = None
+    if m is None:
+        return {"rows": None, "columns": None}
+    c1, r1, c2, r2 = m.group(1).decode(), int(m.group(2)), (m.group(3) or m.group(1)).decode(), int(m.group(4) or m.group(2))
+    return {"rows": r2 - r1 + 1, "columns": _column_number(c2) - _column_number(c1) + 1}
+
+@traced("ingest.xlsx_sheets")
+def list_sheets(source) -> List[Dict[str, Any]]:
+    """
+    [{"name", "rows", "columns", "hidden"}] in workbook order, read from the workbook and sheet XML
+    headers without loading any cells. rows counts the header row; rows / columns are None when
+    the writer left out the sheet dimension (or for legacy .xls).
+    """
+    data = source if isinstance(source, (str, os.PathLike)) else io.BytesIO(_as_buffer(source))
+    try:
+        with zipfile.ZipFile(data) as zf:
+            rels = {r.get("Id"): r.get("Target") for r in ET.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+                    if r.get("Type", "").endswith("/worksheet")}
+            sheets = []
+            for el in ET.fromstring(zf.read("xl/workbook.xml")).iter():
+                if not el.tag.endswith("}sheet") or el.get(_NS_REL) not in rels:
+                    continue  # chart sheets have no cells
+                target = rels[el.get(_NS_REL)]
+                member = target.lstrip("/") if target.startswith("/") else f"xl/{target}"
+                sheets.append({"name": el.get("name"), **_sheet_dimension(zf, member),
+                               "hidden": el.get("state", "visible") != "visible"})
+            return sheets
+    except (zipfile.BadZipFile, KeyError, ET.ParseError):
+        if not isinstance(data, (str, os.PathLike)):
+            data.seek(0)
+        return [{"name": name, "rows": None, "columns": None, "hidden": False}
+                for name in pd.ExcelFile(data).sheet_names]
+
+def sheet_header(source, sheet: str) -> List[str]:
+    """Column names of one sheet (its first row)."""
+    data = source if isinstance(source, (str, os.PathLike)) else io.BytesIO(_as_buffer(source))
+    return [str(c) for c in pd.read_excel(data, sheet_name=sheet, nrows=0, engine=excel_engine()).columns]
+
+# ===== Parsing =====
+def excel_engine() -> str:
+    """EXCEL_ENGINE, or by default calamine (Rust reader, python-calamine) when installed, else openpyxl."""
+    engine = str(get_setting("EXCEL_ENGINE", "auto")).lower()
+    if engine != "auto":
+        return engine
+    return "calamine" if importlib.util.find_spec("python_calamine") else "openpyxl"
+
+def sheet_kind(sheet: str, usecols: Optional[Sequence[str]] = None) -> str:
+    """DatasetStore kind of one parsed sheet (+ column selection) of a workbook."""
+    spec = "\x00".join([sheet, *sorted(usecols or [])])
+    return "sheet-" + hashlib.blake2b(spec.encode("utf-8"), digest_size=8).hexdigest()
+
+def read_sheet(source, sheet: str, usecols: Optional[Sequence[str]] = None,
+               engine: Optional[str] = None) -> pd.DataFrame:
+    """One sheet; with `usecols`, only those columns (names missing from this sheet are skipped)."""
+    data = source if isinstance(source, (str, os.PathLike)) else io.BytesIO(_as_buffer(source))
+    wanted = set(usecols) if usecols else None
+    return pd.read_excel(data, sheet_name=sheet, engine=engine or excel_engine(),
+                         usecols=(lambda c: str(c) in wanted) if wanted else None)
+
+def _parse_sheet(path: str, sheet: str, usecols: Optional[Sequence[str]], engine: str,
+                 store_root: Optional[str], store_max_bytes: int, key: Optional[str]) -> Optional[pd.DataFrame]:
+    """Worker body: parse and persist to the store; returns the frame only when it could not be stored."""
+    df = read_sheet(path, sheet, usecols, engine)
+    if store_root and key and DatasetStore(store_root, store_max_bytes).put(key, sheet_kind(sheet, usecols), df):
+        return None
+    return df
+
+def _default_workers() -> int:
+    return max(1, min(int(get_setting("EXCEL_WORKERS", 4)), os.cpu_count() or 1))
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """Process pool of sheet parsers (see spawn_pool)."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = spawn_pool(workers)
+        return _POOL
+
+def shutdown_pool() -> None:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.shutdown(wait=True, cancel_futures=True)
+            _POOL = None
+
+atexit.register(shutdown_pool)
+
+@traced("ingest.xlsx")
+def read_sheets(source, sheets: Optional[Sequence[str]] = None, usecols: Optional[Sequence[str]] = None, *,
+                store: Optional[DatasetStore] = None, key: Optional[str] = None,
+                workers: Optional[int] = None, on_progress: ProgressFn = None) -> Dict[str, pd.DataFrame]:
+    """
+    Parse `sheets` (default: the first one) into {name: frame}. With a store and the workbook's content
+    `key`, sheets parsed before are memory-mapped back from the cache and new ones are written to it.
+    Big workbooks are parsed one sheet per worker process (EXCEL_WORKERS, default min(4, CPUs)).
+    """
+    info = list_sheets(source)
+    names = list(sheets) if sheets else [info[0]["name"]]
+    out: Dict[str, Optional[pd.DataFrame]] = {}
+    if store is not None and key:
+        for name in names:
+            df = store.get(key, sheet_kind(name, usecols))
+            if df is not None:
+                out[name] = df
+    todo = [n for n in names if n not in out]
+    engine = excel_engine()
+    cells = sum((s["rows"] or 0) * (s["columns"] or 0) for s in info if s["name"] in todo)
+    workers = min(workers or _default_workers(), len(todo))
+
+    def done(name: str, df: Optional[pd.DataFrame]) -> None:
+        if df is None:  # stored by the worker
+            df = store.get(key, sheet_kind(name, usecols))
+        out[name] = df
+        if on_progress: on_progress(len(out) / len(names))
+
+    if workers > 1 and cells >= PARALLEL_MIN_CELLS:
+        root = store.root if store is not None and key else None
+        max_bytes = store.max_bytes if root else 0
+        path, tmp = source, None
+        if not isinstance(source, (str, os.PathLike)):
+            # workers open the workbook from disk rather than receiving its bytes once per sheet
+            fd, tmp = tempfile.mkstemp(suffix=".xlsx", dir=root)
+            with os.fdopen(fd, "wb") as f:
+                f.write(_as_buffer(source))
+            path = tmp
+        try:
+            with span("ingest.xlsx_parallel", sheets=len(todo), workers=workers):
+                pool = _get_pool(workers)
+                futures = {n: pool.submit(_parse_sheet, os.fspath(path), n, usecols, engine, root, max_bytes, key)
+                           for n in todo}
+                for name, fut in futures.items():
+                    done(name, fut.result())
+        except BrokenProcessPool:
+            shutdown_pool()  # a worker died (OOM); parse what is left in-process
+        finally:
+            if tmp is not None:
+                os.remove(tmp)
+    for name in todo:
+        if name not in out:
+            df = read_sheet(source, name, usecols, engine)
+            if store is not None and key:
+                store.put(key, sheet_kind(name, usecols), df)
+            done(name, df)
+    return {name: out[name] for name in names}
+
+def sheet_column(frames: Dict[str, pd.DataFrame]) -> str:
+    """SHEET_COLUMN, or "Sheet.1", "Sheet.2"... (pandas' duplicate-header style) when a sheet already has it."""
+    taken = {str(c) for df in frames.values() for c in df.columns}
+    name, i = SHEET_COLUMN, 0
+    while name in taken:
+        i += 1
+        name = f"{SHEET_COLUMN}.{i}"
+    return name
+
+def read_workbook(source, sheets: Optional[Sequence[str]] = None, usecols: Optional[Sequence[str]] = None,
+                  **kwargs) -> pd.DataFrame:
+    """
+    The selected sheets as one frame: a single sheet as is, several stacked with a leading
+    sheet_column() label (columns missing from a sheet are NaN there). See read_sheets for kwargs.
+    """
+    frames = read_sheets(source, sheets, usecols, **kwargs)
+    if len(frames) == 1:
+        return next(iter(frames.values()))
+    label = sheet_column(frames)
+    return pd.concat([df.assign(**{label: name})[[label, *df.columns]]
+                      for name, df in frames.items()], ignore_index=True)
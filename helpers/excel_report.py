@@ -1,7 +1,22 @@
 # helpers/excel_report.py
+import io
 import os
+import zipfile
+from typing import Callable, Optional
+
+import numpy as np
 import pandas as pd
 
+from .chart_store import get_chart_store
+from .session_data import load_frame
+from .tracing import traced
+
+EXPORT_DIR = "./exports"
+EXCEL_MAX_ROWS = 1_048_576          # per sheet, header included
+DATA_ROW_LIMIT = 200_000            # default rows exported to DATA (None = all rows)
+BATCH_ROWS = 20_000                 # rows converted from pandas at a time
+_EXCEL_EPOCH = pd.Timestamp("1899-12-30")
+
 def _unique_sheetname(name: str, used: set, maxlen: int = 31) -> str:
     """Excel-safe & unique sheet name."""
     invalid = '[]:*?/\\'
@@ -17,63 +32,193 @@ def _unique_sheetname(name: str, used: set, maxlen: int = 31) -> str:
     used.add(name)
     return name
 
-def generate_excel_report(df: pd.DataFrame, reports: list, filename: str) -> str:
+def _export_path(filename: str, ext: str) -> str:
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    return os.path.abspath(os.path.join(EXPORT_DIR, f"{filename}.{ext}"))
+
+# ===== Row-streaming writer =====
+def _column_cells(ws, s: pd.Series, fmts: dict):
+    """(write method, python values with None for missing, cell format) for one column slice."""
+    if pd.api.types.is_bool_dtype(s) and isinstance(s.dtype, np.dtype):
+        return ws.write_boolean, s.tolist(), None
+    if pd.api.types.is_datetime64_any_dtype(s):
+        if getattr(s.dt, "tz", None) is not None:
+            s = s.dt.tz_localize(None)
+        # Excel stores dates as day serials: one vectorised subtraction instead of a datetime per cell
+        days = ((s - _EXCEL_EPOCH) / pd.Timedelta(days=1)).to_numpy(dtype="float64", na_value=np.nan)
+        vals = days.astype(object)
+        vals[np.isnan(days)] = None
+        return ws.write_number, vals.tolist(), fmts["date"]
+    if pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+        arr = s.to_numpy(dtype="float64", na_value=np.nan)
+        vals = arr.astype(object)
+        vals[~np.isfinite(arr)] = None
+        return ws.write_number, vals.tolist(), None
+    vals = s.to_numpy(dtype=object)
+    vals[s.isna().to_numpy()] = None
+    return ws.write_string, [v if v is None or isinstance(v, str) else str(v) for v in vals], None
+
+def _write_frame(ws, df: pd.DataFrame, fmts: dict, start: int = 0, stop: Optional[int] = None,
+                 extra: Optional[dict] = None, progress: Optional[Callable[[int], None]] = None) -> int:
+    """
+    Write header + df rows [start, stop) top to bottom, BATCH_ROWS at a time.
+    `extra` maps row -> [(col, write, value, fmt)] for cells that share rows with the table
+    (constant_memory flushes a row as soon as a later one is written, so everything goes in row order).
+    Returns the number of sheet rows written.
+    """
+    stop = len(df) if stop is None else min(stop, len(df))
+    extra = extra or {}
+    for c, name in enumerate(df.columns):
+        ws.write_string(0, c, str(name), fmts["header"])
+    for col, write, value, fmt in extra.get(0, ()):
+        write(0, col, value, fmt)
+
+    row = 1
+    for b0 in range(start, stop, BATCH_ROWS):
+        block = df.iloc[b0:min(b0 + BATCH_ROWS, stop)]
+        cols = [_column_cells(ws, s, fmts) for _, s in block.items()]
+        for i in range(len(block)):
+            for c, (write, vals, fmt) in enumerate(cols):
+                v = vals[i]
+                if v is not None:
+                    write(row, c, v, fmt)
+            for col, write, value, fmt in extra.get(row, ()):
+                write(row, col, value, fmt)
+            row += 1
+        if progress:
+            progress(len(block))
+    for r in sorted(k for k in extra if k >= row):
+        for col, write, value, fmt in extra[r]:
+            write(r, col, value, fmt)
+    return row
+
+@traced("export.excel")
+def generate_excel_report(df: pd.DataFrame, reports: list, filename: str,
+                          data_row_limit: Optional[int] = DATA_ROW_LIMIT,
+                          split_sheets: bool = True,
+                          progress: Optional[Callable[..., None]] = None) -> str:
     """
     Excel output with:
-      - 'DATA' sheet (first 200k rows)
+      - 'DATA' sheet (first `data_row_limit` rows, None = all; with split_sheets,
+        rows beyond Excel's limit continue on DATA_2, DATA_3, ...)
       - For each report sheet:
           * Pivot table at A1
           * Chart image at F1
           * AI Insight at F24
+    Streams rows in constant_memory mode; the report dicts are not modified.
+    `progress(stage, fraction)` is called per batch / report sheet; an exception it raises
+    (e.g. JobCancelled) aborts the export and removes the partial file.
     Returns absolute path.
     """
-    os.makedirs("./exports", exist_ok=True)
-    out_path = os.path.abspath(os.path.join("./exports", f"{filename}.xlsx"))
+    out_path = _export_path(filename, "xlsx")
+    progress = progress or (lambda stage=None, fraction=None: None)
 
     # Make sheet names safe/unique
-    used = set()
-    for r in reports:
-        r["sheet_name"] = _unique_sheetname(str(r.get("sheet_name", "sheet")), used)
+    used = {"DATA"}
+    names = [_unique_sheetname(str(r.get("sheet_name", "sheet")), used) for r in reports]
 
-    with pd.ExcelWriter(out_path, engine="xlsxwriter") as writer:
-        wb = writer.book
+    import xlsxwriter  # the Excel writer loads on the first export, not with the app
+    wb = xlsxwriter.Workbook(out_path, {"constant_memory": True, "nan_inf_to_errors": True})
+    ok = False
+    try:
+        fmts = {
+            "header": wb.add_format({"bold": True, "border": 1, "align": "center", "valign": "top"}),
+            "date": wb.add_format({"num_format": "yyyy-mm-dd hh:mm:ss"}),
+        }
         wrap = wb.add_format({"text_wrap": True, "valign": "top"})
         note = wb.add_format({"italic": True, "font_color": "#666666"})
 
-        # 1) DATA sheet
+        # 1) DATA sheet(s)
         if isinstance(df, pd.DataFrame) and not df.empty:
-            df.head(200_000).to_excel(writer, sheet_name="DATA", index=False)
+            total = len(df) if data_row_limit is None else min(len(df), data_row_limit)
+            per_sheet = EXCEL_MAX_ROWS - 1
+            if not split_sheets:
+                total = min(total, per_sheet)
+            written = [0]
+            def on_rows(n):
+                written[0] += n
+                progress("data", written[0] / total)
+            progress("data", 0.0)
+            for part, start in enumerate(range(0, total, per_sheet)):
+                ws = wb.add_worksheet("DATA" if part == 0 else _unique_sheetname(f"DATA_{part + 1}", used))
+                _write_frame(ws, df, fmts, start, min(start + per_sheet, total), progress=on_rows)
 
         # 2) Report sheets
-        for r in reports:
-            name = r["sheet_name"]
-            pt = r.get("pivot_table")
-
-            if isinstance(pt, pd.DataFrame) and not pt.empty:
-                # Writing pivot creates the worksheet
-                pt.to_excel(writer, sheet_name=name, index=False, startrow=0, startcol=0)
-                ws = writer.sheets[name]
-            else:
-                # Create empty worksheet and add a note
-                ws = wb.add_worksheet(name)
-                writer.sheets[name] = ws
-                ws.write("A1", "No pivot table data.", note)
-
+        for i, (r, name) in enumerate(zip(reports, names)):
+            progress("reports", i / len(reports))
+            ws = wb.add_worksheet(name)
             # Ensure column F is wide enough for image/insight
             ws.set_column("F:F", 60)
+            extra = {}
 
             # 2.1) Insert chart image at F1
             chart_path = r.get("chart_path")
-            if chart_path and os.path.exists(chart_path):
+            chart_png = get_chart_store().png(chart_path)  # Excel cannot show WebP
+            if chart_png:
                 try:
-                    ws.insert_image("F1", chart_path, {"x_scale": 0.6, "y_scale": 0.6, "object_position": 1})
+                    ws.insert_image("F1", f"{os.path.splitext(os.path.basename(chart_path))[0]}.png",
+                                    {"image_data": io.BytesIO(chart_png), "x_scale": 0.6, "y_scale": 0.6,
+                                     "object_position": 1})
                 except Exception as e:
-                    ws.write("F1", f"[Chart insert error] {e}", note)
+                    extra.setdefault(0, []).append((5, ws.write_string, f"[Chart insert error] {e}", note))
             else:
-                ws.write("F1", "No chart image found.", note)
+                extra.setdefault(0, []).append((5, ws.write_string, "No chart image found.", note))
 
-            # 2.2) Write AI Insight at F24
+            # 2.2) AI Insight at F24
             insight_text = str(r.get("insight", "")).strip() or "No insight."
-            ws.write("F24", insight_text, wrap)
+            extra.setdefault(23, []).append((5, ws.write_string, insight_text, wrap))
+
+            pt = load_frame(r.get("pivot_table"))  # spilled pivots are read back one sheet at a time
+            if isinstance(pt, pd.DataFrame) and not pt.empty:
+                _write_frame(ws, pt, fmts, extra=extra)
+            else:
+                extra.setdefault(0, []).insert(0, (0, ws.write_string, "No pivot table data.", note))
+                for row in sorted(extra):
+                    for col, write, value, fmt in extra[row]:
+                        write(row, col, value, fmt)
+        progress("save", 1.0)
+        ok = True
+    finally:
+        wb.close()
+        if not ok and os.path.exists(out_path):
+            os.remove(out_path)
+
+    return out_path
+
+# ===== Fast data-only exports =====
+@traced("export.parquet")
+def export_parquet(df: pd.DataFrame, filename: str) -> str:
+    """Whole dataset as Parquet (zstd); orders of magnitude faster than xlsx for big frames."""
+    out_path = _export_path(filename, "parquet")
+    df.to_parquet(out_path, index=False, compression="zstd")
+    return out_path
+
+def _write_csv_arrow(df: pd.DataFrame, f) -> None:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+
+    sink = pa.PythonFile(f, mode="w")
+    step = BATCH_ROWS * 10
+    for b0 in range(0, len(df), step):
+        table = pa.Table.from_pandas(df.iloc[b0:b0 + step], preserve_index=False)
+        # categories are written as their values
+        table = table.cast(pa.schema([
+            fld.with_type(fld.type.value_type) if pa.types.is_dictionary(fld.type) else fld
+            for fld in table.schema]))
+        pacsv.write_csv(table, sink, pacsv.WriteOptions(include_header=b0 == 0))
+
+@traced("export.csv_zip")
+def export_csv_zip(df: pd.DataFrame, filename: str) -> str:
+    """Whole dataset as a single CSV inside a zip (Arrow CSV writer, pandas fallback)."""
+    import pyarrow as pa
 
+    out_path = _export_path(filename, "csv.zip")
+    member = f"{filename}.csv"
+    try:
+        with zipfile.ZipFile(out_path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+            with zf.open(member, "w", force_zip64=True) as f:
+                _write_csv_arrow(df, f)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError):
+        # mixed-type object columns etc.: let pandas stringify them
+        df.to_csv(out_path, index=False, compression={"method": "zip", "archive_name": member})
     return out_path
@@ -0,0 +1,35 @@
+# helpers/frame_cache.py
+import threading
+import weakref
+from typing import Any, Callable, Dict, Tuple
+
+import pandas as pd
+
+from .tracing import note_cache
+
+# id(df) -> (weakref to df, {name: value}); entries vanish when the frame is garbage collected.
+_CACHE: Dict[int, Tuple[weakref.ref, Dict[str, Any]]] = {}
+_LOCK = threading.RLock()
+
+def _drop(key: int) -> None:
+    with _LOCK:
+        _CACHE.pop(key, None)
+
+def frame_cached(df: pd.DataFrame, name: str, factory: Callable[[pd.DataFrame], Any]) -> Any:
+    """
+    Memoize factory(df) per DataFrame object (not per content).
+    Frames are treated as immutable once handed to the dashboard, so derived
+    structures (group indexes, metadata...) stay valid for the frame's lifetime.
+    """
+    key = id(df)
+    with _LOCK:
+        entry = _CACHE.get(key)
+        if entry is None or entry[0]() is not df:
+            entry = (weakref.ref(df), {})
+            _CACHE[key] = entry
+            weakref.finalize(df, _drop, key)
+        slot = entry[1]
+        note_cache(name in slot)
+        if name not in slot:
+            slot[name] = factory(df)
+        return slot[name]
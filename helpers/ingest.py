@@ -0,0 +1,561 @@
+# helpers/ingest.py
+import io
+import json
+import os
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.json as pa_json
+
+from .tracing import traced
+
+DEFAULT_BLOCK_SIZE = 16 << 20      # bytes handed to one parser thread
+DEFAULT_SAMPLE_BYTES = 1 << 20     # bytes used to infer column types
+
+ProgressFn = Optional[Callable[[float], None]]
+
+# Widening ladder used when a later chunk does not fit the sampled type.
+_WIDEN = {"null": pa.float64(), "bool": pa.string(), "int64": pa.float64(), "double": pa.string()}
+_CONV_ERR = re.compile(r"CSV column #(\d+)")
+
+# ===== Buffers =====
+def _as_buffer(source) -> pa.Buffer:
+    """
+    Zero-copy view over bytes / path / binary file object (e.g. Streamlit UploadedFile).
+    """
+    if isinstance(source, pa.Buffer):
+        return source
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return pa.py_buffer(source)
+    if isinstance(source, (str, os.PathLike)):
+        with pa.memory_map(os.fspath(source), "r") as mm:
+            return mm.read_buffer()
+    if isinstance(source, io.BytesIO):
+        return pa.py_buffer(source.getbuffer())
+    if hasattr(source, "read"):
+        return pa.py_buffer(source.read())
+    raise TypeError(f"Unsupported source: {type(source).__name__}")
+
+def _arrow_types_mapper(t: pa.DataType):
+    """Keep strings Arrow-backed (string[pyarrow]) instead of object."""
+    if pa.types.is_string(t) or pa.types.is_large_string(t):
+        return pd.StringDtype("pyarrow")
+    return None
+
+def _numeric(t: pa.DataType) -> bool:
+    return pa.types.is_integer(t) or pa.types.is_floating(t)
+
+def arrow_to_pandas(table: pa.Table) -> pd.DataFrame:
+    return table.to_pandas(types_mapper=_arrow_types_mapper, split_blocks=True, self_destruct=True)
+
+def _next_newline(view: memoryview, pos: int, end: int) -> int:
+    """Offset just past the first newline at/after pos (or end)."""
+    step = 1 << 16
+    while pos < end:
+        hit = view[pos:min(pos + step, end)].tobytes().find(b"\n")
+        if hit >= 0:
+            return pos + hit + 1
+        pos += step
+    return end
+
+# ===== CSV =====
+def infer_csv_schema(source, sample_bytes: int = DEFAULT_SAMPLE_BYTES) -> pa.Schema:
+    """
+    Infer column types from the first `sample_bytes` of the file.
+    Date/time columns stay strings (same as pandas.read_csv).
+    """
+    buf = _as_buffer(source)
+    view = memoryview(buf)
+    end = len(buf) if len(buf) <= sample_bytes else _next_newline(view, sample_bytes, len(buf))
+    sample = pa_csv.read_csv(pa.BufferReader(buf.slice(0, end)),
+                             convert_options=pa_csv.ConvertOptions(strings_can_be_null=True))
+    fields = []
+    for f in sample.schema:
+        t = f.type
+        if pa.types.is_temporal(t):
+            t = pa.string()
+        fields.append(pa.field(f.name, t))
+    return pa.schema(fields)
+
+def _sample_has_multiline_values(buf: pa.Buffer, sample_bytes: int) -> bool:
+    """
+    Whether a newline of the first `sample_bytes` lies inside a quoted field, i.e. after an odd number
+    of quotes (an escaped "" flips the parity twice).
+    """
+    head = np.frombuffer(buf, np.uint8, count=min(len(buf), sample_bytes))
+    quotes = np.flatnonzero(head == 34)
+    if not len(quotes):
+        return False
+    newlines = np.flatnonzero(head == 10)
+    return bool((np.searchsorted(quotes, newlines) % 2).any())
+
+def _parse_chunk(buf: pa.Buffer, names: List[str], types: Dict[str, pa.DataType]) -> pa.Table:
+    return pa_csv.read_csv(
+        pa.BufferReader(buf),
+        read_options=pa_csv.ReadOptions(column_names=names, use_threads=False),
+        convert_options=pa_csv.ConvertOptions(column_types=types, strings_can_be_null=True),
+    )
+
+def widen_csv_type(types: Dict[str, pa.DataType], error: Exception) -> bool:
+    """Widen the column a conversion error points at (see _WIDEN); False when it cannot be widened."""
+    m = _CONV_ERR.search(str(error))
+    if not m:
+        return False
+    col = list(types)[int(m.group(1))]
+    wider = _WIDEN.get(str(types[col]))
+    if wider is None:
+        return False
+    types[col] = wider
+    return True
+
+def iter_csv_arrow(source, types: Optional[Dict[str, pa.DataType]] = None, *,
+                   block_size: int = DEFAULT_BLOCK_SIZE,
+                   sample_bytes: int = DEFAULT_SAMPLE_BYTES,
+                   max_workers: Optional[int] = None,
+                   on_progress: ProgressFn = None) -> Iterator[pa.Table]:
+    """
+    Chunk tables of a CSV in file order, never more than 2 * workers parsed ahead:
+      - types (column -> Arrow type) default to the sampled schema and are locked for every chunk
+      - chunks split on newlines and parsed in parallel threads (pyarrow releases the GIL)
+    A value that does not fit its column raises ArrowInvalid mid-stream; callers widen the
+    column with widen_csv_type() and start over.
+    """
+    buf = _as_buffer(source)
+    total = len(buf)
+    if total == 0:
+        return
+    if _sample_has_multiline_values(buf, sample_bytes):
+        # Quoted newlines cannot be split safely; let Arrow stream the whole file.
+        reader = pa_csv.open_csv(pa.BufferReader(buf),
+                                 read_options=pa_csv.ReadOptions(block_size=block_size),
+                                 parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+                                 convert_options=pa_csv.ConvertOptions(column_types=types,
+                                                                       strings_can_be_null=True))
+        for batch in reader:
+            yield pa.Table.from_batches([batch])
+        if on_progress: on_progress(1.0)
+        return
+
+    if types is None:
+        types = {f.name: f.type for f in infer_csv_schema(buf, sample_bytes)}
+    names = list(types)
+    view = memoryview(buf)
+    body = _next_newline(view, 0, total)  # skip header line
+
+    offsets = []
+    pos = body
+    while pos < total:
+        nxt = _next_newline(view, min(pos + block_size, total), total)
+        offsets.append((pos, nxt))
+        pos = nxt
+
+    workers = max_workers or min(8, os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending: deque = deque()
+        try:
+            for start, stop in offsets:
+                pending.append((stop, pool.submit(_parse_chunk, buf.slice(start, stop - start), names, types)))
+                # keep a bounded number of chunks in flight
+                while len(pending) >= 2 * workers or (pending and stop == total):
+                    done, fut = pending.popleft()
+                    table = fut.result()
+                    if on_progress: on_progress(min(1.0, done / total))
+                    yield table
+        finally:
+            for _, fut in pending:  # consumer stopped early or a chunk failed
+                fut.cancel()
+    if on_progress: on_progress(1.0)
+
+def read_csv_arrow(source, *, block_size: int = DEFAULT_BLOCK_SIZE,
+                   sample_bytes: int = DEFAULT_SAMPLE_BYTES,
+                   max_workers: Optional[int] = None,
+                   on_progress: ProgressFn = None) -> pd.DataFrame:
+    """
+    Chunked, multi-threaded CSV parse (iter_csv_arrow); a column that outgrows its
+    sampled type is widened and the parse restarted.
+    """
+    buf = _as_buffer(source)
+    if len(buf) == 0:
+        return pd.DataFrame()
+    types = None if _sample_has_multiline_values(buf, sample_bytes) else \
+        {f.name: f.type for f in infer_csv_schema(buf, sample_bytes)}
+    for _ in range(2 * len(types or ()) + 1):
+        try:
+            tables = list(iter_csv_arrow(buf, types, block_size=block_size, sample_bytes=sample_bytes,
+                                         max_workers=max_workers, on_progress=on_progress))
+            break
+        except pa.ArrowInvalid as e:
+            if types is None or not widen_csv_type(types, e):
+                raise
+            if on_progress: on_progress(0.0)
+
+    if not tables:
+        return pd.DataFrame({n: pd.Series(dtype=_arrow_types_mapper(t) or t.to_pandas_dtype())
+                             for n, t in (types or {}).items()})
+    table = pa.concat_tables(tables)
+    del tables
+    return arrow_to_pandas(table)
+
+# ===== JSON =====
+class JsonTypeConflict(pa.ArrowInvalid):
+    """A JSON value that does not fit its locked column type (`found` is the value's Arrow type)."""
+
+    def __init__(self, column: str, found: pa.DataType):
+        super().__init__(f"JSON column {column!r} cannot hold {found} values")
+        self.column = column
+        self.found = found
+
+class JsonLayoutMismatch(pa.ArrowInvalid):
+    """An object taken for one array of records holds another one past the sampled head; parse it whole."""
+
+def _looks_like_ndjson(buf: pa.Buffer) -> bool:
+    head = memoryview(buf)[:1 << 16].tobytes().lstrip()
+    if not head.startswith(b"{"):
+        return False
+    lines = [ln.strip() for ln in head.splitlines() if ln.strip()]
+    return len(lines) > 1 and lines[0].endswith(b"}") and lines[1].startswith(b"{")
+
+def _json_quotes(a: np.ndarray) -> np.ndarray:
+    """Positions of the unescaped double quotes in `a`."""
+    quotes = np.flatnonzero(a == 34)
+    slashes = np.flatnonzero(a == 92)
+    if len(slashes) and len(quotes):
+        # a quote is escaped when an odd run of backslashes ends right before it
+        runs = slashes[np.r_[True, np.diff(slashes) != 1]]
+        prev = quotes - 1
+        j = np.minimum(np.searchsorted(slashes, prev), len(slashes) - 1)
+        run_start = runs[np.maximum(np.searchsorted(runs, prev, side="right") - 1, 0)]
+        quotes = quotes[~((slashes[j] == prev) & ((prev - run_start) % 2 == 0))]
+    return quotes
+
+def _json_marks(a: np.ndarray, in_string: bool = False) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Positions, bytes and nesting depth (after the byte) of the structural , [ ] { } in `a`, which must
+    start outside a string (or inside one with `in_string`, not right after a backslash). Works on the
+    sparse quote / backslash positions only, no per-byte state.
+    """
+    quotes = _json_quotes(a)
+    marks = np.flatnonzero((a == 44) | (a == 91) | (a == 93) | (a == 123) | (a == 125))
+    marks = marks[np.searchsorted(quotes, marks) % 2 == int(in_string)]  # outside strings
+    ch = a[marks]
+    depth = np.cumsum((ch == 91) | (ch == 123), dtype=np.int64) - np.cumsum((ch == 93) | (ch == 125), dtype=np.int64)
+    return marks, ch, depth
+
+def _first_byte(buf: pa.Buffer, pos: int) -> int:
+    """The first non-space byte at or after `pos` (0 at the end)."""
+    step = 64
+    while pos < len(buf):
+        a = np.frombuffer(buf, np.uint8, count=min(step, len(buf) - pos), offset=pos)
+        body = np.flatnonzero(a > 32)
+        if len(body):
+            return int(a[body[0]])
+        pos, step = pos + len(a), step * 2
+    return 0
+
+def _record_members(buf: pa.Buffer, start: int = 0, stop: Optional[int] = None, level: int = 0,
+                    block_size: int = DEFAULT_BLOCK_SIZE) -> List[int]:
+    """
+    Offsets just past the "[" of the array-of-objects members of the top-level object in buf[start:stop],
+    which begins outside any string at nesting `level`. Stops at the second one: callers only need to
+    know whether there is exactly one.
+    """
+    found: List[int] = []
+    pos, in_string, total = start, False, len(buf) if stop is None else stop
+    while pos < total and len(found) < 2:
+        cut = min(pos + block_size, total)
+        while cut < total and memoryview(buf)[cut - 1] == 92:
+            cut += 1  # never end a block on a backslash: the next block's first quote is unescaped
+        a = np.frombuffer(buf, np.uint8, count=cut - pos, offset=pos)
+        marks, ch, depth = _json_marks(a, in_string)
+        for at in marks[(ch == 91) & (depth + level == 2)]:
+            if _first_byte(buf, pos + int(at) + 1) == 123:
+                found.append(pos + int(at) + 1)
+        if len(depth):
+            level += int(depth[-1])
+        in_string ^= bool(len(_json_quotes(a)) % 2)
+        pos = cut
+    return found[:2]
+
+def json_layout(source) -> Tuple[str, int]:
+    """
+    ("ndjson", 0), ("array", offset) for a top-level array of objects, ("records", offset) for an object
+    with exactly one array-of-objects member holding the records (e.g. {"meta": ..., "data": [{...}, ...]}),
+    or ("other", 0) for anything else (column dicts, several record arrays, scalars), left to pandas.
+    Offsets point just past the records' "[". Only the first 64 KB are read: a second record array
+    further on is found by _json_blocks, which raises JsonLayoutMismatch.
+    """
+    buf = _as_buffer(source)
+    if _looks_like_ndjson(buf):
+        return "ndjson", 0
+    head = np.frombuffer(buf, np.uint8, count=min(len(buf), 1 << 16))
+    body = np.flatnonzero(head > 32)
+    if not len(body):
+        return "other", 0
+    if head[body[0]] == 91:
+        start = int(body[0]) + 1
+        return ("array", start) if _first_byte(buf, start) == 123 else ("other", 0)
+    if head[body[0]] == 123:
+        members = _record_members(buf, stop=len(head))
+        if len(members) == 1:
+            return "records", members[0]
+    return "other", 0
+
+def _json_blocks(buf: pa.Buffer, layout: str, start: int, block_size: int) -> Iterator[Tuple[int, pa.Buffer]]:
+    """
+    (end offset, NDJSON buffer) of roughly `block_size` bytes each, split between records. NDJSON is
+    sliced zero-copy on newlines; records of an array are copied per block with the commas between
+    them turned into newlines (pretty-printed records keep their inner newlines). The rest of a
+    "records" object is checked for another array of records (JsonLayoutMismatch).
+    """
+    total = len(buf)
+    if layout == "ndjson":
+        view = memoryview(buf)
+        pos = 0
+        while pos < total:
+            nxt = _next_newline(view, min(pos + block_size, total), total)
+            yield nxt, buf.slice(pos, nxt - pos)
+            pos = nxt
+        return
+    pos, size = start, block_size
+    while pos < total:
+        stop = min(pos + size, total)
+        a = np.frombuffer(buf, np.uint8, count=stop - pos, offset=pos)
+        marks, ch, depth = _json_marks(a)
+        closing = marks[(ch == 93) & (depth == -1)]
+        end = int(closing[0]) if len(closing) else -1
+        commas = marks[(ch == 44) & (depth == 0)]
+        if end >= 0:
+            if layout == "records" and _record_members(buf, pos + end + 1, level=1):
+                raise JsonLayoutMismatch("JSON object holds more than one array of records")
+            cut = end
+            commas = commas[commas < end]
+        elif len(commas) and stop < total:
+            cut = int(commas[-1])
+        elif stop < total:
+            size *= 2  # one record longer than the block
+            continue
+        else:
+            raise pa.ArrowInvalid("JSON array is not closed")
+        chunk = a[:cut].copy()
+        chunk[commas[commas < cut]] = 10
+        if (chunk > 32).any():
+            yield pos + cut + 1, pa.py_buffer(chunk)
+        if end >= 0:
+            return
+        pos, size = pos + cut + 1, block_size
+
+def _list_text(col: pa.ChunkedArray) -> pa.ChunkedArray:
+    """List values as text: "a, b, c" for lists of scalars, JSON for anything nested."""
+    try:
+        return pc.binary_join(col.cast(pa.list_(pa.string())), ", ")
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        return pa.chunked_array([pa.array([None if v is None else json.dumps(v, default=str)
+                                           for v in col.to_pylist()], pa.string())])
+
+def _flatten_json(table: pa.Table) -> pa.Table:
+    """Nested objects become "parent.child" columns, lists become text."""
+    while any(pa.types.is_struct(f.type) for f in table.schema):
+        table = table.flatten()
+    for i, f in enumerate(table.schema):
+        if pa.types.is_list(f.type) or pa.types.is_large_list(f.type):
+            table = table.set_column(i, f.name, _list_text(table.column(i)))
+    return table
+
+def _conform(table: pa.Table, types: Dict[str, pa.DataType]) -> pa.Table:
+    """Cast to the locked schema: extra columns dropped, missing ones null; a value that does not fit raises."""
+    cols = []
+    for name, t in types.items():
+        i = table.schema.get_field_index(name)
+        if i < 0:
+            cols.append(pa.nulls(table.num_rows, t))
+            continue
+        col = table.column(i)
+        if col.type != t:
+            try:
+                col = col.cast(t)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                raise JsonTypeConflict(name, col.type) from None
+        cols.append(col)
+    return pa.Table.from_arrays(cols, schema=pa.schema(list(types.items())))
+
+_JSON_SPACE = re.compile(r"[\s,]*")
+
+def _decode_records(text: str) -> Iterator[Any]:
+    decoder = json.JSONDecoder()
+    pos = _JSON_SPACE.match(text).end()
+    while pos < len(text):
+        obj, pos = decoder.raw_decode(text, pos)
+        yield obj
+        pos = _JSON_SPACE.match(text, pos).end()
+
+def _python_column(values: pd.Series, name: str, t: Optional[pa.DataType]) -> pa.Array:
+    vals = [None if v is None or (isinstance(v, float) and v != v) else v for v in values]
+    if t is not None and pa.types.is_string(t):
+        return pa.array([v if v is None or isinstance(v, str) else
+                         ", ".join(map(str, v)) if isinstance(v, list) else json.dumps(v, default=str) for v in vals], t)
+    try:
+        if t is not None and pa.types.is_temporal(t):
+            return pa.array(vals, pa.string()).cast(t)
+        return pa.array(vals, t)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError, TypeError, OverflowError):
+        if t is not None:
+            try:
+                found = pa.array(vals).type
+            except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError, OverflowError):
+                found = pa.string()
+            raise JsonTypeConflict(name, found) from None
+        return _python_column(values, name, pa.string())  # mixed values with nothing locked yet
+
+def _parse_json_python(buf: pa.Buffer, types: Optional[Dict[str, pa.DataType]]) -> pa.Table:
+    """Slow path for a block Arrow rejects (a field holding numbers and text, say): decoded record by record."""
+    df = pd.json_normalize(list(_decode_records(buf.to_pybytes().decode("utf-8"))))
+    names = list(types) if types is not None else list(df.columns)
+    cols = [_python_column(df[n] if n in df else pd.Series([None] * len(df), dtype=object), n,
+                           types[n] if types is not None else None) for n in names]
+    return pa.Table.from_arrays(cols, names=names)
+
+def _parse_json_block(buf: pa.Buffer, types: Optional[Dict[str, pa.DataType]], multiline: bool) -> pa.Table:
+    try:
+        table = pa_json.read_json(
+            pa.BufferReader(buf),
+            read_options=pa_json.ReadOptions(use_threads=False, block_size=max(len(buf) + 1, 1 << 20)),
+            parse_options=pa_json.ParseOptions(newlines_in_values=multiline),
+        )
+    except pa.ArrowInvalid:
+        table = _parse_json_python(buf, types)
+    table = _flatten_json(table)
+    return _conform(table, types) if types is not None else table
+
+def infer_json_types(source, sample_bytes: int = DEFAULT_SAMPLE_BYTES) -> Dict[str, pa.DataType]:
+    """Column types (flattened) of the records in the first `sample_bytes`; they are locked for the rest."""
+    buf = _as_buffer(source)
+    layout, start = json_layout(buf)
+    first = next(_json_blocks(buf, layout, start, sample_bytes), None)
+    if first is None:
+        return {}
+    table = _parse_json_block(first[1], None, layout != "ndjson")
+    return {f.name: f.type for f in table.schema}
+
+def widen_json_type(types: Dict[str, pa.DataType], error: Exception) -> bool:
+    """Widen the column of a JsonTypeConflict: null -> the value's type, int -> float, else -> string."""
+    if not isinstance(error, JsonTypeConflict) or error.column not in types:
+        return False
+    old, found = types[error.column], error.found
+    if pa.types.is_null(old):
+        wider = found
+    elif _numeric(old) and _numeric(found):
+        wider = pa.float64()
+    else:
+        wider = pa.string()
+    if wider == old:
+        return False
+    types[error.column] = wider
+    return True
+
+def iter_json_arrow(source, types: Optional[Dict[str, pa.DataType]] = None, *,
+                    block_size: int = DEFAULT_BLOCK_SIZE,
+                    sample_bytes: int = DEFAULT_SAMPLE_BYTES,
+                    max_workers: Optional[int] = None,
+                    on_progress: ProgressFn = None) -> Iterator[pa.Table]:
+    """
+    Chunk tables of NDJSON / an array of records in file order, never more than 2 * workers parsed ahead:
+      - types (flattened column -> Arrow type) default to the sampled ones and are locked: fields first
+        seen later are dropped, missing ones are null, nested objects are "parent.child" columns
+      - blocks are parsed in parallel threads (pyarrow releases the GIL)
+    A value that does not fit its column raises JsonTypeConflict mid-stream; callers widen the
+    column with widen_json_type() and start over.
+    """
+    buf = _as_buffer(source)
+    layout, start = json_layout(buf)
+    if layout == "other":
+        raise ValueError("JSON is neither NDJSON nor an array of records")
+    if types is None:
+        types = infer_json_types(buf, sample_bytes)
+    total = len(buf)
+    workers = max_workers or min(8, os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending: deque = deque()
+        try:
+            for stop, block in _json_blocks(buf, layout, start, block_size):
+                pending.append((stop, pool.submit(_parse_json_block, block, types, layout != "ndjson")))
+                while len(pending) >= 2 * workers:
+                    done, fut = pending.popleft()
+                    if on_progress: on_progress(min(1.0, done / total))
+                    yield fut.result()
+            while pending:
+                done, fut = pending.popleft()
+                if on_progress: on_progress(min(1.0, done / total))
+                yield fut.result()
+        finally:
+            for _, fut in pending:
+                fut.cancel()
+    if on_progress: on_progress(1.0)
+
+def _read_json_streamed(buf: pa.Buffer, block_size: int, sample_bytes: int, max_workers: Optional[int],
+                        on_progress: ProgressFn) -> pd.DataFrame:
+    types = infer_json_types(buf, sample_bytes)
+    for _ in range(3 * len(types) + 1):
+        try:
+            tables = list(iter_json_arrow(buf, types, block_size=block_size, sample_bytes=sample_bytes,
+                                          max_workers=max_workers, on_progress=on_progress))
+            break
+        except JsonTypeConflict as e:
+            if not widen_json_type(types, e):
+                raise
+            if on_progress: on_progress(0.0)
+    if not tables:
+        return pd.DataFrame({n: pd.Series(dtype=_arrow_types_mapper(t) or t.to_pandas_dtype())
+                             for n, t in types.items()})
+    table = pa.concat_tables(tables)
+    del tables
+    return arrow_to_pandas(table)
+
+def read_json_arrow(source, *, block_size: int = DEFAULT_BLOCK_SIZE,
+                    sample_bytes: int = DEFAULT_SAMPLE_BYTES,
+                    max_workers: Optional[int] = None,
+                    on_progress: ProgressFn = None) -> pd.DataFrame:
+    """
+    NDJSON and arrays of records are streamed in blocks (iter_json_arrow), with types locked from a
+    sample and widened on conflict; other layouts (column dicts, several record arrays etc.) keep the
+    pandas parser.
+    """
+    buf = _as_buffer(source)
+    if json_layout(buf)[0] != "other":
+        try:
+            return _read_json_streamed(buf, block_size, sample_bytes, max_workers, on_progress)
+        except JsonLayoutMismatch:
+            pass
+    df = pd.read_json(pa.BufferReader(buf))
+    if on_progress: on_progress(1.0)
+    return df
+
+# ===== Entry point =====
+@traced("ingest.read")
+def read_dataframe(source, ext: str, *, on_progress: ProgressFn = None, **kwargs) -> pd.DataFrame:
+    """
+    Parse an upload (bytes / path / file object) by extension.
+    CSV/JSON use the Arrow engine and fall back to pandas on anything Arrow rejects;
+    Excel goes through helpers.excel_ingest (kwargs: sheets, usecols, store, key).
+    """
+    ext = ext.lower().lstrip(".")
+    if ext in ("xlsx", "xls"):
+        from .excel_ingest import read_workbook
+        return read_workbook(source, on_progress=on_progress, **kwargs)
+    if ext == "csv":
+        try:
+            return read_csv_arrow(source, on_progress=on_progress, **kwargs)
+        except (pa.ArrowInvalid, UnicodeDecodeError):
+            return pd.read_csv(pa.BufferReader(_as_buffer(source)))
+    if ext == "json":
+        try:
+            return read_json_arrow(source, on_progress=on_progress, **kwargs)
+        except pa.ArrowInvalid:
+            return pd.read_json(pa.BufferReader(_as_buffer(source)))
+    raise ValueError("Unsupported file type")
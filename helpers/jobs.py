@@ -0,0 +1,173 @@
+# helpers/jobs.py
+import contextvars
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from .paths import get_setting
+from .tracing import span
+
+log = logging.getLogger(__name__)
+
+class JobCancelled(Exception):
+    """Raised from a job's progress callback once cancellation was requested."""
+
+class Job:
+    """
+    One background task. The task function receives `progress(stage=None, fraction=None)`;
+    calling it records the stage / fraction done and raises JobCancelled when cancelled.
+    """
+
+    def __init__(self, kind: str, owner: str, fn: Callable, args: tuple, kwargs: dict):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.owner = owner
+        self.status = "queued"  # queued | running | done | error | cancelled
+        self.stage: Optional[str] = None
+        self.fraction = 0.0
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self._fn, self._args, self._kwargs = fn, args, kwargs
+        self._context = contextvars.copy_context()  # submitter's tracer etc. follow the job
+        self._cancel = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("done", "error", "cancelled")
+
+    def progress(self, stage: Optional[str] = None, fraction: Optional[float] = None) -> None:
+        if stage is not None:
+            self.stage = stage
+        if fraction is not None:
+            self.fraction = min(max(float(fraction), 0.0), 1.0)
+        if self._cancel.is_set():
+            raise JobCancelled(self.id)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"id": self.id, "kind": self.kind, "status": self.status, "stage": self.stage,
+                "fraction": self.fraction, "error": self.error,
+                "elapsed": round((self.finished or time.time()) - (self.started or self.created), 2)}
+
+class JobManager:
+    """
+    Process-wide job queue shared by all sessions.
+      - at most `max_workers` jobs run at once; queued jobs are dispatched round-robin
+        per owner (session), so one analyst's exports cannot starve everyone else
+      - results stay until collected, unclaimed ones are dropped after `result_ttl` seconds
+    """
+
+    def __init__(self, max_workers: int = 2, result_ttl: float = 3600.0):
+        self.max_workers = max(1, int(max_workers))
+        self.result_ttl = result_ttl
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+        self._jobs: Dict[str, Job] = {}
+        self._queues: "OrderedDict[str, deque]" = OrderedDict()
+        self._running = 0
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, fn: Callable, *args, owner: str = "", **kwargs) -> str:
+        """Queue fn(*args, progress=..., **kwargs); returns the job id."""
+        job = Job(kind, owner, fn, args, kwargs)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+            self._queues.setdefault(owner, deque()).append(job)
+        self._dispatch()
+        return job.id
+
+    def _dispatch(self) -> None:
+        with self._lock:
+            while self._running < self.max_workers and self._queues:
+                owner, queue = next(iter(self._queues.items()))
+                job = queue.popleft()
+                # rotate: this owner goes to the back of the line
+                del self._queues[owner]
+                if queue:
+                    self._queues[owner] = queue
+                if job.status == "cancelled":
+                    continue
+                job.status = "running"
+                self._running += 1
+                self._pool.submit(self._run, job)
+
+    def _run(self, job: Job) -> None:
+        job.started = time.time()
+        try:
+            job.progress()
+            job.result = job._context.run(self._call, job)
+            job.status = "done"
+            job.fraction = 1.0
+        except JobCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            log.exception("job %s (%s) failed", job.id, job.kind)
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = "error"
+        finally:
+            job.finished = time.time()
+            job._fn = job._args = job._kwargs = job._context = None
+            with self._lock:
+                self._running -= 1
+            self._dispatch()
+
+    @staticmethod
+    def _call(job: Job) -> Any:
+        with span(f"job.{job.kind}"):
+            return job._fn(*job._args, progress=job.progress, **job._kwargs)
+
+    def get(self, job_id: Optional[str]) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id) if job_id else None
+
+    def status(self, job_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        job = self.get(job_id)
+        return job.snapshot() if job else None
+
+    def cancel(self, job_id: str) -> bool:
+        """Request cancellation; queued jobs never start, running ones stop at their next progress call."""
+        job = self.get(job_id)
+        if job is None or job.done:
+            return False
+        job._cancel.set()
+        with self._lock:
+            if job.status == "queued":
+                job.status = "cancelled"
+                job.finished = time.time()
+        return True
+
+    def collect(self, job_id: str) -> Optional[Job]:
+        """Remove and return a finished job (None while it is still queued/running)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or not job.done:
+                return None
+            return self._jobs.pop(job_id)
+
+    def jobs_for(self, owner: str) -> List[Job]:
+        with self._lock:
+            return [j for j in self._jobs.values() if j.owner == owner]
+
+    def _prune(self) -> None:
+        now = time.time()
+        stale = [k for k, j in self._jobs.items() if j.done and now - j.finished > self.result_ttl]
+        for k in stale:
+            del self._jobs[k]
+
+_MANAGER: Optional[JobManager] = None
+_MANAGER_LOCK = threading.Lock()
+
+def get_job_manager() -> JobManager:
+    """Process-wide JobManager (JOB_WORKERS / JOB_RESULT_TTL settings)."""
+    global _MANAGER
+    with _MANAGER_LOCK:
+        if _MANAGER is None:
+            _MANAGER = JobManager(max_workers=int(get_setting("JOB_WORKERS", 2)),
+                                  result_ttl=float(get_setting("JOB_RESULT_TTL", 3600)))
+        return _MANAGER
@@ -0,0 +1,100 @@
+# helpers/llm_cache.py
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, Optional, Sequence
+
+from .dataset_store import evict_lru
+
+DEFAULT_TTL = 7 * 24 * 3600       # seconds
+DEFAULT_MAX_BYTES = 64 << 20      # 64 MB of responses
+
+def image_digest(img) -> str:
+    """Hash of the decoded pixels (mode + size + bytes), independent of file name or PNG metadata."""
+    h = hashlib.sha256()
+    h.update(f"{img.mode}:{img.size}".encode())
+    h.update(img.tobytes())
+    return h.hexdigest()
+
+def _normalize_part(part: Any) -> str:
+    if isinstance(part, dict) and "text" in part:
+        part = part["text"]
+    if isinstance(part, str):
+        return "t:" + re.sub(r"\s+", " ", part).strip()
+    if hasattr(part, "tobytes") and hasattr(part, "mode"):
+        return "i:" + image_digest(part)
+    if isinstance(part, dict) and isinstance(part.get("data"), (bytes, bytearray)):
+        return f"b:{part.get('mime_type')}:" + hashlib.sha256(part["data"]).hexdigest()
+    return "o:" + repr(part)
+
+class ResponseCache:
+    """
+    Disk-backed LLM response cache, one JSON file per key.
+    Key = normalized prompt parts + image pixel digests + model name + temperature + lang.
+    Entries expire after `ttl` seconds; the directory is LRU-trimmed to `max_bytes`.
+    """
+
+    def __init__(self, root: str, ttl: float = DEFAULT_TTL, max_bytes: int = DEFAULT_MAX_BYTES,
+                 enabled: bool = True):
+        self.root = os.path.abspath(root)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    @staticmethod
+    def make_key(parts: Sequence[Any], model_name: str, temperature: float, lang: str) -> str:
+        payload = json.dumps({
+            "parts": [_normalize_part(p) for p in parts],
+            "model": model_name, "temperature": temperature, "lang": lang,
+        }, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            if time.time() - entry["created"] > self.ttl:
+                os.remove(path)
+                raise FileNotFoundError(path)
+            os.utime(path)  # LRU touch
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return entry["text"]
+
+    def put(self, key: str, text: str) -> None:
+        if not self.enabled or not text:
+            return
+        tmp = f"{self._path(key)}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"text": text, "created": time.time()}, f, ensure_ascii=False)
+            os.replace(tmp, self._path(key))
+        except OSError:
+            return
+        evict_lru(self.root, ".json", self.max_bytes)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+    def clear(self) -> None:
+        for name in os.listdir(self.root):
+            if name.endswith(".json"):
+                os.remove(os.path.join(self.root, name))
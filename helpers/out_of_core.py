@@ -0,0 +1,381 @@
+# helpers/out_of_core.py
+import itertools
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from .aggregation import AGG_FUNCS
+from .data_processing import CATEGORY_MAX_RATIO, CATEGORY_MAX_UNIQUE, clean_chunk, row_fingerprints
+from .dataset_store import DatasetStore
+from .ingest import (ProgressFn, _arrow_types_mapper, _as_buffer, _numeric, _sample_has_multiline_values,
+                     DEFAULT_SAMPLE_BYTES, JsonLayoutMismatch, infer_csv_schema, infer_json_types, iter_csv_arrow,
+                     iter_json_arrow, json_layout, read_dataframe, widen_csv_type, widen_json_type)
+from .paths import get_setting
+from .tracing import note_cache, span, traced
+
+DEFAULT_THRESHOLD_MB = 256
+STREAMABLE = ("csv", "json")
+META_KEY = b"dashboard"  # schema metadata: {"compact": bool, "rows_before": int}
+
+def use_out_of_core(nbytes: int, ext: str) -> bool:
+    """Uploads above OUT_OF_CORE_MB (default 256) are analyzed from disk in chunks (CSV / JSON)."""
+    limit = float(get_setting("OUT_OF_CORE_MB", DEFAULT_THRESHOLD_MB)) * 2**20
+    return ext.lower().lstrip(".") in STREAMABLE and nbytes > limit
+
+def _workers() -> int:
+    return min(8, os.cpu_count() or 1)
+
+def _ordered_map(fn: Callable, items: Iterable, workers: Optional[int] = None) -> Iterator:
+    """fn over items in a thread pool, results in input order, at most 2 * workers in flight."""
+    workers = workers or _workers()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending: deque = deque()
+        try:
+            for item in items:
+                pending.append(pool.submit(fn, item))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for fut in pending:
+                fut.cancel()
+
+# ===== Duplicate rows across chunks =====
+class _SeenRows:
+    """
+    Fingerprints of the rows kept so far, as sorted runs merged like a binary counter
+    (every fingerprint is re-merged O(log n) times; a lookup is one searchsorted per run).
+    """
+
+    def __init__(self):
+        self._runs: List[np.ndarray] = []
+
+    def first_seen(self, h: np.ndarray) -> np.ndarray:
+        """Mask of the rows to keep: first occurrence of a fingerprint in this chunk and all earlier ones."""
+        uniq, first = np.unique(h, return_index=True)
+        new = np.ones(len(uniq), dtype=bool)
+        for run in self._runs:
+            pos = np.minimum(np.searchsorted(run, uniq), len(run) - 1)
+            new &= run[pos] != uniq
+        keep = np.zeros(len(h), dtype=bool)
+        keep[first[new]] = True
+        run = uniq[new]
+        while self._runs and len(self._runs[-1]) <= len(run):
+            run = np.sort(np.concatenate((self._runs.pop(), run)), kind="stable")
+        if len(run):
+            self._runs.append(run)
+        return keep
+
+# ===== Out-of-core frame =====
+class ChunkedFrame:
+    """
+    A dataset analyzed out of core: an Arrow IPC file of the dataset store, memory-mapped, so only the
+    batches being read are paged in. It offers what the dashboard needs from a frame (columns, shape,
+    len, head, iter_frames) and brings its own streaming engine, so engine_for() / catalog_for() accept it.
+    `compact` frames hold auto-cleaned rows (stripped, filled, deduplicated); their results get the dtypes
+    the in-memory clean would have produced (integer downcast, category keys).
+    """
+
+    def __init__(self, table: pa.Table):
+        meta = json.loads((table.schema.metadata or {}).get(META_KEY, b"{}"))
+        self.table = table.replace_schema_metadata(None)  # pandas metadata describes the whole frame
+        self.compact = bool(meta.get("compact", False))
+        self.rows_before = int(meta.get("rows_before", table.num_rows))
+        self.columns = pd.Index([f.name for f in self.table.schema])
+        # whole-column conversion rules, applied to every batch so chunks agree with the in-memory frame
+        self._casts = {f.name: pa.float64() for f in self.table.schema
+                       if pa.types.is_integer(f.type) and self.table.column(f.name).null_count}
+        self._objects = [f.name for f in self.table.schema
+                         if pa.types.is_boolean(f.type) and self.table.column(f.name).null_count]
+        self._engine: Optional[ChunkedEngine] = None
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.table.num_rows, self.table.num_columns
+
+    @property
+    def nbytes(self) -> int:
+        return self.table.nbytes
+
+    @property
+    def numeric_columns(self) -> List[str]:
+        return [f.name for f in self.table.schema if _numeric(f.type)]
+
+    def tables(self) -> Iterator[pa.Table]:
+        for batch in self.table.to_batches():
+            yield pa.Table.from_batches([batch])
+
+    def to_pandas(self, table: pa.Table) -> pd.DataFrame:
+        """One chunk with the dtypes the whole frame would have (e.g. int with nulls -> float64)."""
+        for name, t in self._casts.items():
+            i = table.schema.get_field_index(name)
+            if i >= 0:
+                table = table.set_column(i, name, table.column(i).cast(t))
+        df = table.to_pandas(types_mapper=_arrow_types_mapper, split_blocks=True)
+        for name in self._objects:
+            if name in df:
+                df[name] = df[name].astype(object)
+        return df
+
+    def take(self, positions: np.ndarray, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Rows at `positions` (of `columns`); only the pages holding them are read."""
+        table = self.table if columns is None else self.table.select(list(columns))
+        return self.to_pandas(table.take(pa.array(positions)))
+
+    def head(self, n: int = 5) -> pd.DataFrame:
+        return self.to_pandas(self.table.slice(0, n))
+
+    def iter_frames(self) -> Iterator[pd.DataFrame]:
+        for table in self.tables():
+            yield self.to_pandas(table)
+
+    def engine(self) -> "ChunkedEngine":
+        if self._engine is None:
+            self._engine = ChunkedEngine(self)
+        return self._engine
+
+    def clean_schema(self) -> pa.Schema:
+        """Arrow types of clean_chunk() output: text as string, numerics with nulls as float64."""
+        fields = []
+        for f in self.table.schema:
+            t = f.type
+            if pa.types.is_string(t) or pa.types.is_large_string(t) or pa.types.is_null(t) or f.name in self._objects:
+                t = pa.string()
+            elif f.name in self._casts or pa.types.is_floating(t):
+                t = pa.float64()
+            elif pa.types.is_integer(t):
+                t = pa.int64()
+            fields.append(pa.field(f.name, t))
+        return pa.schema(fields)
+
+    def result_dtype(self, column: str) -> np.dtype:
+        """
+        dtype of `column` in the equivalent in-memory frame. For compact frames that is auto_clean's
+        lossless downcast, decided on a witness (min, max, largest fractional part) of the whole column.
+        """
+        t = self.table.schema.field(column).type
+        dtype = np.dtype("float64") if column in self._casts else np.dtype(t.to_pandas_dtype())
+        if not self.compact or not self.table.num_rows:
+            return dtype
+        col = self.table.column(column)
+        mm = pc.min_max(col).as_py()
+        if mm["min"] is None:
+            return dtype
+        witness = [mm["min"], mm["max"]]
+        if dtype.kind == "f":
+            frac = pc.max(pc.abs(pc.subtract(col, pc.trunc(col)))).as_py()
+            witness.append(np.nan if frac is None else frac)
+        return pd.to_numeric(pd.Series(np.array(witness, dtype=dtype)), downcast="integer").dtype
+
+class ChunkedEngine:
+    """
+    Group-by over a ChunkedFrame with mergeable partials: each batch is reduced in parallel threads to
+    per-group rows / sum / count / min / max of every numeric column (Arrow hash aggregation, no GIL),
+    partials are merged, and the merged table per category is cached; pivots are derived from it.
+    Integer columns, counts, min and max match the in-memory engine exactly; float sums are added
+    per chunk first, so they can differ from it in the last bits.
+    """
+
+    def __init__(self, frame: ChunkedFrame):
+        self.frame = frame
+        self._partials: Dict[str, Dict[str, Any]] = {}
+        self._dtypes: Dict[str, np.dtype] = {}
+
+    def _dtype(self, column: str) -> np.dtype:
+        if column not in self._dtypes:
+            self._dtypes[column] = self.frame.result_dtype(column)
+        return self._dtypes[column]
+
+    @traced("aggregate.chunked")
+    def _scan(self, category: str) -> Dict[str, Any]:
+        """Merged partials of `category` over the whole file: keys sorted like factorize, NaN last."""
+        cols = [c for c in self.frame.numeric_columns if c != category]
+        names = ["k"] + [f"v{i}" for i in range(len(cols))]
+        specs = [([], "count_all")]
+        for name in names[1:]:
+            specs += [(name, "sum", pc.ScalarAggregateOptions(min_count=0)), (name, "count"),
+                      (name, "min"), (name, "max")]
+
+        def partial(table: pa.Table) -> pa.Table:
+            return table.select([category] + cols).rename_columns(names).group_by("k", use_threads=False).aggregate(specs)
+
+        parts = list(_ordered_map(partial, self.frame.tables())) or [partial(self.frame.table.slice(0, 0))]
+        merge = [("count_all", "sum")]
+        for name in names[1:]:
+            merge += [(f"{name}_sum", "sum"), (f"{name}_count", "sum"), (f"{name}_min", "min"), (f"{name}_max", "max")]
+        merged = pa.concat_tables(parts).group_by("k", use_threads=False).aggregate(merge)
+        df = merged.to_pandas(types_mapper=_arrow_types_mapper)
+        df = df.sort_values("k", na_position="last", kind="stable", ignore_index=True)
+        keys = df["k"]
+        valid = keys.notna().to_numpy()
+        ngroups = int(valid.sum())
+        if (self.frame.compact and ngroups <= CATEGORY_MAX_UNIQUE
+                and ngroups <= CATEGORY_MAX_RATIO * max(self.frame.rows_before, 1)):
+            keys = pd.Series(pd.Categorical(keys, categories=keys[valid].array), name="k")
+        out = {"keys": keys, "valid": valid, "rows": df["count_all_sum"].to_numpy(np.int64)}
+        for c, name in zip(cols, names[1:]):
+            out[c] = {a: df[f"{name}_{a}_{m}"].to_numpy()
+                      for a, m in (("sum", "sum"), ("count", "sum"), ("min", "min"), ("max", "max"))}
+        return out
+
+    def _partials_for(self, category: str) -> Dict[str, Any]:
+        hit = self._partials.get(category)
+        note_cache(hit is not None)
+        if hit is None:
+            hit = self._partials[category] = self._scan(category)
+        return hit
+
+    def cached(self, category: str, numeric: str, agg: str = "sum", dropna: bool = True) -> bool:
+        """True when pivot() is served from merged partials (no pass over the file)."""
+        return category in self._partials
+
+    def _values(self, part: Dict[str, Any], column: str, agg: str) -> np.ndarray:
+        stats = part.get(column)
+        if stats is None:
+            raise KeyError(f"Not a numeric column: {column}")
+        dtype = self._dtype(column)
+        count = stats["count"].astype(np.int64)
+        if dtype.kind in "iu":
+            total = np.rint(stats["sum"]).astype(np.int64) if stats["sum"].dtype.kind == "f" \
+                else stats["sum"].astype(np.int64)
+            if agg == "sum": return total
+            if agg == "mean": return total / count
+            if agg == "count": return count
+            return stats[agg].astype(dtype)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if agg == "sum": return stats["sum"].astype(np.float64)
+            if agg == "mean": return stats["sum"].astype(np.float64) / count
+            if agg == "count": return count
+            return stats[agg].astype(np.float64)
+
+    def aggregate(self, category: str, numeric_cols: Sequence[str], aggs: Sequence[str] = ("sum",),
+                  dropna: bool = True) -> pd.DataFrame:
+        """Same layout as AggregationEngine.aggregate."""
+        bad = [a for a in aggs if a not in AGG_FUNCS]
+        if bad:
+            raise ValueError(f"Unsupported aggregation: {bad}")
+        part = self._partials_for(category)
+        rows = slice(None) if not dropna else part["valid"]
+        data = {category: part["keys"][rows].reset_index(drop=True)}
+        for c in numeric_cols:
+            for a in aggs:
+                data[c if len(aggs) == 1 else f"{c}_{a}"] = self._values(part, c, a)[rows]
+        return pd.DataFrame(data)
+
+    @traced("aggregate.pivot")
+    def pivot(self, category: str, numeric: str, agg: str = "sum", dropna: bool = True) -> pd.DataFrame:
+        return self.aggregate(category, [numeric], [agg], dropna)
+
+    @traced("aggregate.pivots")
+    def pivots(self, category: str, numeric_cols: Sequence[str], agg: str = "sum",
+               dropna: bool = True) -> List[pd.DataFrame]:
+        """Every metric from the one cached scan of `category`."""
+        return [self.aggregate(category, [c], [agg], dropna) for c in numeric_cols]
+
+    def size(self, category: str, dropna: bool = True) -> pd.DataFrame:
+        part = self._partials_for(category)
+        rows = slice(None) if not dropna else part["valid"]
+        return pd.DataFrame({category: part["keys"][rows].reset_index(drop=True), "count": part["rows"][rows]})
+
+# ===== Loading / cleaning =====
+@traced("ingest.chunked")
+def load_chunked(store: DatasetStore, key: str, source, ext: str, *,
+                 on_progress: ProgressFn = None, **kwargs) -> ChunkedFrame:
+    """
+    The upload as a ChunkedFrame: the store's raw file when cached, else the CSV / JSON records are parsed
+    chunk by chunk (types locked from a sample, see iter_csv_arrow / iter_json_arrow) straight into the
+    store, never as one frame. JSON that is not NDJSON or one array of records is parsed whole.
+    """
+    table = store.open_table(key, "raw")
+    if table is not None:
+        return ChunkedFrame(table)
+    ext = ext.lower().lstrip(".")
+    if ext not in STREAMABLE:
+        raise ValueError(f"Cannot stream .{ext} files")
+    buf = _as_buffer(source)
+    if ext == "json":
+        if json_layout(buf)[0] != "other":
+            try:
+                return _load_streamed(store, key, buf, iter_json_arrow, widen_json_type, infer_json_types(buf),
+                                      on_progress, **kwargs)
+            except JsonLayoutMismatch:
+                pass
+        table = pa.Table.from_pandas(read_dataframe(buf, ext, on_progress=on_progress), preserve_index=False)
+        return ChunkedFrame(store.put_batches(key, "raw", table.schema, [table]))
+    types = None
+    if len(buf) and not _sample_has_multiline_values(buf, DEFAULT_SAMPLE_BYTES):
+        types = {f.name: f.type for f in infer_csv_schema(buf)}
+    return _load_streamed(store, key, buf, iter_csv_arrow, widen_csv_type, types, on_progress, **kwargs)
+
+def _load_streamed(store: DatasetStore, key: str, buf: pa.Buffer, iter_arrow: Callable, widen: Callable,
+                   types: Optional[Dict[str, pa.DataType]], on_progress: ProgressFn, **kwargs) -> ChunkedFrame:
+    """Chunks of iter_arrow into the store, widening `types` and starting over on a type conflict."""
+    for _ in range(3 * len(types or ()) + 1):
+        try:
+            tables = iter_arrow(buf, types, on_progress=on_progress, **kwargs)
+            first = next(tables, None)
+            schema = first.schema if first is not None else pa.schema(types or {})
+            chunks = itertools.chain([first] if first is not None else [], tables)
+            return ChunkedFrame(store.put_batches(key, "raw", schema, chunks))
+        except pa.ArrowInvalid as e:
+            if types is None or not widen(types, e):
+                raise
+            if on_progress: on_progress(0.0)
+
+def open_chunked(store: DatasetStore, key: str, kind: str) -> Optional[ChunkedFrame]:
+    table = store.open_table(key, kind)
+    return ChunkedFrame(table) if table is not None else None
+
+@traced("clean.chunked")
+def clean_chunked(store: DatasetStore, key: str, raw: ChunkedFrame) -> Tuple[ChunkedFrame, Dict[str, Any]]:
+    """
+    auto_clean for a ChunkedFrame: chunks are cleaned (clean_chunk) and fingerprinted in parallel threads,
+    then duplicates are dropped against every earlier chunk, in file order, and the rows streamed into
+    the store as kind "clean". Returns (cleaned, report) like auto_clean_with_report.
+    """
+    schema = raw.clean_schema()
+    meta = {META_KEY: json.dumps({"compact": True, "rows_before": len(raw)}).encode()}
+    steps = {"clean": 0.0, "dedupe": 0.0}
+    seen = _SeenRows()
+
+    def clean(table: pa.Table) -> Tuple[pa.Table, np.ndarray]:
+        t0 = time.perf_counter()
+        df = clean_chunk(raw.to_pandas(table))
+        out = pa.Table.from_pandas(df, schema=schema, preserve_index=False).replace_schema_metadata(meta)
+        h = row_fingerprints(df)
+        steps["clean"] += time.perf_counter() - t0
+        return out, h
+
+    def deduped() -> Iterator[pa.Table]:
+        for table, h in _ordered_map(clean, raw.tables()):
+            t0 = time.perf_counter()
+            keep = seen.first_seen(h)
+            if not keep.all():
+                table = table.filter(pa.array(keep))
+            steps["dedupe"] += time.perf_counter() - t0
+            yield table
+
+    with span("clean.write", rows=len(raw)):
+        cleaned = ChunkedFrame(store.put_batches(key, "clean", schema.with_metadata(meta), deduped()))
+    report = {
+        "rows_before": len(raw),
+        "rows_after": len(cleaned),
+        "bytes_before": raw.nbytes,
+        "bytes_after": cleaned.nbytes,
+        "bytes_saved": raw.nbytes - cleaned.nbytes,
+        "dtypes": {f.name: str(f.type) for f in cleaned.table.schema},
+        "seconds": {k: round(v, 4) for k, v in steps.items()},
+    }
+    return cleaned, report
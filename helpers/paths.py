@@ -1,11 +1,56 @@
 # helpers/paths.py
 import os, streamlit as st
 
+_ENV_LOADED = False
+
+def _load_dotenv() -> None:
+    """Merge ./.env into the environment once, on the first setting read (existing variables win)."""
+    global _ENV_LOADED
+    if _ENV_LOADED:
+        return
+    _ENV_LOADED = True
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        return
+    load_dotenv()
+
+def get_setting(key: str, default=None):
+    """
+    Read a setting from st.secrets, then the environment (+ .env), then `default`.
+    st.secrets raises when no secrets.toml exists, so that case is just a miss.
+    """
+    try:
+        if key in st.secrets:
+            return st.secrets[key]
+    except Exception:
+        pass
+    _load_dotenv()
+    return os.getenv(key, default)
+
 def get_chart_dir() -> str:
     """
     Return the chart directory (default ./charts). Cloud-friendly default: /tmp/charts if set in secrets.
     """
-    base = st.secrets.get("CHART_DIR", "./charts")
+    base = get_setting("CHART_DIR", "./charts")
+    path = os.path.abspath(base)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def get_cache_dir() -> str:
+    """
+    Return the dataset cache directory (default ./.cache/datasets), overridable via CACHE_DIR in secrets.
+    """
+    base = get_setting("CACHE_DIR", "./.cache/datasets")
+    path = os.path.abspath(base)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def get_llm_cache_dir() -> str:
+    """
+    Return the LLM response cache directory (default ./.cache/llm), overridable via LLM_CACHE_DIR.
+    """
+    base = get_setting("LLM_CACHE_DIR", "./.cache/llm")
     path = os.path.abspath(base)
     os.makedirs(path, exist_ok=True)
     return path
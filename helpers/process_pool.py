@@ -0,0 +1,44 @@
+# helpers/process_pool.py
+import multiprocessing as mp
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+STARTUP_TIMEOUT = 120  # seconds for all workers of a new pool to come up
+
+_MAIN_LOCK = threading.Lock()
+
+def _wait_for_peers(barrier) -> None:
+    barrier.wait(STARTUP_TIMEOUT)
+
+def _started() -> None:
+    pass
+
+def spawn_pool(max_workers: int) -> ProcessPoolExecutor:
+    """
+    A 'spawn' process pool (workers free of the Streamlit server's threads and locks) whose
+    `max_workers` workers are all started before it is returned.
+
+    Streamlit executes app.py as a synthetic `__main__` module, and spawn workers re-run
+    `__main__.__file__` on startup -- i.e. the whole dashboard. ProcessPoolExecutor starts workers
+    lazily from submit(), so the path is hidden once, here, while one warm-up task per worker starts
+    all of them (each worker waits for its peers, so none can finish early and be reused instead).
+    Limit: the pool must never start a worker later -- no max_tasks_per_child; a pool whose worker
+    died is broken (BrokenProcessPool) and gets replaced by a new spawn_pool().
+    """
+    ctx = mp.get_context("spawn")
+    pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=ctx,
+                               initializer=_wait_for_peers, initargs=(ctx.Barrier(max_workers),))
+    main = sys.modules.get("__main__")
+    path = getattr(main, "__file__", None)
+    hide = path is not None and getattr(main, "__spec__", None) is None
+    with _MAIN_LOCK:
+        if hide:
+            del main.__file__
+        try:
+            for _ in range(max_workers):
+                pool.submit(_started)  # each submit starts a worker while none is idle
+        finally:
+            if hide:
+                main.__file__ = path
+    return pool
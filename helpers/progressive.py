@@ -0,0 +1,121 @@
+# helpers/progressive.py
+import threading
+import weakref
+from statistics import NormalDist
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .aggregation import AGG_FUNCS, engine_for
+from .frame_cache import frame_cached
+from .paths import get_setting
+from .tracing import note_cache, traced
+
+SAMPLE_ROWS = 100_000
+MIN_ROWS = 1_000_000      # smaller frames are aggregated exactly right away
+CONFIDENCE = 0.95
+CI_LOW, CI_HIGH, SAMPLE_N = "ci_low", "ci_high", "sample_rows"
+
+class RowSample:
+    """
+    Uniform sample of a frame's rows without replacement (what a reservoir sample yields, drawn from the
+    known row count): `n` positions from a fixed seed, columns gathered on first use. Works on DataFrames
+    and out-of-core ChunkedFrames; estimates are cached per (category, numeric, agg, confidence).
+    """
+
+    def __init__(self, df: pd.DataFrame, n: int = SAMPLE_ROWS, seed: int = 0):
+        self.population = len(df)
+        self.n = min(n, self.population)
+        self.positions = np.sort(np.random.default_rng(seed).choice(self.population, self.n, replace=False))
+        self._df = weakref.ref(df)
+        self._columns: Dict[str, pd.Series] = {}
+        self._estimates: Dict[Tuple, pd.DataFrame] = {}
+        self._lock = threading.Lock()
+
+    def column(self, name: str) -> pd.Series:
+        with self._lock:
+            s = self._columns.get(name)
+        if s is None:
+            df = self._df()
+            if df is None:
+                raise ReferenceError("DataFrame of this RowSample was released.")
+            if isinstance(df, pd.DataFrame):
+                s = df[name].iloc[self.positions].reset_index(drop=True)
+            else:
+                s = df.take(self.positions, [name])[name]  # helpers.out_of_core.ChunkedFrame
+            with self._lock:
+                s = self._columns.setdefault(name, s)
+        return s
+
+    def estimate(self, category: str, numeric: str, agg: str = "sum",
+                 confidence: float = CONFIDENCE) -> pd.DataFrame:
+        """
+        [category, numeric, ci_low, ci_high, sample_rows], groups sorted like the exact pivot (NaN keys dropped).
+        Horvitz-Thompson estimates for sum / count and the group sample mean for mean, each with a normal
+        confidence interval (finite population corrected); min / max are the sample's, without an interval.
+        Groups absent from the sample are absent here.
+        """
+        if agg not in AGG_FUNCS:
+            raise ValueError(f"Unsupported aggregation: {agg}")
+        key = (category, numeric, agg, confidence)
+        with self._lock:
+            hit = self._estimates.get(key)
+        note_cache(hit is not None)
+        if hit is not None:
+            return hit.copy()
+
+        codes, uniques = pd.factorize(self.column(category), sort=True)
+        y = self.column(numeric).to_numpy(dtype="float64", na_value=np.nan)
+        keep = codes >= 0
+        codes, y = codes[keep], y[keep]
+        groups = len(uniques)
+        has = ~np.isnan(y)
+        y0 = np.where(has, y, 0.0)
+        rows = np.bincount(codes, minlength=groups)
+        counts = np.bincount(codes, weights=has.astype(np.float64), minlength=groups)
+        s1 = np.bincount(codes, weights=y0, minlength=groups)
+        s2 = np.bincount(codes, weights=y0 * y0, minlength=groups)
+
+        n, N = max(self.n, 1), self.population
+        fpc = 1.0 - n / N if N else 0.0
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if agg == "count":
+                est = counts * N / n
+                p = counts / n
+                var = N * N * fpc * p * (1 - p) / max(n - 1, 1)
+            elif agg == "sum":
+                est = s1 * N / n
+                var = N * N * fpc * (s2 - s1 * s1 / n) / max(n - 1, 1) / n
+            elif agg == "mean":
+                est = s1 / counts
+                var = fpc * (s2 - s1 * s1 / counts) / (counts - 1) / counts
+            else:
+                est = pd.Series(y).groupby(codes).agg(agg).reindex(range(groups)).to_numpy(dtype="float64")
+                var = np.full(groups, np.nan)
+            half = z * np.sqrt(np.maximum(var, 0.0))
+        low, high = est - half, est + half
+        if agg == "count":
+            low = np.maximum(low, counts)  # the population has at least the sampled rows
+        out = pd.DataFrame({category: uniques, numeric: est, CI_LOW: low, CI_HIGH: high,
+                            SAMPLE_N: rows.astype(np.int64)})
+        with self._lock:
+            self._estimates[key] = out
+        return out.copy()
+
+def sample_for(df: pd.DataFrame) -> RowSample:
+    """The shared RowSample of this frame (PROGRESSIVE_SAMPLE_ROWS rows, default 100k)."""
+    n = int(get_setting("PROGRESSIVE_SAMPLE_ROWS", SAMPLE_ROWS))
+    return frame_cached(df, "row_sample", lambda frame: RowSample(frame, n))
+
+@traced("aggregate.estimate")
+def estimate_pivot(df: pd.DataFrame, category: str, numeric: str, agg: str = "sum",
+                   confidence: float = CONFIDENCE) -> pd.DataFrame:
+    return sample_for(df).estimate(category, numeric, agg, confidence)
+
+def needs_estimate(df: pd.DataFrame, category: str, numeric: str, agg: str = "sum") -> bool:
+    """True when the exact pivot is not cached yet and the frame has PROGRESSIVE_MIN_ROWS rows (default 1M)."""
+    if len(df) < int(get_setting("PROGRESSIVE_MIN_ROWS", MIN_ROWS)):
+        return False
+    return not engine_for(df).cached(category, numeric, agg)
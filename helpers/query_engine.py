@@ -0,0 +1,485 @@
+# helpers/query_engine.py
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .aggregation import engine_for
+from .catalog import catalog_for
+from .frame_cache import frame_cached
+from .tracing import traced
+
+# ===== Plan =====
+class Filter(NamedTuple):
+    column: str
+    op: str        # == != > >= < <= in year
+    value: Any
+
+class Metric(NamedTuple):
+    column: Optional[str]  # None = count rows
+    agg: str               # sum mean count min max
+
+class QueryPlan(NamedTuple):
+    metrics: Tuple[Metric, ...]
+    group_by: Tuple[str, ...] = ()
+    filters: Tuple[Filter, ...] = ()
+    date_bucket: Optional[Tuple[str, str]] = None  # (datetime column, pandas period alias)
+    sort_desc: Optional[bool] = None                # None = natural order
+    limit: Optional[int] = None
+
+# ===== Vocabulary (EN / VI) =====
+AGG_WORDS = {
+    "sum": ("sum", "total", "tổng", "tổng cộng"),
+    "mean": ("average", "avg", "mean", "trung bình"),
+    "count": ("count", "number of", "how many", "số lượng", "đếm", "bao nhiêu"),
+    "min": ("min", "minimum", "smallest value", "giá trị nhỏ nhất"),
+    "max": ("max", "maximum", "largest value", "giá trị lớn nhất"),
+}
+GROUP_MARKERS = ("group by", "grouped by", "for each", "by", "per", "each", "theo", "mỗi", "từng", "của từng")
+BUCKETS = {  # period alias -> (nouns used after a group marker, standalone adjectives)
+    "D": (("day", "date", "ngày"), ("daily", "hàng ngày")),
+    "W": (("week", "tuần"), ("weekly", "hàng tuần")),
+    "M": (("month", "tháng"), ("monthly", "hàng tháng")),
+    "Q": (("quarter", "quý"), ("quarterly", "hàng quý")),
+    "Y": (("year", "năm"), ("yearly", "annual", "annually", "hàng năm")),
+}
+COMPARATORS = {
+    ">=": (">=", "at least", "ít nhất", "từ"),
+    "<=": ("<=", "at most", "tối đa", "không quá"),
+    ">": (">", "over", "above", "greater than", "more than", "trên", "lớn hơn", "hơn"),
+    "<": ("<", "under", "below", "less than", "dưới", "nhỏ hơn", "ít hơn"),
+    "!=": ("!=", "not", "khác"),
+    "==": ("==", "=", "equals", "equal to", "is", "bằng"),
+}
+DESC_WORDS = ("highest", "most", "largest", "biggest", "best", "cao nhất", "lớn nhất", "nhiều nhất")
+ASC_WORDS = ("lowest", "least", "smallest", "worst", "thấp nhất", "nhỏ nhất", "ít nhất")
+
+def _alt(words) -> str:
+    return "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+
+_NUM = r"(-?\d+(?:\.\d+)?)"
+_RE_TOPK = re.compile(r"(?<!\w)(top|bottom)\s*(\d+)?(?!\w)")
+_RE_DESC = re.compile(rf"(?<!\w)({_alt(DESC_WORDS)})(?!\w)(?!\s*\d)")
+_RE_ASC = re.compile(rf"(?<!\w)({_alt(ASC_WORDS)})(?!\w)(?!\s*\d)")
+_RE_YEAR = re.compile(r"(?<!\w)(?:in|năm|during|trong)\s+((?:19|20)\d\d)(?!\w)")
+_RE_CMP = {op: re.compile(rf"^\s*(?:is\s+|là\s+)?(?:{_alt(words)})\s*{_NUM}(?!\w)") for op, words in COMPARATORS.items()}
+_RE_BUCKET = {freq: re.compile(rf"(?<!\w)(?:(?:{_alt(GROUP_MARKERS)})\s+(?:{_alt(nouns)})|{_alt(adjs)})(?!\w)")
+              for freq, (nouns, adjs) in BUCKETS.items()}
+_RE_GROUP_BEFORE = re.compile(rf"(?<!\w)(?:{_alt(GROUP_MARKERS)})\s+$")
+_RE_AND_BEFORE = re.compile(r"^\s*(?:,|and|và|&)\s*$")
+_RE_WHICH_BEFORE = re.compile(r"(?<!\w)(?:which|what|each)\s+$")
+_RE_WHICH_AFTER = re.compile(r"^\s+nào(?!\w)")
+STOP_WORDS = (
+    "what", "which", "who", "is", "are", "was", "were", "the", "a", "an", "of", "in", "on", "at", "for",
+    "to", "and", "or", "with", "where", "show", "me", "give", "list", "tell", "find", "how", "much", "do",
+    "does", "did", "has", "have", "there", "all", "my", "our", "their", "value", "values",
+    "là", "gì", "của", "các", "những", "cho", "tôi", "xem", "hãy", "có", "được", "và", "hoặc", "ở",
+    "tại", "trong", "với", "nào", "bao", "nhiêu", "như", "thế", "này", "đó", "một", "là bao nhiêu",
+)
+_RE_VOCAB = re.compile(rf"(?<!\w)(?:{_alt(set(STOP_WORDS).union(GROUP_MARKERS, DESC_WORDS, ASC_WORDS, ('top', 'bottom'), *AGG_WORDS.values(), *COMPARATORS.values(), *(n + a for n, a in BUCKETS.values())))})(?!\w)")
+
+def normalize_question(text: str) -> str:
+    """Lowercase NFC, separators to spaces, drop trailing punctuation, collapse whitespace."""
+    text = unicodedata.normalize("NFC", str(text)).lower()
+    text = re.sub(r"[_\-/]+", " ", text)
+    text = re.sub(r"[?!;:“”\"'()\[\]{}]+", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+def column_aliases(name: str) -> Tuple[str, ...]:
+    """'UnitPrice' -> ('unitprice', 'unit price'); 'order_id' -> ('order id', 'orderid')."""
+    base = normalize_question(name)
+    spaced = normalize_question(re.sub(r"(?<=[a-z0-9])(?=[A-Z])", " ", str(name)))
+    return tuple(dict.fromkeys(a for a in (base, spaced, spaced.replace(" ", "")) if a))
+
+# ===== Schema signature (part of the compiled-plan cache key) =====
+class _Col(NamedTuple):
+    name: Any
+    kind: str
+    role: str
+    aliases: Tuple[str, ...]
+    values: Tuple[Tuple[str, Any], ...]  # (normalized, original) top values of text columns
+
+def query_schema(df: pd.DataFrame) -> Tuple[_Col, ...]:
+    """Per-frame column signature: name, kind, role, aliases and normalized top values."""
+    def build(frame):
+        cat = catalog_for(frame)
+        cols = []
+        for c, meta in cat.columns.items():
+            values = ()
+            if meta["kind"] == "text" and meta["role"] != "id":
+                values = tuple((normalize_question(v), v) for v, _ in meta.get("top", ())
+                               if isinstance(v, str) and len(v.strip()) >= 2 and not re.fullmatch(r"[\d.\s]+", v))
+            cols.append(_Col(c, meta["kind"], meta["role"], column_aliases(str(c)), values))
+        return tuple(cols)
+    return frame_cached(df, "query_schema", build)
+
+# ===== Compiler =====
+def _find(pattern: str, q: str):
+    return [(m.start(), m.end()) for m in re.finditer(rf"(?<!\w){re.escape(pattern)}(?!\w)", q)] if pattern else []
+
+def _mentions(q: str, schema: Tuple[_Col, ...]) -> List[Tuple[int, int, str, Any, Any]]:
+    """Non-overlapping (start, end, 'col' | 'value', column, value) spans, longest match wins."""
+    cands = []
+    for col in schema:
+        for alias in col.aliases:
+            cands += [(s, e, "col", col.name, None) for s, e in _find(alias, q)]
+        for norm, orig in col.values:
+            cands += [(s, e, "value", col.name, orig) for s, e in _find(norm, q)]
+    cands.sort(key=lambda m: (-(m[1] - m[0]), m[2] != "col", m[0]))
+    taken, out = [], []
+    for m in cands:
+        if all(m[1] <= s or m[0] >= e for s, e in taken):
+            taken.append((m[0], m[1]))
+            out.append(m)
+    return sorted(out)
+
+def _match_hint(hint: str, schema: Tuple[_Col, ...]) -> Optional[Any]:
+    """Substring match of a free-text hint against column aliases."""
+    for col in schema:
+        if any(a in hint or hint in a for a in col.aliases if len(a) >= 3):
+            return col.name
+    return None
+
+def _free_phrases(q: str, taken: List[Tuple[int, int]], max_words: int = 3) -> List[Tuple[int, int, str]]:
+    """Word windows (1..max_words) of question text not claimed by a mention, a number or vocabulary."""
+    blocked = taken + [m.span() for m in _RE_VOCAB.finditer(q)]
+    runs, run = [], []
+    for m in re.finditer(r"\w+", q):
+        if re.fullmatch(r"\d+", m.group()) or any(m.start() < e and m.end() > s for s, e in blocked):
+            if run:
+                runs.append(run)
+            run = []
+        else:
+            run.append(m)
+    if run:
+        runs.append(run)
+    return [(run[i].start(), run[j].end(), q[run[i].start():run[j].end()])
+            for run in runs for i in range(len(run)) for j in range(i, min(i + max_words, len(run)))]
+
+def _agg_in(text: str) -> Optional[str]:
+    best = None
+    for agg, words in AGG_WORDS.items():
+        for m in re.finditer(rf"(?<!\w)({_alt(words)})(?!\w)", text):
+            if best is None or m.start() > best[0]:
+                best = (m.start(), agg)
+    return best[1] if best else None
+
+@lru_cache(maxsize=1024)
+def _compile(q: str, schema: Tuple[_Col, ...], fuzzy: bool = False) -> Optional[QueryPlan]:
+    """
+    With `fuzzy`, phrases no exact alias/value claimed go through the schema's ColumnIndex
+    (resolve_column, match_columns, match_values). The index is looked up here, not passed in,
+    so cached plans do not keep indexes alive; column_index keeps its own small cache of them.
+    """
+    resolver = None
+    if fuzzy:
+        from .column_index import column_index_for_schema  # column_index imports this module
+        resolver = column_index_for_schema(schema)
+    cols = {c.name: c for c in schema}
+    mentions = _mentions(q, schema)
+    filters: List[Filter] = []
+    values: Dict[Any, List[Any]] = {}
+    group_by: List[Any] = []
+    loose: List[Any] = []  # text columns named without a group marker ('top 3 City by Revenue')
+    metric_spans: List[Tuple[int, int, Any]] = []
+
+    prev_end, prev_group = 0, False
+    for start, end, kind, name, value in mentions:
+        if kind == "value":
+            values.setdefault(name, []).append(value)
+            prev_end, prev_group = end, False
+            continue
+        col = cols[name]
+        before, after = q[:start], q[end:]
+        is_group = bool(_RE_GROUP_BEFORE.search(before) or _RE_WHICH_BEFORE.search(before) or _RE_WHICH_AFTER.match(after)) \
+            or bool(prev_group and _RE_AND_BEFORE.match(q[prev_end:start]))
+        cmp = next(((op, float(m.group(1))) for op, rx in _RE_CMP.items() if (m := rx.match(after))), None)
+        if cmp and col.kind == "numeric":
+            filters.append(Filter(name, cmp[0], cmp[1]))
+        elif is_group:
+            group_by.append(name)
+        elif col.kind == "numeric":
+            metric_spans.append((prev_end, start, name))
+        else:
+            loose.append(name)
+        prev_end, prev_group = end, is_group
+
+    # 'top 3 City by Revenue': the text column is the group, the measure after 'by' ranks it
+    ranked = [g for g in group_by if cols[g].kind == "numeric" and cols[g].role != "id"]
+    if ranked and loose:
+        group_by = [g for g in group_by if g not in ranked] + loose
+        metric_spans += [(0, 0, g) for g in ranked]
+        ranked = []
+
+    taken = [(start, end) for start, end, *_ in mentions]
+    # 'by <something>' that no column name matched exactly: let the resolver try
+    if not group_by:
+        if m := re.search(rf"(?<!\w)(?:{_alt(GROUP_MARKERS)})\s+([\w ]+?)(?=\s+(?:and|và|where|with|in|top|bottom)\b|$)", q):
+            hint = m.group(1).strip()
+            hit = resolver.resolve_column(hint) if resolver is not None else _match_hint(hint, schema)
+            if hit is not None and hit in cols:
+                if cols[hit].kind != "numeric":
+                    group_by.append(hit)
+                    taken.append(m.span(1))
+                elif loose and not metric_spans:
+                    group_by += loose
+                    metric_spans.append((0, 0, hit))
+                    taken.append(m.span(1))
+
+    # misspelt / translated column names and values among the leftover words
+    if resolver is not None:
+        phrases = _free_phrases(q, taken)
+        ranking = bool(_RE_TOPK.search(q) or _RE_DESC.search(q) or _RE_ASC.search(q))
+        if phrases and not metric_spans and not (ranked and ranking):
+            hits = resolver.match_columns([p for _, _, p in phrases], numeric=True)
+            best = max(((h[1], i) for i, h in enumerate(hits) if h and cols[h[0]].role != "id"), default=None)
+            if best is not None:
+                start, end, _ = phrases[best[1]]
+                metric_spans.append((0, start, hits[best[1]][0]))
+                taken.append((start, end))
+        # 'top 3 sản phẩm ...', 'thành phố nào ...', 'top 5 customers by Revenue': the ranked / asked-about
+        # dimension (a text or id column); a measure taken for a group-by then ranks it
+        free = [p for p in phrases if all(p[1] <= s or p[0] >= e for s, e in taken)]
+        if free and (ranked or not group_by) and not any(rx.search(q) for rx in _RE_BUCKET.values()):
+            hits = resolver.match_columns([p for _, _, p in free])
+            asked = [i for i, (start, end, _) in enumerate(free)
+                     if hits[i] and (cols[hits[i][0]].kind != "numeric" or cols[hits[i][0]].role == "id")
+                     and (ranking or _RE_WHICH_BEFORE.search(q[:start]) or _RE_WHICH_AFTER.match(q[end:]))]
+            if asked:
+                i = max(asked, key=lambda i: hits[i][1])
+                group_by = [g for g in group_by if g not in ranked] + [hits[i][0]]
+                metric_spans += [(0, 0, g) for g in ranked]
+                taken.append(free[i][:2])
+        if phrases:
+            hits = resolver.match_values([p for _, _, p in phrases])
+            for i in sorted((i for i, h in enumerate(hits) if h), key=lambda i: -hits[i][2]):
+                start, end, _ = phrases[i]
+                if all(end <= s or start >= e for s, e in taken):
+                    values.setdefault(hits[i][0], []).append(hits[i][1])
+                    taken.append((start, end))
+
+    for name, vals in values.items():
+        vals = list(dict.fromkeys(vals))
+        filters.append(Filter(name, "==", vals[0]) if len(vals) == 1 else Filter(name, "in", tuple(vals)))
+
+    dates = [c.name for c in schema if c.role == "datetime"]
+    date_col = next((g for g in group_by if cols[g].role == "datetime"), None) or (dates[0] if dates else None)
+    bucket = None
+    if date_col is not None:
+        freq = next((f for f, rx in _RE_BUCKET.items() if rx.search(q)), None)
+        if freq:
+            bucket = (date_col, freq)
+            group_by = [g for g in group_by if g != date_col]
+        if m := _RE_YEAR.search(q):
+            filters.append(Filter(date_col, "year", int(m.group(1))))
+
+    global_agg = _agg_in(q)
+    topk = _RE_TOPK.search(q)
+    desc = _RE_DESC.search(q)
+    asc = _RE_ASC.search(q)
+
+    metrics = [Metric(name, _agg_in(q[lo:hi]) or global_agg or "sum") for lo, hi, name in metric_spans]
+    if not metrics:
+        if global_agg == "count":
+            metrics = [Metric(None, "count")]
+        elif global_agg or group_by or bucket or topk or desc or asc:
+            measures = [c.name for c in schema if c.kind == "numeric" and c.role != "id"] or \
+                       [c.name for c in schema if c.kind == "numeric"]
+            metrics = [Metric(measures[0], global_agg or "sum")] if measures else [Metric(None, "count")]
+        else:
+            return None  # nothing to compute: leave it to the LLM
+    metrics = list(dict.fromkeys(metrics))
+
+    sort_desc, limit = None, None
+    if topk:
+        sort_desc = topk.group(1) == "top"
+        limit = int(topk.group(2)) if topk.group(2) else 5
+    elif desc or asc:
+        if group_by or bucket:
+            sort_desc, limit = bool(desc), 1
+        elif global_agg is None:
+            metrics = [Metric(m.column, "max" if desc else "min") if m.column else m for m in metrics]
+    elif group_by:
+        sort_desc = True
+
+    return QueryPlan(tuple(metrics), tuple(dict.fromkeys(group_by)), tuple(filters), bucket, sort_desc, limit)
+
+@traced("qa.plan")
+def plan_question(question: str, df: pd.DataFrame, fuzzy: bool = False) -> Optional[QueryPlan]:
+    """
+    Parse a question into a QueryPlan for this frame (None = not a computable question).
+    `fuzzy`: look up phrases without an exact match (typos, synonyms) in the dataset's column index.
+    """
+    q = normalize_question(question)
+    if not q:
+        return None
+    return _compile(q, query_schema(df), fuzzy)
+
+# ===== Executor =====
+def metric_name(m: Metric) -> str:
+    return "count" if m.column is None else f"{m.agg}({m.column})"
+
+def _dates(df: pd.DataFrame, col) -> pd.Series:
+    """Datetime view of a column (string dates parsed once per frame)."""
+    def parse(frame):
+        s = frame[col]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            # parse each distinct label once, then gather by code
+            cats = pd.to_datetime(pd.Series(s.cat.categories), errors="coerce", format="mixed")
+            cats = cats.to_numpy(dtype="datetime64[ns]", na_value=np.datetime64("NaT"))
+            codes = s.cat.codes.to_numpy()
+            vals = np.where(codes >= 0, cats[codes], np.datetime64("NaT"))
+            return pd.Series(vals, index=s.index, name=s.name)
+        if not pd.api.types.is_datetime64_any_dtype(s):
+            s = pd.to_datetime(s, errors="coerce", format="mixed")
+        if not isinstance(s.dtype, (np.dtype, pd.DatetimeTZDtype)):
+            s = s.astype("datetime64[ns]")  # Arrow timestamps have no .dt.to_period
+        return s
+    return frame_cached(df, f"dates:{col}", parse)
+
+def _mask(df: pd.DataFrame, filters: Tuple[Filter, ...]) -> Optional[np.ndarray]:
+    mask = None
+    for f in filters:
+        s = df[f.column]
+        if f.op == "year":
+            m = (_dates(df, f.column).dt.year == f.value).to_numpy(dtype=bool, na_value=False)
+        elif f.op == "in":
+            m = s.isin(f.value).to_numpy(dtype=bool)
+        elif f.op in ("==", "!=") and not pd.api.types.is_numeric_dtype(s):
+            m = (s == f.value).to_numpy(dtype=bool, na_value=False)
+            m = ~m if f.op == "!=" else m
+        else:
+            v = s.to_numpy(dtype="float64", na_value=np.nan)
+            with np.errstate(invalid="ignore"):
+                m = {"==": v == f.value, "!=": v != f.value, ">": v > f.value,
+                     ">=": v >= f.value, "<": v < f.value, "<=": v <= f.value}[f.op]
+        mask = m if mask is None else (mask & m)
+    return mask
+
+def _group_keys(df: pd.DataFrame, plan: QueryPlan) -> List[pd.Series]:
+    keys = [df[g] for g in plan.group_by]
+    if plan.date_bucket is not None:
+        col, freq = plan.date_bucket
+        keys.append(_dates(df, col).dt.to_period(freq).rename(f"{col} ({freq})"))
+    return keys
+
+def _execute_frame(df: pd.DataFrame, plan: QueryPlan, names: List[str]) -> pd.DataFrame:
+    mask = _mask(df, plan.filters)
+    keys = _group_keys(df, plan)
+    if mask is not None:
+        keys = [k[mask] for k in keys]
+    cols = list(dict.fromkeys(m.column for m in plan.metrics if m.column is not None))
+    sub = df[cols] if mask is None else df.loc[mask, cols]
+
+    if keys:
+        g = sub.groupby(keys, observed=True, dropna=False, sort=True)
+        return pd.DataFrame({name: (g.size() if m.column is None else g[m.column].agg(m.agg))
+                             for m, name in zip(plan.metrics, names)}).reset_index()
+    return pd.DataFrame({name: [len(sub) if m.column is None else sub[m.column].agg(m.agg)]
+                         for m, name in zip(plan.metrics, names)})
+
+_PARTIAL_AGGS = ("sum", "count", "min", "max")
+_ROWS = "rows"
+
+def _partials(chunk: pd.DataFrame, plan: QueryPlan, cols: List[str]) -> pd.DataFrame:
+    """
+    One batch filtered and reduced to rows and sum(c) / count(c) / min(c) / max(c) per group of the
+    plan (one row when ungrouped).
+    """
+    mask = _mask(chunk, plan.filters)
+    keys = _group_keys(chunk, plan)
+    sub = chunk[cols]
+    if mask is not None:
+        keys, sub = [k[mask] for k in keys], sub[mask]
+    if not keys:
+        return pd.DataFrame({**{metric_name(Metric(c, a)): [sub[c].agg(a)] for c in cols for a in _PARTIAL_AGGS},
+                             _ROWS: [len(sub)]})
+    g = sub.groupby(keys, observed=True, dropna=False, sort=False)
+    out = pd.DataFrame({_ROWS: g.size()})
+    for c in cols:
+        for a in _PARTIAL_AGGS:
+            out[metric_name(Metric(c, a))] = g[c].agg(a)
+    return out
+
+def _execute_chunked(frame, plan: QueryPlan, names: List[str]) -> pd.DataFrame:
+    """
+    Plans with filters, several group-bys or a date bucket on an out-of-core ChunkedFrame: each batch
+    (only the columns the plan reads) is reduced by _partials, then partials are merged per group.
+    """
+    cols = list(dict.fromkeys(m.column for m in plan.metrics if m.column is not None))
+    used = {*plan.group_by, *cols, *(f.column for f in plan.filters)}
+    if plan.date_bucket is not None:
+        used.add(plan.date_bucket[0])
+    used = [c for c in frame.columns if c in used]
+    tables = list(frame.tables()) or [frame.table.slice(0, 0)]
+    parts = pd.concat([_partials(frame.to_pandas(t.select(used)), plan, cols) for t in tables])
+    how = {_ROWS: "sum", **{metric_name(Metric(c, a)): "sum" if a == "count" else a
+                            for c in cols for a in _PARTIAL_AGGS}}
+    grouped = bool(plan.group_by) or plan.date_bucket is not None
+    if grouped:
+        merged = parts.groupby(level=list(range(parts.index.nlevels)), dropna=False, sort=True).agg(how)
+    else:
+        merged = pd.DataFrame({c: [parts[c].agg(f)] for c, f in how.items()})
+
+    def metric(m: Metric) -> pd.Series:
+        if m.column is None:
+            return merged[_ROWS]
+        if m.agg == "mean":
+            return merged[metric_name(Metric(m.column, "sum"))] / merged[metric_name(Metric(m.column, "count"))]
+        return merged[metric_name(m)]
+    out = pd.DataFrame({name: metric(m) for m, name in zip(plan.metrics, names)}, index=merged.index)
+    return out.reset_index(drop=not grouped)
+
+@traced("qa.execute")
+def execute_plan(df: pd.DataFrame, plan: QueryPlan) -> pd.DataFrame:
+    """
+    Run a plan on the frame; returns [group columns..., metric columns...] (one row when ungrouped).
+    Out-of-core ChunkedFrames are filtered and aggregated batch by batch.
+    """
+    names = [metric_name(m) for m in plan.metrics]
+
+    if len(plan.group_by) == 1 and not plan.filters and plan.date_bucket is None:
+        # common case: served from the shared aggregation engine (cached factorization)
+        engine, cat = engine_for(df), plan.group_by[0]
+        out = engine.size(cat, dropna=False)[[cat]]
+        for m, name in zip(plan.metrics, names):
+            out[name] = (engine.size(cat, dropna=False)["count"] if m.column is None
+                         else engine.pivot(cat, m.column, m.agg, dropna=False)[m.column]).to_numpy()
+    else:
+        out = (_execute_frame if isinstance(df, pd.DataFrame) else _execute_chunked)(df, plan, names)
+        if plan.date_bucket is not None:
+            bucket = out.columns[len(plan.group_by)]
+            out[bucket] = out[bucket].astype(str)
+
+    if plan.sort_desc is not None and len(out) > 1:
+        out = out.sort_values(names[0], ascending=not plan.sort_desc, kind="stable")
+    if plan.limit:
+        out = out.head(plan.limit)
+    return out.reset_index(drop=True)
+
+def to_markdown(df: pd.DataFrame, max_rows: int = 10) -> str:
+    """Pipe table of the first rows (no tabulate dependency)."""
+    def cell(v):
+        if isinstance(v, float):
+            return f"{v:,.2f}".rstrip("0").rstrip(".") if np.isfinite(v) else ""
+        return str(v).replace("|", "\\|")
+    head = df.head(max_rows)
+    lines = ["| " + " | ".join(cell(c) for c in head.columns) + " |",
+             "|" + "|".join("---" for _ in head.columns) + "|"]
+    lines += ["| " + " | ".join(cell(v) for v in row) + " |" for row in head.itertuples(index=False)]
+    return "\n".join(lines)
+
+def describe_plan(plan: QueryPlan) -> str:
+    """Human-readable one-liner, e.g. 'sum(Qty) by City where City in (...), top 5'."""
+    text = ", ".join(metric_name(m) for m in plan.metrics)
+    by = [str(g) for g in plan.group_by] + ([f"{plan.date_bucket[0]} ({plan.date_bucket[1]})"] if plan.date_bucket else [])
+    if by:
+        text += " by " + ", ".join(by)
+    if plan.filters:
+        text += " where " + " and ".join(f"{f.column} {f.op} {f.value!r}" for f in plan.filters)
+    if plan.limit:
+        text += f", {'top' if plan.sort_desc else 'bottom'} {plan.limit}"
+    return text
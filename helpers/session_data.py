@@ -0,0 +1,245 @@
+# helpers/session_data.py
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import weakref
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .paths import get_setting
+from .tracing import span
+
+DEFAULT_BUDGET_MB = 512
+
+def frame_bytes(df: Optional[pd.DataFrame]) -> int:
+    return int(df.memory_usage(deep=True).sum()) if isinstance(df, pd.DataFrame) else 0
+
+# ===== Spillable frame =====
+class FrameRef:
+    """
+    One session-owned DataFrame that may live in memory or in a Parquet file of the session's spill dir.
+    get() reloads a spilled frame for the caller only (it stays cold); head(n) reads just n rows.
+    A frame shared through the dataset registry carries its `lease`, released when the frame is spilled;
+    it is only spilled once no other session leases it (until then a copy on disk would free nothing).
+    """
+
+    def __init__(self, df: pd.DataFrame, lease: Any = None):
+        self._df: Optional[pd.DataFrame] = df
+        self.lease = lease
+        self.path: Optional[str] = None
+        self.nbytes = frame_bytes(df)
+        self.rows = len(df)
+        self.touched = time.monotonic()
+
+    @property
+    def spilled(self) -> bool:
+        return self._df is None
+
+    def get(self) -> pd.DataFrame:
+        self.touched = time.monotonic()
+        df = self._df
+        if df is not None:
+            return df
+        with span("session.reload", rows=self.rows):
+            # pandas metadata in the file restores dtypes and index
+            return pq.read_table(self.path).to_pandas(split_blocks=True, self_destruct=True)
+
+    def head(self, n: int = 50) -> pd.DataFrame:
+        df = self._df
+        if df is not None:
+            return df.head(n)
+        pf = pq.ParquetFile(self.path)
+        batch = next(pf.iter_batches(batch_size=n), None)
+        table = pa.Table.from_batches([batch]) if batch is not None else pf.schema_arrow.empty_table()
+        return table.replace_schema_metadata(pf.schema_arrow.metadata).to_pandas()
+
+    def _spill(self, folder: str) -> int:
+        """
+        Write the frame to Parquet and drop it from memory; bytes freed (0 when it cannot be written
+        or other sessions still lease it).
+        """
+        df = self._df
+        if df is None or (self.lease is not None and self.lease.shared):
+            return 0
+        if self.path is None:
+            path = os.path.join(folder, f"{uuid.uuid4().hex}.parquet")
+            try:
+                with span("session.spill", rows=self.rows):
+                    pq.write_table(pa.Table.from_pandas(df, preserve_index=None), path, compression="zstd")
+            except (pa.ArrowException, TypeError, ValueError, OSError):
+                if os.path.exists(path):
+                    os.remove(path)
+                return 0  # e.g. mixed-type object columns: keep it in memory
+            self.path = path
+        self._df = None
+        self._release_lease()
+        return self.nbytes
+
+    def _release_lease(self) -> None:
+        if self.lease is not None:
+            self.lease.release()
+            self.lease = None
+
+    def _drop_file(self) -> None:
+        self._release_lease()
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+        self.path = None
+
+# ===== Session data =====
+class SessionData:
+    """
+    Frames of one browser session under a memory budget (SESSION_MEMORY_MB, default 512):
+      - raw and cleaned share one frame until cleaning replaces `cleaned` (pandas copy-on-write,
+        so nobody can modify the other through it)
+      - report pivots are tracked as FrameRefs
+      - over budget, the least recently used of the raw frame (once cleaning replaced it) and the
+        pivots are spilled to Parquet in a private temp dir; the cleaned frame (the working set)
+        always stays in memory
+    The spill dir is removed when the session's state is garbage collected.
+    """
+
+    def __init__(self, budget_bytes: Optional[int] = None, spill_root: Optional[str] = None):
+        if budget_bytes is None:
+            budget_bytes = int(float(get_setting("SESSION_MEMORY_MB", DEFAULT_BUDGET_MB)) * 2**20)
+        self.budget_bytes = budget_bytes
+        self._spill_root = spill_root or get_setting("SPILL_DIR") or None
+        self._dir: Optional[str] = None
+        self._raw: Optional[FrameRef] = None
+        self._cleaned: Optional[pd.DataFrame] = None
+        self._cleaned_bytes = 0
+        self._cleaned_lease: Any = None
+        self._pivots: List[FrameRef] = []
+        self._lock = threading.RLock()
+
+    # --- datasets ---
+    @property
+    def loaded(self) -> bool:
+        return self._raw is not None
+
+    @property
+    def raw(self) -> Optional[pd.DataFrame]:
+        """The uploaded frame (reloaded from disk when it was spilled)."""
+        ref = self._raw
+        return ref.get() if ref is not None else None
+
+    @property
+    def cleaned(self) -> Optional[pd.DataFrame]:
+        """The working frame: the cleaned data, or the raw frame itself before cleaning."""
+        return self._cleaned
+
+    def raw_head(self, n: int = 50) -> Optional[pd.DataFrame]:
+        ref = self._raw
+        return ref.head(n) if ref is not None else None
+
+    def set_raw(self, df: pd.DataFrame, lease: Any = None) -> None:
+        """
+        New upload: raw and cleaned are the same frame; previous frames and pivots are released.
+        `lease` (from the dataset registry) is held until the frame is spilled or replaced.
+        """
+        with self._lock:
+            self.clear()
+            self._raw = FrameRef(df, lease)
+            self._cleaned, self._cleaned_bytes = df, self._raw.nbytes
+            self.enforce()
+
+    def set_cleaned(self, df: pd.DataFrame, lease: Any = None) -> None:
+        with self._lock:
+            self._release_cleaned()
+            self._cleaned, self._cleaned_bytes, self._cleaned_lease = df, frame_bytes(df), lease
+            self.enforce()
+
+    def _release_cleaned(self) -> None:
+        if self._cleaned_lease is not None:
+            self._cleaned_lease.release()
+            self._cleaned_lease = None
+
+    # --- report pivots ---
+    def track(self, df: Any) -> Any:
+        """Wrap a report pivot so it counts against the budget (non-frames are returned as is)."""
+        if not isinstance(df, pd.DataFrame):
+            return df
+        with self._lock:
+            ref = FrameRef(df)
+            self._pivots.append(ref)
+            self.enforce()
+        return ref
+
+    def release(self, ref: Any) -> None:
+        """Forget a pivot whose report was removed."""
+        with self._lock:
+            if isinstance(ref, FrameRef) and ref in self._pivots:
+                self._pivots.remove(ref)
+                ref._drop_file()
+
+    def release_all(self) -> None:
+        with self._lock:
+            for ref in self._pivots:
+                ref._drop_file()
+            self._pivots = []
+
+    # --- budget ---
+    def memory_bytes(self) -> int:
+        """Bytes held in memory (a frame shared by raw and cleaned counts once)."""
+        with self._lock:
+            total = self._cleaned_bytes
+            raw = self._raw
+            if raw is not None and not raw.spilled and raw._df is not self._cleaned:
+                total += raw.nbytes
+            return total + sum(r.nbytes for r in self._pivots if not r.spilled)
+
+    def spilled_bytes(self) -> int:
+        with self._lock:
+            refs = self._pivots + ([self._raw] if self._raw is not None else [])
+            return sum(r.nbytes for r in refs if r.spilled)
+
+    def _spill_dir(self) -> str:
+        if self._dir is None:
+            if self._spill_root:
+                os.makedirs(self._spill_root, exist_ok=True)
+            self._dir = tempfile.mkdtemp(prefix="session_", dir=self._spill_root)
+            weakref.finalize(self, shutil.rmtree, self._dir, True)
+        return self._dir
+
+    def enforce(self) -> int:
+        """Spill cold frames until the session fits its budget; returns the bytes freed."""
+        with self._lock:
+            used = self.memory_bytes()
+            if used <= self.budget_bytes:
+                return 0
+            candidates = [r for r in self._pivots if not r.spilled]
+            raw = self._raw
+            if raw is not None and not raw.spilled and raw._df is not self._cleaned:
+                candidates.append(raw)
+            freed = 0
+            for ref in sorted(candidates, key=lambda r: r.touched):
+                if used - freed <= self.budget_bytes:
+                    break
+                freed += ref._spill(self._spill_dir())
+            return freed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            refs = self._pivots + ([self._raw] if self._raw is not None else [])
+            return {"memory_mb": round(self.memory_bytes() / 2**20, 1),
+                    "spilled_mb": round(self.spilled_bytes() / 2**20, 1),
+                    "budget_mb": round(self.budget_bytes / 2**20, 1),
+                    "spilled_frames": sum(r.spilled for r in refs)}
+
+    def clear(self) -> None:
+        with self._lock:
+            self.release_all()
+            if self._raw is not None:
+                self._raw._drop_file()
+            self._release_cleaned()
+            self._raw, self._cleaned, self._cleaned_bytes = None, None, 0
+
+def load_frame(obj: Any) -> Any:
+    """The DataFrame behind a FrameRef (reloaded if spilled); anything else is returned unchanged."""
+    return obj.get() if isinstance(obj, FrameRef) else obj
@@ -0,0 +1,204 @@
+# helpers/tracing.py
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+
+TRACE_LOG_MAX_BYTES = 16 << 20  # the log is rotated to <path>.1 beyond this
+
+# The active tracer of this script run / job thread (None = tracing off, spans are no-ops).
+_TRACER: ContextVar[Optional["Tracer"]] = ContextVar("tracer", default=None)
+_SPAN: ContextVar[Optional["Span"]] = ContextVar("span", default=None)
+_LOG_LOCK = threading.Lock()
+
+def _rss_mb() -> Optional[float]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2**20
+    except Exception:
+        return None
+
+def _rows_of(obj) -> Optional[int]:
+    if isinstance(obj, tuple) and obj:
+        obj = obj[0]
+    shape = getattr(obj, "shape", None)
+    return int(shape[0]) if isinstance(shape, tuple) and len(shape) == 2 else None
+
+# ===== Spans =====
+class Span:
+    """One timed region: duration, RSS delta, rows processed, cache hits / misses, free attributes."""
+
+    def __init__(self, tracer: "Tracer", name: str, attrs: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.rows: Optional[int] = attrs.pop("rows", None)
+        self.hits = 0
+        self.misses = 0
+        self.parent: Optional[Span] = None
+        self._token = None
+
+    def set(self, rows: Optional[int] = None, **attrs) -> None:
+        if rows is not None:
+            self.rows = int(rows)
+        self.attrs.update(attrs)
+
+    def cache(self, hit: bool) -> None:
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def __enter__(self) -> "Span":
+        self.parent = _SPAN.get()
+        self._token = _SPAN.set(self)
+        self._rss0 = _rss_mb()
+        self._t0 = time.perf_counter()
+        self.start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        ms = (time.perf_counter() - self._t0) * 1000
+        rss = _rss_mb()
+        _SPAN.reset(self._token)
+        depth, p = 0, self.parent
+        while p is not None:
+            depth, p = depth + 1, p.parent
+        self.tracer.record({
+            "ts": round(self.start, 3), "session": self.tracer.session, "name": self.name,
+            "ms": round(ms, 2),
+            "rss_delta_mb": round(rss - self._rss0, 1) if rss is not None and self._rss0 is not None else None,
+            "rows": self.rows, "cache_hits": self.hits, "cache_misses": self.misses,
+            "parent": self.parent.name if self.parent else None, "depth": depth,
+            "thread": threading.current_thread().name,
+            "error": exc_type.__name__ if exc_type is not None and issubclass(exc_type, Exception) else None,
+            **self.attrs,
+        })
+        return False
+
+class _NoopSpan:
+    rows = None
+
+    def set(self, rows=None, **attrs) -> None:
+        pass
+
+    def cache(self, hit: bool) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+_NOOP = _NoopSpan()
+
+def span(name: str, **attrs):
+    """
+    `with span("excel.write", rows=n) as sp: ...` — a no-op singleton when tracing is off.
+    sp.set(rows=..., key=value) and sp.cache(hit) annotate the span while it runs.
+    """
+    tracer = _TRACER.get()
+    return _NOOP if tracer is None else Span(tracer, name, attrs)
+
+def traced(name: Optional[str] = None) -> Callable:
+    """
+    Decorator form of span(); rows default to the first DataFrame argument,
+    else the DataFrame result (or first element of a tuple result).
+    """
+    def deco(fn):
+        label = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            tracer = _TRACER.get()
+            if tracer is None:
+                return fn(*args, **kwargs)
+            with Span(tracer, label, {}) as sp:
+                sp.rows = next((r for r in map(_rows_of, args) if r is not None), None)
+                out = fn(*args, **kwargs)
+                if sp.rows is None:
+                    sp.rows = _rows_of(out)
+                return out
+        return wrapper
+    return deco
+
+def note_cache(hit: bool) -> None:
+    """Count a cache hit / miss on the innermost open span (no-op without one)."""
+    sp = _SPAN.get()
+    if sp is not None:
+        sp.cache(hit)
+
+# ===== Tracer =====
+class Tracer:
+    """
+    Finished spans of one session: the last `max_spans` in memory (for the Performance panel)
+    and, with `log_path`, every span appended as one JSON line.
+    """
+
+    def __init__(self, session: str = "", log_path: Optional[str] = None, max_spans: int = 1000,
+                 max_log_bytes: int = TRACE_LOG_MAX_BYTES):
+        self.session = session
+        self.log_path = os.path.abspath(log_path) if log_path else None
+        self.max_log_bytes = max_log_bytes
+        self._spans: deque = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+
+    def record(self, item: Dict[str, Any]) -> None:
+        with self._lock:
+            self._spans.append(item)
+        if self.log_path:
+            line = json.dumps(item, default=str, ensure_ascii=False) + "\n"
+            try:
+                with _LOG_LOCK:
+                    os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+                    if os.path.exists(self.log_path) and os.path.getsize(self.log_path) > self.max_log_bytes:
+                        os.replace(self.log_path, self.log_path + ".1")
+                    with open(self.log_path, "a", encoding="utf-8") as f:
+                        f.write(line)
+            except OSError:
+                pass  # tracing must never break the app
+
+    def records(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._spans)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Per span name: calls, total / mean / max ms, rows, cache hits / misses, max RSS delta; slowest first."""
+        out: Dict[str, Dict[str, Any]] = {}
+        for r in self.records():
+            s = out.setdefault(r["name"], {"name": r["name"], "calls": 0, "total_ms": 0.0, "max_ms": 0.0,
+                                           "rows": 0, "cache_hits": 0, "cache_misses": 0, "max_rss_delta_mb": None})
+            s["calls"] += 1
+            s["total_ms"] += r["ms"]
+            s["max_ms"] = max(s["max_ms"], r["ms"])
+            s["rows"] += r["rows"] or 0
+            s["cache_hits"] += r["cache_hits"]
+            s["cache_misses"] += r["cache_misses"]
+            if r["rss_delta_mb"] is not None:
+                prev = s["max_rss_delta_mb"]
+                s["max_rss_delta_mb"] = r["rss_delta_mb"] if prev is None else max(prev, r["rss_delta_mb"])
+        for s in out.values():
+            s["mean_ms"] = round(s["total_ms"] / s["calls"], 2)
+            s["total_ms"] = round(s["total_ms"], 2)
+        return sorted(out.values(), key=lambda s: -s["total_ms"])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spans.clear()
+
+def activate(tracer: Optional[Tracer]) -> None:
+    """Make `tracer` the active one for this thread's context (None turns tracing off)."""
+    _TRACER.set(tracer)
+
+def current_tracer() -> Optional[Tracer]:
+    return _TRACER.get()
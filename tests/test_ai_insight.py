@@ -0,0 +1,57 @@
+# tests/test_ai_insight.py
+import pandas as pd
+import pytest
+
+from helpers import ai_insight
+from helpers.ai_insight import FakeModel, LLMDispatcher, generate_insights
+from helpers.llm_cache import ResponseCache
+
+@pytest.fixture
+def use_model(monkeypatch, tmp_path):
+    """use_model(backend, model): answer every prompt with `model` under LLM_BACKEND=backend."""
+    monkeypatch.setattr(ai_insight, "_CACHE", ResponseCache(str(tmp_path)))
+    monkeypatch.setattr(ai_insight, "_DISPATCHER", LLMDispatcher(rate_per_sec=1000, burst=100, backoff=0.01))
+    monkeypatch.setenv("INSIGHT_BATCH_SIZE", "5")
+
+    def use(backend, model):
+        monkeypatch.setitem(ai_insight.LLM_BACKENDS, backend, lambda lang: model)
+        monkeypatch.setenv("LLM_BACKEND", backend)
+        ai_insight._model_for.cache_clear()
+        return model
+
+    yield use
+    ai_insight._model_for.cache_clear()
+
+def _charts(n):
+    return [{"pivot": pd.DataFrame({"City": ["Hanoi", "Hue"], f"Qty{i}": [i, 2 * i]}),
+             "category": "City", "numeric": f"Qty{i}"} for i in range(n)]
+
+def test_nine_charts_take_two_batches(use_model):
+    model = use_model("fake", FakeModel(latency=0))
+    insights = generate_insights(_charts(9))
+    assert model.calls == 2
+    assert insights == [f"fake: sum of Qty{i} by City" for i in range(9)]
+
+def test_missing_ids_are_asked_one_by_one(use_model):
+    model = use_model("fake", FakeModel(latency=0, drop_ids=[1, 6]))
+    insights = generate_insights(_charts(9))
+    assert model.calls == 2 + 2
+    assert all(insights)
+    assert insights[1].startswith("fake: Give ONE") and insights[6].startswith("fake: Give ONE")
+    assert insights[0] == "fake: sum of Qty0 by City"
+
+def test_only_complete_batches_are_cached(use_model):
+    use_model("fake", FakeModel(latency=0, drop_ids=[2]))
+    generate_insights(_charts(9))
+    model = use_model("fake", FakeModel(latency=0))
+    insights = generate_insights(_charts(9))
+    assert model.calls == 1  # the incomplete first batch is asked again, the second one is a hit
+    assert insights[2] == "fake: sum of Qty2 by City"
+    assert generate_insights(_charts(9)) == insights and model.calls == 1
+
+def test_fake_answers_never_serve_gemini(use_model):
+    use_model("fake", FakeModel(latency=0))
+    generate_insights(_charts(3))
+    gemini = use_model("gemini", FakeModel(latency=0))
+    generate_insights(_charts(3))
+    assert gemini.calls == 1
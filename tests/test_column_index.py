@@ -0,0 +1,31 @@
+# tests/test_column_index.py
+import pandas as pd
+import pytest
+
+from helpers.column_index import column_index_for, concept_groups
+from helpers.query_engine import Metric, plan_question
+
+SALES = pd.DataFrame({"City": ["Hanoi", "Hue", "Hue"], "Revenue": [1.0, 2.0, 3.0],
+                      "UnitPrice": [10, 20, 30], "Qty": [1, 2, 3]})
+VI_SALES = pd.DataFrame({"Thành phố": ["Hà Nội", "Huế"], "Doanh thu": [1.0, 2.0]})
+
+def test_concepts_come_from_locale_labels():
+    revenue = next(g for g in concept_groups() if "revenue" in g)
+    assert "sales" in revenue and "doanh thu" in revenue
+
+@pytest.mark.parametrize("df, question, metric, group_by", [
+    (SALES, "doanh thu theo thành phố", Metric("Revenue", "sum"), ("City",)),
+    (SALES, "doanh số theo thành phố", Metric("Revenue", "sum"), ("City",)),
+    (SALES, "max revnue by city", Metric("Revenue", "max"), ("City",)),
+    (SALES, "average unit prcie by city", Metric("UnitPrice", "mean"), ("City",)),
+    (VI_SALES, "total sales by city", Metric("Doanh thu", "sum"), ("Thành phố",)),
+])
+def test_questions_resolve_through_the_index(df, question, metric, group_by):
+    plan = plan_question(question, df, fuzzy=True)
+    assert plan.metrics == (metric,) and plan.group_by == group_by
+
+def test_misspelled_column_names():
+    index = column_index_for(SALES)
+    assert index.resolve_column("Reveune") == "Revenue"
+    assert index.resolve_column("unit prcie", numeric=True) == "UnitPrice"
+    assert index.match_values(["hanoi"])[0][:2] == ("City", "Hanoi")
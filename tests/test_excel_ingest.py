@@ -0,0 +1,30 @@
+# tests/test_excel_ingest.py
+import pandas as pd
+
+from helpers.excel_ingest import SHEET_COLUMN, list_sheets, read_workbook
+
+def _workbook(path, sheets):
+    with pd.ExcelWriter(path, engine="xlsxwriter") as w:
+        for name, df in sheets.items():
+            df.to_excel(w, sheet_name=name, index=False)
+    return str(path)
+
+def test_stacked_sheets_get_a_label_column(tmp_path):
+    path = _workbook(tmp_path / "book.xlsx", {"Jan": pd.DataFrame({"Qty": [1, 2]}),
+                                              "Feb": pd.DataFrame({"Qty": [3], "City": ["Hue"]})})
+    assert [s["name"] for s in list_sheets(path)] == ["Jan", "Feb"]
+    df = read_workbook(path, ["Jan", "Feb"])
+    assert list(df.columns) == [SHEET_COLUMN, "Qty", "City"]
+    assert df[SHEET_COLUMN].tolist() == ["Jan", "Jan", "Feb"]
+
+def test_label_column_does_not_collide(tmp_path):
+    sheets = {"A": pd.DataFrame({"Sheet": ["x"], "Sheet.1": ["y"], "Qty": [1]}),
+              "B": pd.DataFrame({"Sheet": ["z"], "Qty": [2]})}
+    df = read_workbook(_workbook(tmp_path / "book.xlsx", sheets), ["A", "B"])
+    assert list(df.columns) == ["Sheet.2", "Sheet", "Sheet.1", "Qty"]
+    assert df["Sheet.2"].tolist() == ["A", "B"]
+    assert df["Sheet"].tolist() == ["x", "z"]
+
+def test_single_sheet_is_returned_as_is(tmp_path):
+    path = _workbook(tmp_path / "book.xlsx", {"Only": pd.DataFrame({"Sheet": ["x"], "Qty": [1]})})
+    assert list(read_workbook(path, ["Only"]).columns) == ["Sheet", "Qty"]
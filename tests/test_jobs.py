@@ -0,0 +1,79 @@
+# tests/test_jobs.py
+import threading
+import time
+
+from helpers.jobs import JobCancelled, JobManager
+
+def _wait(manager, job_id, timeout=5.0):
+    deadline = time.time() + timeout
+    while not manager.get(job_id).done:
+        assert time.time() < deadline, "job did not finish"
+        time.sleep(0.005)
+    return manager.get(job_id)
+
+def test_round_robin_per_owner():
+    manager = JobManager(max_workers=1)
+    gate, order = threading.Event(), []
+
+    def task(name, progress):
+        gate.wait(5)
+        order.append(name)
+
+    first = manager.submit("t", task, "a0", owner="a")  # occupies the only worker
+    ids = [manager.submit("t", task, name, owner=owner)
+           for name, owner in (("a1", "a"), ("a2", "a"), ("a3", "a"), ("b1", "b"), ("c1", "c"), ("b2", "b"))]
+    assert manager.get(ids[0]).status == "queued"
+    gate.set()
+    for job_id in [first] + ids:
+        _wait(manager, job_id)
+    assert order == ["a0", "a1", "b1", "c1", "a2", "b2", "a3"]
+
+def test_cancel_running_and_queued_jobs():
+    manager = JobManager(max_workers=1)
+    started, raised = threading.Event(), []
+
+    def spin(progress):
+        started.set()
+        try:
+            while True:
+                progress("spin", 0.5)
+                time.sleep(0.005)
+        except JobCancelled as e:
+            raised.append(e)
+            raise
+
+    running = manager.submit("spin", spin, owner="a")
+    queued = manager.submit("spin", spin, owner="a")
+    assert started.wait(5)
+    assert manager.cancel(queued) and manager.get(queued).status == "cancelled"
+    assert manager.cancel(running)
+    job = _wait(manager, running)
+    assert job.status == "cancelled" and job.stage == "spin"
+    assert len(raised) == 1  # the queued job never started
+    assert not manager.cancel(running)  # already finished
+
+def test_failed_job_is_logged_not_printed(caplog, capsys):
+    manager = JobManager(max_workers=1)
+
+    def boom(progress):
+        raise ValueError("bad column")
+
+    with caplog.at_level("ERROR", logger="helpers.jobs"):
+        job = _wait(manager, manager.submit("boom", boom, owner="a"))
+    assert job.status == "error" and job.error == "ValueError: bad column"
+    assert "bad column" in caplog.text
+    assert capsys.readouterr().err == ""
+
+def test_results_until_collected_or_expired():
+    manager = JobManager(max_workers=1, result_ttl=3600)
+    done = manager.submit("t", lambda progress: 42, owner="a")
+    assert _wait(manager, done).result == 42
+    assert manager.collect(done).result == 42 and manager.get(done) is None
+
+    manager.result_ttl = 0.05
+    stale = manager.submit("t", lambda progress: 1, owner="a")
+    _wait(manager, stale)
+    time.sleep(0.1)
+    fresh = manager.submit("t", lambda progress: 2, owner="b")  # submit prunes expired results
+    assert manager.get(stale) is None
+    assert _wait(manager, fresh).result == 2
@@ -0,0 +1,109 @@
+# tests/test_json_ingest.py
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from helpers.dataset_store import DatasetStore
+from helpers.ingest import (JsonLayoutMismatch, _decode_records, _json_blocks, _json_marks, _record_members,
+                            json_layout, read_dataframe)
+from helpers.out_of_core import load_chunked
+
+ROWS = [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}]
+
+def _dumps(obj) -> bytes:
+    return json.dumps(obj).encode()
+
+@pytest.mark.parametrize("doc, layout", [
+    (b'{"id": 1}\n{"id": 2}\n', "ndjson"),
+    (_dumps(ROWS), "array"),
+    (b"  \n[ \n {\"id\": 1}]", "array"),
+    (b"[]", "other"),
+    (b"[1, 2, 3]", "other"),
+    (b'[[1, 2], [3, 4]]', "other"),
+    (_dumps({"meta": {"n": 2}, "data": ROWS}), "records"),
+    (_dumps({"tags": [], "data": ROWS}), "records"),
+    (_dumps({"tags": [1, 2], "data": ROWS}), "records"),
+    (_dumps({"a": ROWS, "b": ROWS}), "other"),
+    (_dumps({"data": []}), "other"),
+    (_dumps({"id": {"0": 1, "1": 2}, "name": {"0": "a", "1": "b"}}), "other"),
+    (_dumps({"note": "[{not an array}]", "data": ROWS}), "records"),
+    (b"42", "other"),
+    (b"   ", "other"),
+])
+def test_json_layout(doc, layout):
+    assert json_layout(doc)[0] == layout
+
+def test_records_offset_points_past_bracket():
+    doc = _dumps({"tags": [], "data": ROWS})
+    layout, start = json_layout(doc)
+    assert layout == "records" and doc[start - 1:start] == b"[" and doc[start:].lstrip().startswith(b"{")
+
+@pytest.mark.parametrize("doc", [
+    _dumps({"tags": [], "data": ROWS}),
+    _dumps({"a": ROWS, "b": ROWS}),
+    _dumps({"meta": {"source": "x"}, "rows": ROWS}),
+])
+def test_read_matches_pandas_shape(doc):
+    df = read_dataframe(doc, "json")
+    layout = json_layout(doc)[0]
+    expected = pd.DataFrame(ROWS) if layout == "records" else pd.read_json(io.BytesIO(doc))
+    assert df.shape == expected.shape
+
+@pytest.mark.parametrize("block_size", [1 << 10, 1 << 20])
+def test_second_member_beyond_head_falls_back(tmp_path, block_size):
+    padding = "x" * (1 << 17)  # pushes the second record array past the 64 KB head json_layout reads
+    doc = _dumps({"a": ROWS, "pad": padding, "b": ROWS})
+    assert json_layout(doc)[0] == "records"
+    with pytest.raises(JsonLayoutMismatch):
+        _split(doc, block_size)
+    expected = pd.read_json(io.BytesIO(doc))
+    assert read_dataframe(doc, "json").shape == expected.shape
+    store = DatasetStore(str(tmp_path), max_bytes=1 << 30)
+    assert load_chunked(store, "doc", doc, "json").shape == expected.shape
+
+def test_record_members_past_head():
+    doc = _dumps({"a": ROWS, "pad": "x" * (1 << 17), "b": ROWS})
+    assert len(_record_members(pa.py_buffer(doc), block_size=1 << 12)) == 2
+
+def test_record_members_across_blocks_inside_strings():
+    # tiny blocks end inside strings and next to backslashes; string contents must never count
+    tricky = 'q\\"[{"x": 1}]\\\\'
+    doc = _dumps({"s": tricky, "data": ROWS, "t": tricky})
+    for block_size in (1, 2, 3, 5, 8, 13):
+        assert len(_record_members(pa.py_buffer(doc), block_size=block_size)) == 1
+    assert json_layout(doc)[0] == "records"
+
+@pytest.mark.parametrize("text", [
+    'plain', 'say \\"hi\\"', 'ends with slash \\\\', 'brackets ] [ } {', 'commas, in, text', '\\\\\\"',
+])
+def test_json_marks_skip_strings(text):
+    doc = f'[{{"k": "{text}", "n": [1, 2]}}]'.encode()
+    marks, ch, depth = _json_marks(np.frombuffer(doc, np.uint8))
+    assert bytes(ch).decode() == "[{,[,]}]"
+    assert depth[-1] == 0
+
+def test_json_marks_starting_in_string():
+    doc = b'still a string ] , "{"a": [1]}'
+    marks, ch, depth = _json_marks(np.frombuffer(doc, np.uint8), in_string=True)
+    assert bytes(ch).decode() == "{[]}"
+
+def _split(doc: bytes, block_size: int):
+    buf = pa.py_buffer(doc)
+    layout, start = json_layout(buf)
+    return [r for _, b in _json_blocks(buf, layout, start, block_size) for r in _decode_records(b.to_pybytes().decode())]
+
+@pytest.mark.parametrize("block_size", [4, 16, 64, 1 << 20])
+def test_json_blocks_split_between_records(block_size):
+    rows = [{"id": i, "text": t, "nested": {"list": [i, "]", {"x": ","}]}}
+            for i, t in enumerate(['a, b', 'x ] y', '{ "quoted" }', 'esc \\" ,]', 'slash \\\\', '[[', ''])]
+    doc = json.dumps({"meta": {"rows": len(rows)}, "data": rows}, indent=1).encode()
+    assert _split(doc, block_size) == rows
+    assert _split(json.dumps(rows).encode(), block_size) == rows
+
+def test_json_blocks_unclosed_array():
+    with pytest.raises(pa.ArrowInvalid):
+        _split(b'[{"id": 1}, {"id": 2}', 1 << 20)
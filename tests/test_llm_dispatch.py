@@ -0,0 +1,50 @@
+# tests/test_llm_dispatch.py
+import time
+
+from helpers.ai_insight import FakeModel, LLMDispatcher
+
+def _dispatcher(**kwargs):
+    opts = dict(max_concurrency=3, rate_per_sec=1000, burst=100, timeout=5.0, max_retries=3, backoff=0.01)
+    opts.update(kwargs)
+    return LLMDispatcher(**opts)
+
+def _prompts(n):
+    return [[f"prompt {i}"] for i in range(n)]
+
+def test_results_keep_request_order():
+    model = FakeModel(latency=0.001, jitter=0.05)
+    out = _dispatcher(max_concurrency=4).map(model, _prompts(20))
+    assert [r["text"] for r in out] == [f"fake: prompt {i}" for i in range(20)]
+    assert all(r["error"] is None for r in out)
+
+def test_peak_concurrency_stays_at_limit():
+    model = FakeModel(latency=0.02)
+    _dispatcher(max_concurrency=3).map(model, _prompts(12))
+    assert model.max_in_flight == 3
+
+def test_rate_limited_calls_are_retried():
+    model = FakeModel(latency=0.001, rate_limited=2)
+    out = _dispatcher(max_concurrency=1).map(model, _prompts(3))
+    assert [r["error"] for r in out] == [None] * 3
+    assert model.calls == 5
+
+def test_retries_give_up_after_max_retries():
+    model = FakeModel(latency=0.001, rate_limited=10)
+    out = _dispatcher(max_concurrency=1, max_retries=1).map(model, _prompts(1))
+    assert "429" in out[0]["error"] and model.calls == 2
+
+def test_per_call_timeout_is_an_error_result():
+    model = FakeModel(latency=0.2)
+    out = _dispatcher(timeout=0.01).map(model, _prompts(2))
+    assert all(r["error"] and r["text"] == "" for r in out)
+    assert model.calls == 2  # timeouts are not retried
+
+class _Hangs:
+    """A model that ignores its request timeout."""
+
+    def generate_content(self, parts, request_options=None):
+        time.sleep(0.5)
+
+def test_deadline_is_an_error_result():
+    out = _dispatcher(timeout=0.02, max_retries=0).map(_Hangs(), _prompts(1))
+    assert out == [{"text": "", "error": "timeout"}]
@@ -0,0 +1,71 @@
+# tests/test_out_of_core.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.datagen import write_dataset
+from helpers.aggregation import AGG_FUNCS, engine_for
+from helpers.catalog import catalog_for
+from helpers.data_processing import auto_clean_with_report
+from helpers.dataset_store import DatasetStore
+from helpers.ingest import read_dataframe
+from helpers.out_of_core import clean_chunked, load_chunked
+from helpers.query_engine import Filter, Metric, QueryPlan, execute_plan
+
+@pytest.fixture(scope="module")
+def frames(tmp_path_factory):
+    """{"raw" / "clean": (in-memory frame, ChunkedFrame of several batches)} of the same CSV."""
+    folder = tmp_path_factory.mktemp("ooc")
+    with open(write_dataset(str(folder / "sales.csv"), 30_000, "csv", seed=3), "rb") as f:
+        data = f.read()
+    store = DatasetStore(str(folder / "cache"), max_bytes=1 << 30)
+    raw = load_chunked(store, "sales", data, "csv", block_size=1 << 18)
+    clean, _ = clean_chunked(store, "sales", raw)
+    df = read_dataframe(data, "csv")
+    dc, _ = auto_clean_with_report(df)
+    assert raw.table.num_rows == len(df) and len(raw.table.to_batches()) > 1
+    return {"raw": (df, raw), "clean": (dc, clean)}
+
+@pytest.mark.parametrize("stage", ["raw", "clean"])
+def test_pivots_match_in_memory(frames, stage):
+    mem, ooc = frames[stage]
+    cat = catalog_for(mem)
+    checked = 0
+    for c in cat.category_columns:
+        for v in cat.numeric_columns:
+            for agg in AGG_FUNCS:
+                for dropna in (True, False):
+                    a = engine_for(mem).pivot(c, v, agg, dropna=dropna)
+                    b = engine_for(ooc).pivot(c, v, agg, dropna=dropna)
+                    # float sums are added per chunk first: equal up to the last bits
+                    exact = agg not in ("sum", "mean") or a[v].dtype.kind != "f"
+                    pd.testing.assert_frame_equal(a, b, check_exact=exact, rtol=1e-12)
+                    checked += 1
+    assert checked >= 100
+
+PLANS = [
+    QueryPlan((Metric("Qty", "sum"),), ("City",), (Filter("Qty", ">", 10),)),
+    QueryPlan((Metric("Revenue", "mean"), Metric(None, "count")), ("Region", "Channel")),
+    QueryPlan((Metric("UnitPrice", "max"), Metric("UnitPrice", "min")), ("Category",),
+              (Filter("City", "in", ("Hanoi", "Hue")),)),
+    QueryPlan((Metric("Revenue", "sum"),), (), (Filter("OrderDate", "year", 2024), Filter("Channel", "!=", "Online"))),
+    QueryPlan((Metric("Qty", "count"), Metric("Discount", "mean")), ()),
+    QueryPlan((Metric("Revenue", "sum"),), ("Region",), date_bucket=("OrderDate", "Q")),
+    QueryPlan((Metric("Qty", "sum"),), (), date_bucket=("OrderDate", "M"), sort_desc=True, limit=3),
+    QueryPlan((Metric(None, "count"),), ("City",), (Filter("Revenue", ">=", 1e9),)),
+]
+
+@pytest.mark.parametrize("stage", ["raw", "clean"])
+@pytest.mark.parametrize("plan", PLANS, ids=range(len(PLANS)))
+def test_plans_match_in_memory(frames, stage, plan):
+    mem, ooc = frames[stage]
+    a, b = execute_plan(mem, plan), execute_plan(ooc, plan)
+    assert list(a.columns) == list(b.columns)
+    assert len(a) == len(b)
+    for col in a.columns:
+        x, y = a[col], b[col]
+        if pd.api.types.is_numeric_dtype(x) and not pd.api.types.is_bool_dtype(x):
+            np.testing.assert_allclose(x.to_numpy(float, na_value=np.nan), y.to_numpy(float, na_value=np.nan),
+                                       rtol=1e-9)
+        else:
+            assert x.astype(object).where(x.notna(), None).tolist() == y.astype(object).where(y.notna(), None).tolist()
@@ -0,0 +1,117 @@
+# tests/test_query_engine.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.datagen import sales_dataset
+from helpers import ai_insight
+from helpers.ai_insight import FakeModel, LLMDispatcher, ai_answer_question
+from helpers.llm_cache import ResponseCache
+from helpers.query_engine import Filter, Metric, QueryPlan, execute_plan, plan_question
+
+SALES = sales_dataset(3000, seed=5)
+
+def plan(metrics, group_by=(), filters=(), date_bucket=None, sort_desc=None, limit=None):
+    return QueryPlan(tuple(metrics), tuple(group_by), tuple(filters), date_bucket, sort_desc, limit)
+
+@pytest.mark.parametrize("question, expected", [
+    ("top 5 Qty by City", plan([Metric("Qty", "sum")], ["City"], sort_desc=True, limit=5)),
+    ("total revenue by region and channel", plan([Metric("Revenue", "sum")], ["Region", "Channel"], sort_desc=True)),
+    ("average UnitPrice by Category where Qty > 10",
+     plan([Metric("UnitPrice", "mean")], ["Category"], [Filter("Qty", ">", 10.0)], sort_desc=True)),
+    ("Revenue by City where Qty >= 5 and Discount < 0.1",
+     plan([Metric("Revenue", "sum")], ["City"], [Filter("Qty", ">=", 5.0), Filter("Discount", "<", 0.1)], sort_desc=True)),
+    ("monthly revenue in Hanoi", plan([Metric("Revenue", "sum")], filters=[Filter("City", "==", "Hanoi")],
+                                      date_bucket=("OrderDate", "M"))),
+    ("quarterly revenue in 2024", plan([Metric("Revenue", "sum")], filters=[Filter("OrderDate", "year", 2024)],
+                                       date_bucket=("OrderDate", "Q"))),
+    ("which city has the highest revenue", plan([Metric("Revenue", "sum")], ["City"], sort_desc=True, limit=1)),
+    ("bottom 3 Category by Revenue", plan([Metric("Revenue", "sum")], ["Category"], sort_desc=False, limit=3)),
+    ("how many orders in Hue", plan([Metric(None, "count")], filters=[Filter("City", "==", "Hue")])),
+    ("max Discount", plan([Metric("Discount", "max")])),
+    ("revenue where Channel is Online", plan([Metric("Revenue", "sum")], filters=[Filter("Channel", "==", "Online")])),
+    ("Qty trung bình theo Category", plan([Metric("Qty", "mean")], ["Category"], sort_desc=True)),
+    ("top 3 City theo Revenue", plan([Metric("Revenue", "sum")], ["City"], sort_desc=True, limit=3)),
+    ("Revenue ở Hanoi theo quý", plan([Metric("Revenue", "sum")], filters=[Filter("City", "==", "Hanoi")],
+                                      date_bucket=("OrderDate", "Q"))),
+])
+def test_plans(question, expected):
+    assert plan_question(question, SALES) == expected
+
+@pytest.mark.parametrize("question, expected", [
+    ("tổng doanh thu theo thành phố", plan([Metric("Revenue", "sum")], ["City"], sort_desc=True)),
+    ("doanh thu trung bình theo kênh", plan([Metric("Revenue", "mean")], ["Channel"], sort_desc=True)),
+    ("doanh thu hàng tháng năm 2024", plan([Metric("Revenue", "sum")], filters=[Filter("OrderDate", "year", 2024)],
+                                            date_bucket=("OrderDate", "M"))),
+    ("thành phố nào có doanh thu cao nhất", plan([Metric("Revenue", "sum")], ["City"], sort_desc=True, limit=1)),
+    ("kênh nào có doanh thu thấp nhất", plan([Metric("Revenue", "sum")], ["Channel"], sort_desc=False, limit=1)),
+    ("top 3 sản phẩm theo doanh thu", plan([Metric("Revenue", "sum")], ["Product"], sort_desc=True, limit=3)),
+    ("top 5 customers by revenue", plan([Metric("Revenue", "sum")], ["CustomerID"], sort_desc=True, limit=5)),
+    ("highest revenue in ha noi", plan([Metric("Revenue", "max")], filters=[Filter("City", "==", "Hanoi")])),
+])
+def test_fuzzy_plans(question, expected):
+    assert plan_question(question, SALES, fuzzy=True) == expected
+
+@pytest.mark.parametrize("question", ["hello", "xin chào", "what is this dataset about", "tell me a joke", "   "])
+def test_small_talk_has_no_plan(question):
+    assert plan_question(question, SALES, fuzzy=True) is None
+
+def _rows(df: pd.DataFrame) -> dict:
+    """{(group keys as text...): value} of a result whose last column is the single metric."""
+    keys = [[str(v) for v in df[c]] for c in df.columns[:-1]]
+    return dict(zip(zip(*keys), df.iloc[:, -1].to_numpy(float)))
+
+def _expected(series: pd.Series) -> dict:
+    return {tuple(str(k) for k in (key if isinstance(key, tuple) else (key,))): float(v) for key, v in series.items()}
+
+def _months(df):
+    return pd.to_datetime(df["OrderDate"], format="mixed").dt.to_period("M")
+
+@pytest.mark.parametrize("question, expected", [
+    ("total revenue by region and channel", lambda d: d.groupby(["Region", "Channel"], dropna=False)["Revenue"].sum()),
+    ("average UnitPrice by Category where Qty > 10",
+     lambda d: d[d["Qty"] > 10].groupby("Category", dropna=False)["UnitPrice"].mean()),
+    ("monthly revenue in Hanoi", lambda d: d[d["City"] == "Hanoi"].groupby(_months(d[d["City"] == "Hanoi"]))["Revenue"].sum()),
+    ("min Discount by Channel where City is Hue",
+     lambda d: d[d["City"] == "Hue"].groupby("Channel", dropna=False)["Discount"].min()),
+    ("count by PaymentMethod", lambda d: d.groupby("PaymentMethod", dropna=False).size()),
+])
+def test_execute_matches_groupby(question, expected):
+    result = execute_plan(SALES, plan_question(question, SALES))
+    want = _expected(expected(SALES))
+    got = _rows(result)
+    assert got.keys() == want.keys()
+    np.testing.assert_allclose([got[k] for k in want], list(want.values()), rtol=1e-9)
+
+def test_execute_top_k_and_totals():
+    top = execute_plan(SALES, plan_question("top 5 Qty by City", SALES))
+    by_city = SALES.groupby("City")["Qty"].sum().sort_values(ascending=False)
+    assert top["sum(Qty)"].tolist() == by_city.head(5).tolist()
+    assert top["City"].tolist() == by_city.head(5).index.tolist()
+    hue = execute_plan(SALES, plan_question("how many orders in Hue", SALES))
+    assert hue["count"].tolist() == [int((SALES["City"] == "Hue").sum())]
+    year = execute_plan(SALES, plan_question("total Revenue in 2024", SALES))
+    dates = pd.to_datetime(SALES["OrderDate"], format="mixed")
+    assert year["sum(Revenue)"][0] == pytest.approx(SALES.loc[dates.dt.year == 2024, "Revenue"].sum())
+
+@pytest.fixture
+def fake_llm(monkeypatch, tmp_path):
+    model = FakeModel(latency=0)
+    monkeypatch.setattr(ai_insight, "_CACHE", ResponseCache(str(tmp_path)))
+    monkeypatch.setattr(ai_insight, "_DISPATCHER", LLMDispatcher(rate_per_sec=1000, burst=100))
+    monkeypatch.setitem(ai_insight.LLM_BACKENDS, "fake", lambda lang: model)
+    monkeypatch.setenv("LLM_BACKEND", "fake")
+    ai_insight._model_for.cache_clear()
+    yield model
+    ai_insight._model_for.cache_clear()
+
+def test_computed_answer_only_asks_for_phrasing(fake_llm):
+    _, reply = ai_answer_question(SALES, "top 5 Qty by City")
+    assert reply.startswith("fake: Write ONE concise insight") and "| City | sum(Qty) |" in reply
+
+@pytest.mark.parametrize("question", ["what is this dataset about", "xin chào",
+                                      "Revenue by City in 1999"])  # the last one plans to an empty result
+def test_unplanned_questions_fall_back_to_chat(fake_llm, question):
+    _, reply = ai_answer_question(SALES, question)
+    assert reply.startswith("fake: You are a helpful data assistant")
+    assert fake_llm.calls == 1
@@ -0,0 +1,29 @@
+# tests/test_session_data.py
+import pandas as pd
+
+from helpers.dataset_registry import DatasetRegistry
+from helpers.session_data import SessionData
+
+KEY = ("sales", "raw")
+
+def _frame():
+    return pd.DataFrame({"Qty": range(10_000), "City": ["Hue"] * 10_000})
+
+def _session(registry, tmp_path):
+    lease = registry.acquire(*KEY, _frame)
+    data = SessionData(budget_bytes=1, spill_root=str(tmp_path))
+    data.set_raw(lease.frame, lease)
+    return data
+
+def test_shared_raw_frame_is_not_spilled(tmp_path):
+    registry = DatasetRegistry()
+    a, b = _session(registry, tmp_path), _session(registry, tmp_path)
+    a.set_cleaned(a.cleaned.head(10))  # raw becomes a spill candidate
+    assert a.stats()["spilled_frames"] == 0 and a.spilled_bytes() == 0
+    assert registry.refs(KEY) == 2
+
+    b.clear()
+    a.enforce()
+    assert a.stats()["spilled_frames"] == 1
+    assert registry.refs(KEY) == 0
+    assert a.raw.equals(_frame())